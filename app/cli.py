@@ -0,0 +1,757 @@
+"""
+Command line interface of the PAdES tool.
+
+Run from the repository root: python -m app.cli <command> ...
+
+The module never imports Qt. Heavy dependencies (cryptography, pyudev, psutil)
+are imported inside the commands that need them, so startup stays fast.
+"""
+
+import argparse
+import os
+import sys
+from typing import Optional
+
+# mirrors ReportWriter.FORMATS, key_generation.KEY_TYPES and
+# chunked_digest.DEFAULT_CHUNK_SIZE, which are not imported at startup
+REPORT_FORMATS = ("jsonl", "csv")
+KEY_TYPES = ("rsa", "ecdsa-p256", "ecdsa-p384", "ed25519")
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+
+
+def _read_pin(pin_file: Optional[str], prompt: str = "Enter PIN for private key: "):
+    if pin_file == "-":
+        return sys.stdin.readline().rstrip("\n")
+    if pin_file:
+        with open(pin_file, "r") as f:
+            return f.readline().rstrip("\n")
+
+    import getpass
+
+    return getpass.getpass(prompt)
+
+
+def _find_private_key_on_pen_drive() -> Optional[str]:
+    from app.pendrive_detection import PenDriveFinder
+
+    detector = PenDriveFinder()
+    pen_drive = detector.find_pen_drive_with_private_key(detector.find_all_pen_drives())
+    if pen_drive is None:
+        return None
+    return detector.get_private_key_path(pen_drive)
+
+
+def _load_private_key(private_key_path: Optional[str], pin_file: Optional[str]):
+    from app.keys_loading import PrivateKey
+
+    if private_key_path is None:
+        private_key_path = _find_private_key_on_pen_drive()
+        if private_key_path is None:
+            print("Private key has not been found on any pen drive", file=sys.stderr)
+            return None
+
+    private_key = PrivateKey()
+    try:
+        if not private_key.load_private_key(private_key_path, _read_pin(pin_file)):
+            print("Failed to load private key: invalid PIN", file=sys.stderr)
+            return None
+    except (OSError, ValueError) as e:
+        print(f"Failed to load private key: {e}", file=sys.stderr)
+        return None
+    return private_key.value
+
+
+def _load_public_key(public_key_path: str):
+    from app.keys_loading import PublicKey
+
+    public_key = PublicKey()
+    if not public_key.load_public_key(public_key_path):
+        print(f"Failed to load public key: {public_key_path}", file=sys.stderr)
+        return None
+    return public_key.value
+
+
+def sign(args: argparse.Namespace) -> int:
+    if args.skip_signed and (args.pades or args.detached):
+        print(
+            "--skip-signed cannot be used with --pades or --detached", file=sys.stderr
+        )
+        return 2
+
+    private_key = _load_private_key(args.key, args.pin_file)
+    if private_key is None:
+        return 1
+
+    try:
+        if args.pades:
+            from app.pdf.pades_signer import PAdESSigner
+
+            pdf_signer = PAdESSigner(private_key, atomic=args.atomic)
+        elif args.chunked:
+            from app.pdf.chunked_signer import ChunkedPDFSigner
+
+            pdf_signer = ChunkedPDFSigner(
+                private_key, args.chunk_size, atomic=args.atomic
+            )
+        else:
+            from app.pdf.pdf_signer import PDFSigner
+
+            pdf_signer = PDFSigner(private_key, args.atomic)
+    except ValueError as e:
+        print(f"Cannot sign with this key: {e}", file=sys.stderr)
+        return 1
+    failed = 0
+    for pdf_file_path in args.files:
+        try:
+            if args.skip_signed and pdf_signer.already_signed(pdf_file_path):
+                print(f"SKIP   {pdf_file_path}: already signed")
+                continue
+            if args.detached:
+                sidecar_file_path = pdf_signer.sign_detached(pdf_file_path)
+                print(f"OK     {pdf_file_path} -> {sidecar_file_path}")
+                continue
+            pdf_signer.sign(pdf_file_path)
+            print(f"OK     {pdf_file_path}")
+        except (OSError, ValueError) as e:
+            failed += 1
+            print(f"FAILED {pdf_file_path}: {e}")
+    return 0 if failed == 0 else 1
+
+
+def verify(args: argparse.Namespace) -> int:
+    if args.keyring and args.detached:
+        print("--detached cannot be used with --keyring", file=sys.stderr)
+        return 2
+    if args.keyring:
+        return verify_keyring(args)
+
+    public_key = _load_public_key(args.key)
+    if public_key is None:
+        return 1
+
+    from app.pdf.pdf_verifier import PDFVerifier
+
+    cache = None
+    if args.cache:
+        from app.pdf.verification_cache import VerificationCache
+
+        cache = VerificationCache(args.cache)
+    pdf_verifier = PDFVerifier(public_key, cache)
+    invalid = 0
+    for pdf_file_path in args.files:
+        try:
+            if args.detached:
+                valid = pdf_verifier.verify_detached(pdf_file_path)
+            else:
+                valid = pdf_verifier.verify(pdf_file_path)
+        except (OSError, ValueError) as e:
+            invalid += 1
+            print(f"FAILED  {pdf_file_path}: {e}")
+            continue
+        invalid += not valid
+        print(f"{'VALID  ' if valid else 'INVALID'} {pdf_file_path}")
+        if not valid and args.ranges:
+            _print_corrupt_ranges(pdf_verifier, pdf_file_path)
+    return 0 if invalid == 0 else 1
+
+
+def _print_corrupt_ranges(pdf_verifier, pdf_file_path: str) -> None:
+    try:
+        corrupt = pdf_verifier.find_corrupt_ranges(pdf_file_path)
+    except (OSError, ValueError) as e:
+        print(f"        corrupt ranges unknown: {e}")
+        return
+    if corrupt is None:
+        print("        corrupt ranges unknown: not a valid chunked signature")
+    for offset, length in corrupt or ():
+        print(f"        corrupt bytes {offset}-{offset + length - 1}")
+
+
+def sign_manifest(args: argparse.Namespace) -> int:
+    from app.pdf.manifest import sign_manifest as write_manifest
+    from app.pdf.pdf_signer import PDFSigner
+
+    private_key = _load_private_key(args.key, args.pin_file)
+    if private_key is None:
+        return 1
+    try:
+        signer = PDFSigner(private_key)
+        files = write_manifest(signer, args.directory, args.output, args.workers)
+    except (OSError, ValueError) as e:
+        print(f"Failed to sign the manifest: {e}", file=sys.stderr)
+        return 1
+    print(f"Signed a manifest of {files} files")
+    return 0
+
+
+def verify_manifest(args: argparse.Namespace) -> int:
+    from app.pdf.manifest import MANIFEST_NAME
+    from app.pdf.manifest import verify_manifest as check_manifest
+    from app.pdf.pdf_verifier import PDFVerifier
+
+    public_key = _load_public_key(args.key)
+    if public_key is None:
+        return 1
+
+    manifest_path = args.manifest
+    if os.path.isdir(manifest_path):
+        manifest_path = os.path.join(manifest_path, MANIFEST_NAME)
+    try:
+        report = check_manifest(
+            PDFVerifier(public_key), manifest_path, args.directory, args.workers
+        )
+    except (OSError, ValueError) as e:
+        print(f"Failed to verify the manifest: {e}", file=sys.stderr)
+        return 1
+
+    if not report.signature_valid:
+        print(f"INVALID {manifest_path}: the manifest signature is not valid")
+        return 1
+    for path in report.missing:
+        print(f"MISSING  {path}")
+    for path in report.modified:
+        print(f"MODIFIED {path}")
+    for path in report.unlisted:
+        print(f"UNLISTED {path}")
+    intact = report.files - len(report.missing) - len(report.modified)
+    print(f"{intact}/{report.files} listed files intact")
+    return 0 if report.ok else 1
+
+
+def verify_keyring(args: argparse.Namespace) -> int:
+    from app.pdf.keyring import PublicKeyring
+    from app.pdf.multi_key_verifier import MultiKeyVerifier
+
+    keyring = PublicKeyring.from_directory(args.keyring)
+    if len(keyring) == 0:
+        print(f"No public keys found in {args.keyring}", file=sys.stderr)
+        return 1
+
+    verifier = MultiKeyVerifier(keyring)
+    invalid = 0
+    for pdf_file_path in args.files:
+        try:
+            entry = verifier.verify(pdf_file_path)
+        except (OSError, ValueError) as e:
+            invalid += 1
+            print(f"FAILED  {pdf_file_path}: {e}")
+            continue
+        if entry is None:
+            invalid += 1
+            print(f"INVALID {pdf_file_path}")
+        else:
+            print(f"VALID   {pdf_file_path} (signed by {entry.name})")
+    return 0 if invalid == 0 else 1
+
+
+def keygen(args: argparse.Namespace) -> int:
+    pin = _read_pin(args.pin_file)
+    if args.pin_file is None and _read_pin(None, "Confirm PIN: ") != pin:
+        print("PINs do not match", file=sys.stderr)
+        return 1
+
+    kdf = _kdf_from_args(args)
+    if kdf is None:
+        return 1
+
+    from app.keys_loading.key_generation import generate_key_pair, write_key_pair
+
+    private_pem, public_pem = generate_key_pair(pin, args.key_size, args.key_type, kdf)
+    private_key_path, public_key_path = write_key_pair(
+        private_pem, public_pem, args.output_dir
+    )
+    print(f"Private key saved to {private_key_path}")
+    print(f"Public key saved to {public_key_path}")
+    return 0
+
+
+def _kdf_from_args(args: argparse.Namespace):
+    from app.keys_loading import pin_kdf
+
+    if args.kdf_target_ms is not None:
+        kdf, elapsed = pin_kdf.calibrate(args.kdf_target_ms)
+        print(f"Calibrated PIN KDF: {kdf.spec()} ({elapsed:.0f} ms)")
+        return kdf
+    if args.kdf is None:
+        return pin_kdf.DEFAULT_KDF
+    try:
+        return pin_kdf.KDFParameters.parse(args.kdf)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return None
+
+
+def kdf_calibrate(args: argparse.Namespace) -> int:
+    from app.keys_loading import pin_kdf
+
+    kdf, elapsed = pin_kdf.calibrate(args.target_ms, args.algorithm)
+    print(f"{kdf.spec()}  # {elapsed:.0f} ms on this machine")
+    return 0
+
+
+def kdf_migrate(args: argparse.Namespace) -> int:
+    kdf = _kdf_from_args(args)
+    if kdf is None:
+        return 1
+
+    from app.keys_loading.key_generation import migrate_private_key_file
+
+    pin = _read_pin(args.pin_file)
+    failed = 0
+    for private_key_path in args.keys:
+        try:
+            previous = migrate_private_key_file(private_key_path, pin, kdf)
+            print(f"OK     {private_key_path}: {previous.spec()} -> {kdf.spec()}")
+        except (OSError, ValueError) as e:
+            failed += 1
+            print(f"FAILED {private_key_path}: {e}")
+    return 0 if failed == 0 else 1
+
+
+def sign_batch(args: argparse.Namespace) -> int:
+    from app.pdf.batch_signer import BatchSigner, find_pdf_files
+
+    pdf_file_paths = find_pdf_files(args.files, args.recursive)
+    if not pdf_file_paths:
+        print(f"No PDF files found: {args.files}", file=sys.stderr)
+        return 1
+
+    private_key = _load_private_key(args.key, args.pin_file)
+    if private_key is None:
+        return 1
+
+    signer = BatchSigner(
+        private_key,
+        args.hash_workers,
+        args.sign_workers,
+        atomic=args.atomic,
+        skip_signed=args.skip_signed,
+    )
+    for result in signer.sign_files(pdf_file_paths):
+        if result.skipped:
+            print(f"SKIP   {result.path}: already signed")
+        elif result.ok:
+            print(f"OK     {result.path} ({result.seconds * 1000:.1f} ms)")
+        else:
+            print(f"FAILED {result.path}: {result.error}")
+
+    summary = signer.summary
+    print(
+        f"Signed {summary.files - summary.failed - summary.skipped}/{summary.files} "
+        f"files, skipped {summary.skipped}, in {summary.seconds:.2f} s "
+        f"({summary.files_per_second:.1f} files/s, {summary.mb_per_second:.1f} MB/s)"
+    )
+    return 0 if summary.failed == 0 else 1
+
+
+def verify_batch(args: argparse.Namespace) -> int:
+    from app.pdf.batch_signer import find_pdf_files
+    from app.pdf.batch_verifier import BatchVerifier, ReportWriter
+
+    pdf_file_paths = find_pdf_files(args.files, args.recursive)
+    if not pdf_file_paths:
+        print(f"No PDF files found: {args.files}", file=sys.stderr)
+        return 1
+
+    try:
+        verifier = BatchVerifier.from_key_files(args.key, args.workers)
+    except (OSError, ValueError) as e:
+        print(f"Failed to load public keys: {e}", file=sys.stderr)
+        return 1
+
+    output = open(args.output, "w", newline="") if args.output else sys.stdout
+    invalid = 0
+    try:
+        report = ReportWriter(output, args.format)
+        for result in verifier.verify_files(pdf_file_paths):
+            report.write(result)
+            invalid += not result.valid
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    print(
+        f"Verified {len(pdf_file_paths) - invalid}/{len(pdf_file_paths)} files",
+        file=sys.stderr,
+    )
+    return 0 if invalid == 0 else 1
+
+
+def serve(args: argparse.Namespace) -> int:
+    if args.key is None and args.keyring is None:
+        print("Give --key to sign, --keyring to verify, or both", file=sys.stderr)
+        return 1
+
+    import asyncio
+    import logging
+
+    from app.service import SigningService
+
+    signer = verifier = None
+    if args.key is not None:
+        private_key = _load_private_key(args.key, args.pin_file)
+        if private_key is None:
+            return 1
+
+        from app.pdf.pdf_signer import PDFSigner
+
+        signer = PDFSigner(private_key)
+    if args.keyring is not None:
+        from app.pdf.keyring import PublicKeyring
+        from app.pdf.multi_key_verifier import MultiKeyVerifier
+
+        verifier = MultiKeyVerifier(PublicKeyring.from_directory(args.keyring))
+
+    logging.basicConfig(level=logging.INFO)
+    service = SigningService(signer, verifier, args.concurrency)
+    try:
+        asyncio.run(service.serve_forever(args.socket, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def watch(args: argparse.Namespace) -> int:
+    import logging
+
+    from app.pdf.pdf_signer import PDFSigner
+    from app.watch import SigningDaemon, StateIndex, event_source_for
+
+    if not os.path.isdir(args.directory):
+        print(f"Not a directory: {args.directory}", file=sys.stderr)
+        return 1
+    private_key = _load_private_key(args.key, args.pin_file)
+    if private_key is None:
+        return 1
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    state_path = args.state or os.path.join(args.directory, ".pades-watch.sqlite")
+    index = StateIndex(state_path)
+    source = event_source_for(args.directory, args.interval, args.poll)
+    daemon = SigningDaemon(
+        PDFSigner(private_key, atomic=args.atomic),
+        args.directory,
+        index,
+        source,
+        settle_time=args.settle,
+        workers=args.workers,
+    )
+    try:
+        daemon.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        source.close()
+        index.close()
+    return 0
+
+
+def _add_private_key_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--key",
+        help="Path to the private key (*.pem), searched on pen drives if omitted",
+    )
+    parser.add_argument(
+        "--pin-file", help="File with the PIN on its first line, '-' for stdin"
+    )
+
+
+def _add_output_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--atomic",
+        action="store_true",
+        help="Write each signed file to a temporary copy and rename it over the "
+        "original, so a crash or a full disk never leaves a half-signed file",
+    )
+    parser.add_argument(
+        "--skip-signed",
+        action="store_true",
+        help="Skip files that already end with a signature by this key",
+    )
+
+
+def _add_kdf_arguments(parser: argparse.ArgumentParser) -> None:
+    kdf = parser.add_mutually_exclusive_group()
+    kdf.add_argument(
+        "--kdf",
+        help="PIN KDF parameters as printed by kdf-calibrate, "
+        "e.g. scrypt:n=32768,r=8,p=1 (the default)",
+    )
+    kdf.add_argument(
+        "--kdf-target-ms",
+        type=float,
+        help="Calibrate the PIN KDF to this unlock time first",
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="pades-tool", description="Sign and verify PDF files."
+    )
+    instrumentation = parser.add_argument_group(
+        "instrumentation",
+        "Also configurable with the PADES_METRICS_JSONL, PADES_METRICS_PROM, "
+        "PADES_PROFILE and PADES_TRACEMALLOC environment variables",
+    )
+    instrumentation.add_argument(
+        "--metrics-jsonl", help="Append timing and counter events to a JSON lines file"
+    )
+    instrumentation.add_argument(
+        "--metrics-prom",
+        help="Write aggregated metrics to a Prometheus text file at exit",
+    )
+    instrumentation.add_argument(
+        "--profile", help="Save cProfile statistics of the command to a file"
+    )
+    instrumentation.add_argument(
+        "--tracemalloc",
+        type=int,
+        metavar="TOP",
+        help="Trace memory allocations and log the TOP largest allocation sites",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    sign_parser = subparsers.add_parser("sign", help="Sign PDF files")
+    sign_parser.add_argument("files", nargs="+", help="PDF files to sign")
+    _add_private_key_arguments(sign_parser)
+    sign_modes = sign_parser.add_mutually_exclusive_group()
+    sign_modes.add_argument(
+        "--pades",
+        action="store_true",
+        help="Embed a PAdES signature as an incremental update of the PDF",
+    )
+    sign_modes.add_argument(
+        "--chunked",
+        action="store_true",
+        help="Sign the Merkle root of per-chunk digests, so corrupt ranges "
+        "of huge files can be located",
+    )
+    sign_modes.add_argument(
+        "--detached",
+        action="store_true",
+        help="Write the signature to a .sig file next to each PDF, "
+        "leaving the PDF unchanged",
+    )
+    sign_parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help="Chunk size in bytes for --chunked",
+    )
+    _add_output_arguments(sign_parser)
+    sign_parser.set_defaults(handler=sign)
+
+    verify_parser = subparsers.add_parser("verify", help="Verify signed PDF files")
+    verify_parser.add_argument("files", nargs="+", help="PDF files to verify")
+    verify_keys = verify_parser.add_mutually_exclusive_group(required=True)
+    verify_keys.add_argument("--key", help="Path to the public key (*.pem)")
+    verify_keys.add_argument(
+        "--keyring", help="Directory of public keys (*.pem) to verify against"
+    )
+    verify_parser.add_argument(
+        "--cache", help="SQLite file caching results of unchanged files"
+    )
+    verify_parser.add_argument(
+        "--ranges",
+        action="store_true",
+        help="List the corrupt byte ranges of invalid files signed with --chunked",
+    )
+    verify_parser.add_argument(
+        "--detached",
+        action="store_true",
+        help="Verify the .sig files next to the PDFs, see sign --detached",
+    )
+    verify_parser.set_defaults(handler=verify)
+
+    sign_manifest_parser = subparsers.add_parser(
+        "sign-manifest",
+        help="Write a signed manifest of the size and SHA-256 of every file "
+        "in a directory tree, with a single signature",
+    )
+    sign_manifest_parser.add_argument("directory", help="Root of the tree")
+    _add_private_key_arguments(sign_manifest_parser)
+    sign_manifest_parser.add_argument(
+        "-o",
+        "--output",
+        help="Manifest file, MANIFEST.pades in the directory by default",
+    )
+    sign_manifest_parser.add_argument("--workers", type=int)
+    sign_manifest_parser.set_defaults(handler=sign_manifest)
+
+    verify_manifest_parser = subparsers.add_parser(
+        "verify-manifest", help="Check a directory tree against its signed manifest"
+    )
+    verify_manifest_parser.add_argument(
+        "manifest", help="Manifest file, or a directory holding MANIFEST.pades"
+    )
+    verify_manifest_parser.add_argument(
+        "--key", required=True, help="Path to the public key (*.pem)"
+    )
+    verify_manifest_parser.add_argument(
+        "--directory", help="Root of the tree, the directory of the manifest by default"
+    )
+    verify_manifest_parser.add_argument("--workers", type=int)
+    verify_manifest_parser.set_defaults(handler=verify_manifest)
+
+    keygen_parser = subparsers.add_parser("keygen", help="Generate a new key pair")
+    keygen_parser.add_argument(
+        "-o", "--output-dir", default=".", help="Directory for the key files"
+    )
+    keygen_parser.add_argument(
+        "--key-type",
+        choices=KEY_TYPES,
+        default="rsa",
+        help="ECDSA and Ed25519 keys sign much faster than RSA keys",
+    )
+    keygen_parser.add_argument(
+        "--key-size", type=int, default=4096, help="RSA modulus size in bits"
+    )
+    keygen_parser.add_argument(
+        "--pin-file", help="File with the PIN on its first line, '-' for stdin"
+    )
+    _add_kdf_arguments(keygen_parser)
+    keygen_parser.set_defaults(handler=keygen)
+
+    calibrate_parser = subparsers.add_parser(
+        "kdf-calibrate",
+        help="Pick PIN KDF parameters for a target unlock time on this machine",
+    )
+    calibrate_parser.add_argument("--target-ms", type=float, default=250.0)
+    calibrate_parser.add_argument(
+        "--algorithm", choices=("scrypt", "pbkdf2-sha256"), default="scrypt"
+    )
+    calibrate_parser.set_defaults(handler=kdf_calibrate)
+
+    migrate_parser = subparsers.add_parser(
+        "kdf-migrate",
+        help="Re-encrypt private key files with new PIN KDF parameters",
+    )
+    migrate_parser.add_argument("keys", nargs="+", help="Private key files (*.pem)")
+    migrate_parser.add_argument(
+        "--pin-file", help="File with the PIN on its first line, '-' for stdin"
+    )
+    _add_kdf_arguments(migrate_parser)
+    migrate_parser.set_defaults(handler=kdf_migrate)
+
+    sign_batch_parser = subparsers.add_parser(
+        "sign-batch", help="Sign all PDF files in a directory or matching a glob"
+    )
+    sign_batch_parser.add_argument("files", help="Directory or glob pattern")
+    _add_private_key_arguments(sign_batch_parser)
+    sign_batch_parser.add_argument(
+        "-r", "--recursive", action="store_true", help="Include subdirectories"
+    )
+    sign_batch_parser.add_argument("--hash-workers", type=int)
+    sign_batch_parser.add_argument("--sign-workers", type=int)
+    _add_output_arguments(sign_batch_parser)
+    sign_batch_parser.set_defaults(handler=sign_batch)
+
+    verify_batch_parser = subparsers.add_parser(
+        "verify-batch", help="Verify all PDF files in a directory or matching a glob"
+    )
+    verify_batch_parser.add_argument("files", help="Directory or glob pattern")
+    verify_batch_parser.add_argument(
+        "--key",
+        required=True,
+        action="append",
+        help="Path to a public key (*.pem), can be given multiple times",
+    )
+    verify_batch_parser.add_argument(
+        "--format", choices=REPORT_FORMATS, default="jsonl"
+    )
+    verify_batch_parser.add_argument(
+        "-o", "--output", help="Report file, standard output if not specified"
+    )
+    verify_batch_parser.add_argument(
+        "-r", "--recursive", action="store_true", help="Include subdirectories"
+    )
+    verify_batch_parser.add_argument("--workers", type=int)
+    verify_batch_parser.set_defaults(handler=verify_batch)
+
+    serve_parser = subparsers.add_parser(
+        "serve", help="Sign and verify PDF files streamed over local HTTP"
+    )
+    serve_parser.add_argument(
+        "--key", help="Path to the private key (*.pem), enables POST /sign"
+    )
+    serve_parser.add_argument(
+        "--pin-file", help="File with the PIN on its first line, '-' for stdin"
+    )
+    serve_parser.add_argument(
+        "--keyring", help="Directory of public keys (*.pem), enables POST /verify"
+    )
+    serve_parser.add_argument(
+        "--socket", help="Unix domain socket to listen on instead of a TCP port"
+    )
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8750)
+    serve_parser.add_argument(
+        "--concurrency",
+        type=int,
+        help="Requests processed at once, CPU count by default",
+    )
+    serve_parser.set_defaults(handler=serve)
+
+    watch_parser = subparsers.add_parser(
+        "watch", help="Sign new and modified PDF files in a directory as they appear"
+    )
+    watch_parser.add_argument("directory", help="Directory to watch, recursively")
+    _add_private_key_arguments(watch_parser)
+    watch_parser.add_argument(
+        "--state",
+        help="State index of handled files, .pades-watch.sqlite in the directory "
+        "by default",
+    )
+    watch_parser.add_argument(
+        "--settle",
+        type=float,
+        default=2.0,
+        help="Seconds a file must stay unchanged before it is signed",
+    )
+    watch_parser.add_argument(
+        "--workers", type=int, default=2, help="Files signed at once"
+    )
+    watch_parser.add_argument(
+        "--poll",
+        action="store_true",
+        help="Scan the directory periodically instead of using inotify",
+    )
+    watch_parser.add_argument(
+        "--interval", type=float, default=1.0, help="Seconds between two scans"
+    )
+    watch_parser.add_argument(
+        "--atomic",
+        action="store_true",
+        help="Write each signed file to a temporary copy and rename it over the "
+        "original",
+    )
+    watch_parser.set_defaults(handler=watch)
+
+    return parser
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    from app.instrumentation import Instrumentation, InstrumentationOptions
+
+    try:
+        options = InstrumentationOptions.from_environment().override(
+            metrics_jsonl=args.metrics_jsonl,
+            metrics_prometheus=args.metrics_prom,
+            profile=args.profile,
+            tracemalloc=args.tracemalloc,
+        )
+    except ValueError as e:
+        print(f"Invalid instrumentation settings: {e}", file=sys.stderr)
+        return 2
+    if options.tracemalloc:
+        import logging
+
+        # the allocation report is logged when the command finishes
+        logging.basicConfig(level=logging.INFO, format="%(message)s")
+    with Instrumentation(options):
+        return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
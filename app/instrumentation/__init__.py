@@ -0,0 +1,15 @@
+from .exporters import JSONLinesExporter, prometheus_text, write_prometheus
+from .metrics import Registry, metrics
+from .profiling import RunProfiler
+from .runtime import Instrumentation, InstrumentationOptions
+
+__all__ = [
+    "Instrumentation",
+    "InstrumentationOptions",
+    "JSONLinesExporter",
+    "Registry",
+    "RunProfiler",
+    "metrics",
+    "prometheus_text",
+    "write_prometheus",
+]
@@ -0,0 +1,97 @@
+import json
+import os
+import threading
+from typing import TextIO
+
+from .metrics import Event, Registry
+
+PROMETHEUS_PREFIX = "pades"
+
+
+class JSONLinesExporter:
+    """
+    Writes every span, timing and counter event as a line of JSON, as it happens.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        :param path: The output file, events are appended to it.
+        """
+        self.path = path
+        self._file: TextIO = open(path, "a", buffering=1)
+        self._lock = threading.Lock()
+
+    def __call__(self, event: Event) -> None:
+        line = json.dumps(event, separators=(",", ":"))
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    return ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+
+
+def prometheus_text(registry: Registry) -> str:
+    """
+    Formats the aggregated metrics in the Prometheus text exposition format:
+    a summary and a maximum of the durations of every operation, the counters and
+    the gauges.
+    :param registry: The registry.
+    :return: The text.
+    """
+    timings, counters = registry.snapshot()
+    seconds = f"{PROMETHEUS_PREFIX}_operation_seconds"
+    events = f"{PROMETHEUS_PREFIX}_events_total"
+    lines = [
+        f"# HELP {seconds} Duration of instrumented operations.",
+        f"# TYPE {seconds} summary",
+    ]
+    for (name, labels), statistic in sorted(timings.items()):
+        label_text = _format_labels({"operation": name, **dict(labels)})
+        lines.append(f"{seconds}_count{{{label_text}}} {statistic.count}")
+        lines.append(f"{seconds}_sum{{{label_text}}} {statistic.total:.6f}")
+    lines += [
+        f"# HELP {seconds}_max Longest duration of instrumented operations.",
+        f"# TYPE {seconds}_max gauge",
+    ]
+    for (name, labels), statistic in sorted(timings.items()):
+        label_text = _format_labels({"operation": name, **dict(labels)})
+        lines.append(f"{seconds}_max{{{label_text}}} {statistic.max:.6f}")
+    lines += [
+        f"# HELP {events} Counted events of instrumented operations.",
+        f"# TYPE {events} counter",
+    ]
+    for (name, labels), value in sorted(counters.items()):
+        label_text = _format_labels({"event": name, **dict(labels)})
+        lines.append(f"{events}{{{label_text}}} {value:g}")
+    gauges = f"{PROMETHEUS_PREFIX}_gauge_value"
+    lines += [
+        f"# HELP {gauges} Current values of instrumented quantities.",
+        f"# TYPE {gauges} gauge",
+    ]
+    for (name, labels), value in sorted(registry.gauges().items()):
+        label_text = _format_labels({"gauge": name, **dict(labels)})
+        lines.append(f"{gauges}{{{label_text}}} {value:g}")
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(registry: Registry, path: str) -> None:
+    """
+    Writes the metrics to a Prometheus text file, e.g. for the node exporter textfile
+    collector. The file is replaced atomically, so it is never read half-written.
+    :param:
+        registry: The registry.
+        path: The output file, usually ending with .prom.
+    """
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    with open(temporary_path, "w") as f:
+        f.write(prometheus_text(registry))
+    os.replace(temporary_path, path)
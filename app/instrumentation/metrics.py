@@ -0,0 +1,218 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+Labels = tuple[tuple[str, str], ...]
+MetricKey = tuple[str, Labels]
+Event = dict
+Sink = Callable[[Event], None]
+
+
+@dataclass
+class TimingStatistic:
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+
+class _NoopSpan:
+    """
+    Returned by a disabled registry, so an instrumented block costs a single call.
+    """
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+    def set(self, **labels) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    """
+    Times a block of code. Labels can be added inside the block, e.g. the result.
+    """
+
+    __slots__ = ("_registry", "name", "labels", "parent", "_start")
+
+    def __init__(self, registry: "Registry", name: str, labels: dict) -> None:
+        self._registry = registry
+        self.name = name
+        self.labels = labels
+        self.parent: Optional[str] = None
+        self._start = 0.0
+
+    def set(self, **labels) -> None:
+        self.labels.update(labels)
+
+    def __enter__(self) -> "Span":
+        stack = self._registry._stack()
+        self.parent = stack[-1] if stack else None
+        stack.append(self.name)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        duration = time.perf_counter() - self._start
+        self._registry._stack().pop()
+        if exc_type is not None:
+            self.labels["error"] = exc_type.__name__
+        self._registry._record(
+            "span", self.name, self.labels, duration, parent=self.parent
+        )
+        return False
+
+
+class Registry:
+    """
+    Collects timing spans and counters of the signing, verification, key loading and
+    pen drive operations. Timings and counters are aggregated per name and labels,
+    and every event is passed to the sinks, e.g. a JSON lines exporter.
+    A disabled registry records nothing and its spans do not read the clock.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._timings: dict[MetricKey, TimingStatistic] = {}
+        self._counters: dict[MetricKey, float] = {}
+        self._gauges: dict[MetricKey, float] = {}
+        self._sinks: list[Sink] = []
+
+    def span(self, name: str, **labels):
+        """
+        :param:
+            name: Dotted name of the operation, e.g. "pdf.sign".
+            labels: Low-cardinality labels, e.g. algorithm="rsa-pss-sha256".
+        :return: A context manager timing the block.
+        """
+        if not self.enabled:
+            return _NOOP_SPAN
+        return Span(self, name, labels)
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        """
+        Records a duration measured by the caller, e.g. the total time of many short reads.
+        """
+        if self.enabled:
+            self._record("timing", name, labels, seconds)
+
+    def count(self, name: str, value: float = 1, **labels) -> None:
+        """
+        Adds the value to a counter.
+        """
+        if not self.enabled:
+            return
+        key = (name, _labels_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+            sinks = list(self._sinks)
+        if sinks:
+            self._emit(sinks, {"type": "counter", "name": name, "value": value}, labels)
+
+    def gauge(self, name: str, value: float, **labels) -> None:
+        """
+        Sets a gauge to the current value, e.g. the length of a queue.
+        Only changed values are passed to the sinks.
+        """
+        if not self.enabled:
+            return
+        key = (name, _labels_key(labels))
+        with self._lock:
+            changed = self._gauges.get(key) != value
+            self._gauges[key] = value
+            sinks = list(self._sinks) if changed else []
+        if sinks:
+            self._emit(sinks, {"type": "gauge", "name": name, "value": value}, labels)
+
+    def add_sink(self, sink: Sink) -> None:
+        with self._lock:
+            self._sinks.append(sink)
+
+    def remove_sink(self, sink: Sink) -> None:
+        with self._lock:
+            self._sinks.remove(sink)
+
+    def snapshot(
+        self,
+    ) -> tuple[dict[MetricKey, TimingStatistic], dict[MetricKey, float]]:
+        """
+        :return: Copies of the aggregated timings and counters.
+        """
+        with self._lock:
+            timings = {
+                key: TimingStatistic(value.count, value.total, value.max)
+                for key, value in self._timings.items()
+            }
+            return timings, dict(self._counters)
+
+    def gauges(self) -> dict[MetricKey, float]:
+        """
+        :return: A copy of the current gauge values.
+        """
+        with self._lock:
+            return dict(self._gauges)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._timings.clear()
+            self._counters.clear()
+            self._gauges.clear()
+
+    def _stack(self) -> list[str]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _record(
+        self,
+        kind: str,
+        name: str,
+        labels: dict,
+        seconds: float,
+        parent: Optional[str] = None,
+    ) -> None:
+        key = (name, _labels_key(labels))
+        with self._lock:
+            statistic = self._timings.get(key)
+            if statistic is None:
+                statistic = self._timings[key] = TimingStatistic()
+            statistic.add(seconds)
+            sinks = list(self._sinks)
+        if sinks:
+            event = {"type": kind, "name": name, "ms": round(seconds * 1000, 4)}
+            if parent is not None:
+                event["parent"] = parent
+            self._emit(sinks, event, labels)
+
+    @staticmethod
+    def _emit(sinks: list[Sink], event: Event, labels: dict) -> None:
+        event["ts"] = round(time.time(), 6)
+        event["thread"] = threading.current_thread().name
+        if labels:
+            event["labels"] = {key: str(value) for key, value in labels.items()}
+        for sink in sinks:
+            sink(event)
+
+
+def _labels_key(labels: dict) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+# the registry used by the application, disabled until instrumentation is configured
+metrics = Registry()
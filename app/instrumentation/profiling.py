@@ -0,0 +1,60 @@
+import cProfile
+import logging
+import tracemalloc
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class RunProfiler:
+    """
+    Profiles a run with cProfile, tracemalloc or both.
+    cProfile only sees the thread that started it; tracemalloc traces every thread.
+    """
+
+    def __init__(
+        self, profile_path: Optional[str] = None, tracemalloc_top: int = 0
+    ) -> None:
+        """
+        :param:
+            profile_path: File for the cProfile statistics, readable with pstats
+                or snakeviz. No profiling if None.
+            tracemalloc_top: Number of the largest allocation sites to log at the end.
+                No memory tracing if 0.
+        """
+        self.profile_path = profile_path
+        self.tracemalloc_top = tracemalloc_top
+        self._profile: Optional[cProfile.Profile] = None
+
+    def start(self) -> None:
+        if self.tracemalloc_top:
+            tracemalloc.start()
+        if self.profile_path:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+    def stop(self) -> None:
+        if self._profile is not None:
+            self._profile.disable()
+            self._profile.dump_stats(self.profile_path)
+            self._profile = None
+            logger.info(f"cProfile statistics saved to {self.profile_path}")
+
+        if self.tracemalloc_top and tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            logger.info(
+                f"tracemalloc: {current / 1024:.0f} KiB allocated, "
+                f"peak {peak / 1024:.0f} KiB"
+            )
+            for statistic in snapshot.statistics("lineno")[: self.tracemalloc_top]:
+                logger.info(f"tracemalloc: {statistic}")
+
+    def __enter__(self) -> "RunProfiler":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.stop()
+        return False
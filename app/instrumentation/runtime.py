@@ -0,0 +1,103 @@
+import os
+import threading
+from dataclasses import dataclass, replace
+from typing import Mapping, Optional
+
+from .exporters import JSONLinesExporter, write_prometheus
+from .metrics import Registry, metrics
+from .profiling import RunProfiler
+
+ENV_METRICS_JSONL = "PADES_METRICS_JSONL"
+ENV_METRICS_PROMETHEUS = "PADES_METRICS_PROM"
+ENV_PROFILE = "PADES_PROFILE"
+ENV_TRACEMALLOC = "PADES_TRACEMALLOC"
+# how often a long-running process rewrites the Prometheus file
+PROMETHEUS_INTERVAL = 15.0
+
+
+@dataclass(frozen=True)
+class InstrumentationOptions:
+    """
+    What to collect during a run. Everything is off by default.
+    """
+
+    metrics_jsonl: Optional[str] = None
+    metrics_prometheus: Optional[str] = None
+    profile: Optional[str] = None
+    tracemalloc: int = 0
+
+    @classmethod
+    def from_environment(
+        cls, environ: Mapping[str, str] = os.environ
+    ) -> "InstrumentationOptions":
+        """
+        Reads the options from PADES_METRICS_JSONL, PADES_METRICS_PROM (file paths),
+        PADES_PROFILE (cProfile output path) and PADES_TRACEMALLOC (number of
+        allocation sites to report).
+        :raises ValueError: If PADES_TRACEMALLOC is not a number.
+        """
+        return cls(
+            metrics_jsonl=environ.get(ENV_METRICS_JSONL) or None,
+            metrics_prometheus=environ.get(ENV_METRICS_PROMETHEUS) or None,
+            profile=environ.get(ENV_PROFILE) or None,
+            tracemalloc=int(environ.get(ENV_TRACEMALLOC) or 0),
+        )
+
+    def override(self, **options) -> "InstrumentationOptions":
+        """
+        :return: The options with every given option that is not None replaced,
+            e.g. by command line arguments.
+        """
+        return replace(
+            self, **{key: value for key, value in options.items() if value is not None}
+        )
+
+    @property
+    def collects_metrics(self) -> bool:
+        return bool(self.metrics_jsonl or self.metrics_prometheus)
+
+
+class Instrumentation:
+    """
+    Enables the metrics registry, the exporters and the profiler for the duration
+    of a with block, e.g. a CLI command or the GUI event loop.
+    """
+
+    def __init__(
+        self, options: InstrumentationOptions, registry: Registry = metrics
+    ) -> None:
+        self.options = options
+        self.registry = registry
+        self._jsonl: Optional[JSONLinesExporter] = None
+        self._profiler = RunProfiler(options.profile, options.tracemalloc)
+        self._stop = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "Instrumentation":
+        if self.options.metrics_jsonl:
+            self._jsonl = JSONLinesExporter(self.options.metrics_jsonl)
+            self.registry.add_sink(self._jsonl)
+        if self.options.metrics_prometheus:
+            self._flusher = threading.Thread(
+                target=self._flush_periodically, name="metrics-flush", daemon=True
+            )
+            self._flusher.start()
+        self.registry.enabled = self.options.collects_metrics
+        self._profiler.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self._profiler.stop()
+        self.registry.enabled = False
+        if self._flusher is not None:
+            self._stop.set()
+            self._flusher.join()
+            write_prometheus(self.registry, self.options.metrics_prometheus)
+        if self._jsonl is not None:
+            self.registry.remove_sink(self._jsonl)
+            self._jsonl.close()
+        return False
+
+    def _flush_periodically(self) -> None:
+        while not self._stop.wait(PROMETHEUS_INTERVAL):
+            write_prometheus(self.registry, self.options.metrics_prometheus)
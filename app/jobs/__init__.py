@@ -0,0 +1,3 @@
+from .background_job import BackgroundJob, JobCancelled
+
+__all__ = ["BackgroundJob", "JobCancelled"]
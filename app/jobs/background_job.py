@@ -0,0 +1,63 @@
+import threading
+from typing import Any, Callable
+
+from PyQt6.QtCore import QObject, QRunnable, pyqtSignal, pyqtSlot
+
+ProgressCallback = Callable[[int, int], None]
+
+
+class JobCancelled(Exception):
+    """
+    Raised inside a running job when its cancellation was requested.
+    """
+
+
+class JobSignals(QObject):
+    """
+    Signals emitted by a BackgroundJob. They are delivered to slots in the GUI thread.
+    """
+
+    progress = pyqtSignal(int)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+
+class BackgroundJob(QRunnable):
+    """
+    Runs a long operation (signing, verification) in a QThreadPool worker thread.
+    The operation receives a progress callback, which reports progress in percent
+    and stops the operation by raising JobCancelled once cancel() was called.
+    """
+
+    def __init__(self, task: Callable[[ProgressCallback], Any]):
+        super().__init__()
+        self.signals = JobSignals()
+        self._task = task
+        self._cancel_requested = threading.Event()
+        self._last_percent = -1
+
+    def cancel(self) -> None:
+        """
+        Requests cancellation. The job stops at the next progress report.
+        """
+        self._cancel_requested.set()
+
+    def _report_progress(self, done: int, total: int) -> None:
+        if self._cancel_requested.is_set():
+            raise JobCancelled()
+        percent = done * 100 // total if total else 100
+        if percent != self._last_percent:
+            self._last_percent = percent
+            self.signals.progress.emit(percent)
+
+    @pyqtSlot()
+    def run(self) -> None:
+        try:
+            result = self._task(self._report_progress)
+        except JobCancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+        else:
+            self.signals.finished.emit(result)
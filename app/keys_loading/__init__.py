@@ -1,5 +1,23 @@
-from .password_dialog import PasswordDialog
+from .key_registry import KeyHandle, KeyRegistry, key_registry
+from .key_session import KeySessionManager
 from .private_key_loading import PrivateKey
 from .public_key_loading import PublicKey
 
-__all__ = ["PrivateKey", "PublicKey", "PasswordDialog"]
+__all__ = [
+    "PrivateKey",
+    "PublicKey",
+    "PasswordDialog",
+    "KeySessionManager",
+    "KeyHandle",
+    "KeyRegistry",
+    "key_registry",
+]
+
+
+def __getattr__(name: str):
+    # PasswordDialog pulls in PyQt6, so it is only imported when the GUI asks for it
+    if name == "PasswordDialog":
+        from .password_dialog import PasswordDialog
+
+        return PasswordDialog
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
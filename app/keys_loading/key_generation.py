@@ -0,0 +1,200 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, Optional
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+from cryptography.hazmat.primitives.asymmetric.types import PrivateKeyTypes
+
+from .pin_kdf import (
+    DEFAULT_KDF,
+    KDFParameters,
+    add_header,
+    derive_password,
+    read_parameters,
+    strip_header,
+)
+
+RSA_KEY_SIZE = 4096
+KEY_TYPES = ("rsa", "ecdsa-p256", "ecdsa-p384", "ed25519")
+_CURVES = {"ecdsa-p256": ec.SECP256R1, "ecdsa-p384": ec.SECP384R1}
+PRIVATE_KEY_FILE_NAME = "private-key.pem"
+PUBLIC_KEY_FILE_NAME = "public-key.pem"
+
+
+def generate_private_key(
+    key_type: str = "rsa", key_size: int = RSA_KEY_SIZE
+) -> PrivateKeyTypes:
+    """
+    Generates a private key of one of KEY_TYPES.
+    :param:
+        key_type: The key type.
+        key_size: Size of the RSA modulus in bits, ignored for other key types.
+    :return: The private key.
+    :raises ValueError: If the key type is unknown.
+    """
+    if key_type == "rsa":
+        return rsa.generate_private_key(
+            public_exponent=65537,  # industry standard
+            key_size=key_size,
+        )
+    if key_type in _CURVES:
+        return ec.generate_private_key(_CURVES[key_type]())
+    if key_type == "ed25519":
+        return ed25519.Ed25519PrivateKey.generate()
+    raise ValueError(f"Unknown key type: {key_type}, expected one of {KEY_TYPES}")
+
+
+def encrypt_private_key(
+    private_key: PrivateKeyTypes, pin: str, kdf: KDFParameters = DEFAULT_KDF
+) -> bytes:
+    """
+    Serializes a private key encrypted with a password derived from the PIN,
+    the same way PrivateKey expects it. Every call uses a new salt.
+    :param:
+        private_key: The private key.
+        pin: A PIN to encrypt the private key.
+        kdf: Parameters of the PIN key derivation, see pin_kdf.
+    :return: The private key in PEM format, preceded by the KDF header.
+    """
+    kdf = kdf.with_new_salt()
+    # Ed25519 keys have no traditional OpenSSL encoding
+    private_format = (
+        serialization.PrivateFormat.PKCS8
+        if isinstance(private_key, ed25519.Ed25519PrivateKey)
+        else serialization.PrivateFormat.TraditionalOpenSSL
+    )
+    pem = private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=private_format,
+        encryption_algorithm=serialization.BestAvailableEncryption(
+            derive_password(pin, kdf)
+        ),  # OpenSSL backend uses 'aes-256-cbc' as BestAvailableEncryption
+    )
+    return add_header(pem, kdf)
+
+
+def decrypt_private_key(private_pem: bytes, pin: str) -> PrivateKeyTypes:
+    """
+    Loads a private key encrypted by encrypt_private_key, or a legacy key file
+    encrypted with the SHA-256 hash of the PIN.
+    :raises ValueError: If the PIN is incorrect.
+    """
+    password = derive_password(pin, read_parameters(private_pem))
+    return serialization.load_pem_private_key(
+        strip_header(private_pem), password=password
+    )
+
+
+def public_key_pem(private_key: PrivateKeyTypes) -> bytes:
+    """
+    :return: The public key of the private key in PEM format.
+    """
+    return private_key.public_key().public_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo,
+    )
+
+
+def generate_key_pair(
+    pin: str,
+    key_size: int = RSA_KEY_SIZE,
+    key_type: str = "rsa",
+    kdf: KDFParameters = DEFAULT_KDF,
+) -> tuple[bytes, bytes]:
+    """
+    Generates a key pair. The private key is encrypted with a password derived from
+    the PIN, the same way PrivateKey expects it.
+    :param:
+        pin: A PIN to encrypt the private key.
+        key_size: Size of the RSA modulus in bits.
+        key_type: One of KEY_TYPES.
+        kdf: Parameters of the PIN key derivation, see pin_kdf.
+    :return: The private and the public key in PEM format.
+    """
+    private_key = generate_private_key(key_type, key_size)
+    return encrypt_private_key(private_key, pin, kdf), public_key_pem(private_key)
+
+
+def _generate_key_pair_in_worker(
+    job: tuple[str, int, str, KDFParameters],
+) -> tuple[bytes, bytes]:
+    return generate_key_pair(*job)
+
+
+def generate_key_pairs(
+    pins: Iterable[str],
+    key_size: int = RSA_KEY_SIZE,
+    key_type: str = "rsa",
+    workers: Optional[int] = None,
+    kdf: KDFParameters = DEFAULT_KDF,
+) -> Iterator[tuple[bytes, bytes]]:
+    """
+    Generates a key pair for every PIN in a process pool. Key generation is CPU bound,
+    so large RSA keys are generated in parallel on all CPUs.
+    :param:
+        pins: PINs to encrypt the private keys with.
+        key_size: Size of the RSA modulus in bits.
+        key_type: One of KEY_TYPES.
+        workers: Number of processes, the number of CPUs by default.
+        kdf: Parameters of the PIN key derivation, see pin_kdf.
+    :return: The private and the public key in PEM format for every PIN, in order.
+    """
+    jobs = [(pin, key_size, key_type, kdf) for pin in pins]
+    if len(jobs) <= 1 or workers == 1:
+        yield from map(_generate_key_pair_in_worker, jobs)
+        return
+    with ProcessPoolExecutor(min(workers or os.cpu_count() or 1, len(jobs))) as pool:
+        yield from pool.map(_generate_key_pair_in_worker, jobs)
+
+
+def write_key_pair(
+    private_pem: bytes, public_pem: bytes, output_dir: str
+) -> tuple[str, str]:
+    """
+    Writes a key pair to private-key.pem and public-key.pem in the output directory.
+    The private key file is readable by the owner only.
+    :return: Paths of the private and the public key files.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    private_key_path = os.path.join(output_dir, PRIVATE_KEY_FILE_NAME)
+    public_key_path = os.path.join(output_dir, PUBLIC_KEY_FILE_NAME)
+
+    fd = os.open(private_key_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with open(fd, "wb") as f:
+        f.write(private_pem)
+    with open(public_key_path, "wb") as f:
+        f.write(public_pem)
+    return private_key_path, public_key_path
+
+
+def migrate_private_key_file(
+    private_key_path: str, pin: str, kdf: KDFParameters = DEFAULT_KDF
+) -> KDFParameters:
+    """
+    Re-encrypts a private key file with the PIN stretched by the given KDF, e.g. to
+    upgrade a legacy key file. The file is replaced atomically.
+    :param:
+        private_key_path: The path to the private key file.
+        pin: The PIN of the key, it does not change.
+        kdf: The new KDF parameters.
+    :return: The KDF parameters the file was encrypted with before.
+    :raises ValueError: If the PIN is incorrect.
+    """
+    with open(private_key_path, "rb") as f:
+        private_pem = f.read()
+    previous = read_parameters(private_pem)
+    private_key = decrypt_private_key(private_pem, pin)
+
+    temporary_path = private_key_path + ".tmp"
+    fd = os.open(temporary_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    try:
+        with open(fd, "wb") as f:
+            f.write(encrypt_private_key(private_key, pin, kdf))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary_path, private_key_path)
+    except BaseException:
+        os.unlink(temporary_path)
+        raise
+    return previous
@@ -0,0 +1,113 @@
+import logging
+import os
+import secrets
+from typing import Optional
+
+from .key_generation import (
+    RSA_KEY_SIZE,
+    decrypt_private_key,
+    encrypt_private_key,
+    generate_key_pairs,
+    public_key_pem,
+)
+from .pin_kdf import DEFAULT_KDF, KDFParameters
+
+logger = logging.getLogger(__name__)
+
+POOL_FILE_SUFFIX = ".pem"
+CLAIMED_SUFFIX = ".claimed"
+
+
+class KeyPool:
+    """
+    A directory of pre-generated private keys, so key pairs can be provisioned instantly.
+    Pool keys are encrypted with a pool PIN and re-encrypted with the user's PIN when
+    taken. A key is claimed with an atomic rename, so several processes can take keys
+    from the same pool, and a key is never handed out twice.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        pool_pin: str,
+        key_type: str = "rsa",
+        key_size: int = RSA_KEY_SIZE,
+        kdf: KDFParameters = DEFAULT_KDF,
+    ) -> None:
+        """
+        :param:
+            directory: The pool directory. Keys of every type and size are kept apart.
+            pool_pin: The PIN pool keys are encrypted with.
+            key_type: One of KEY_TYPES.
+            key_size: Size of the RSA modulus in bits, ignored for other key types.
+            kdf: Parameters of the PIN key derivation of pool and provisioned keys.
+        """
+        subdirectory = key_type if key_type != "rsa" else f"rsa-{key_size}"
+        self.directory = os.path.join(directory, subdirectory)
+        self.key_type = key_type
+        self.key_size = key_size
+        self.kdf = kdf
+        self._pool_pin = pool_pin
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+
+    def _available(self) -> list[str]:
+        return sorted(
+            name
+            for name in os.listdir(self.directory)
+            if name.endswith(POOL_FILE_SUFFIX)
+        )
+
+    def __len__(self) -> int:
+        return len(self._available())
+
+    def fill(self, size: int, workers: Optional[int] = None) -> int:
+        """
+        Generates keys in a process pool until the pool holds the given number of keys.
+        :param:
+            size: The number of keys the pool should hold.
+            workers: Number of processes, the number of CPUs by default.
+        :return: The number of generated keys.
+        """
+        missing = max(0, size - len(self))
+        pins = [self._pool_pin] * missing
+        for private_pem, _ in generate_key_pairs(
+            pins, self.key_size, self.key_type, workers, self.kdf
+        ):
+            path = os.path.join(self.directory, secrets.token_hex(16))
+            fd = os.open(
+                path + CLAIMED_SUFFIX, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600
+            )
+            with open(fd, "wb") as f:
+                f.write(private_pem)
+            # a key becomes available only once it has been written completely
+            os.rename(path + CLAIMED_SUFFIX, path + POOL_FILE_SUFFIX)
+        logger.info(f"Added {missing} keys to the pool {self.directory}")
+        return missing
+
+    def take(self, pin: str) -> Optional[tuple[bytes, bytes]]:
+        """
+        Takes a key out of the pool.
+        :param pin: A PIN to encrypt the private key with.
+        :return: The private and the public key in PEM format, or None if the pool is empty.
+        :raises ValueError: If a pool key cannot be decrypted with the pool PIN.
+        """
+        for name in self._available():
+            path = os.path.join(self.directory, name)
+            claimed = path[: -len(POOL_FILE_SUFFIX)] + CLAIMED_SUFFIX
+            try:
+                os.rename(path, claimed)
+            except FileNotFoundError:
+                continue  # taken by another process
+
+            try:
+                with open(claimed, "rb") as f:
+                    private_key = decrypt_private_key(f.read(), self._pool_pin)
+            except ValueError:
+                os.rename(claimed, path)
+                raise
+            os.remove(claimed)
+            return (
+                encrypt_private_key(private_key, pin, self.kdf),
+                public_key_pem(private_key),
+            )
+        return None
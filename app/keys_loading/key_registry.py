@@ -0,0 +1,193 @@
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Optional, Union
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.types import (
+    PrivateKeyTypes,
+    PublicKeyTypes,
+)
+
+from .key_session import KeySessionManager
+
+from ..instrumentation import metrics
+from ..pdf.signature_trailer import key_fingerprint
+
+logger = logging.getLogger(__name__)
+
+KeyTypes = Union[PrivateKeyTypes, PublicKeyTypes]
+
+
+def _is_private(key: KeyTypes) -> bool:
+    return hasattr(key, "private_bytes")
+
+
+def key_id(key: KeyTypes) -> str:
+    """
+    :param key: A private or a public key.
+    :return: The fingerprint of the public key in hex, the same for both halves,
+        see key_fingerprint.
+    """
+    return key_fingerprint(key.public_key() if _is_private(key) else key).hex()
+
+
+@dataclass
+class _KeyEntry:
+    key: Optional[KeyTypes]
+    references: int = 0
+    paths: set[str] = field(default_factory=set)
+
+
+class KeyHandle:
+    """
+    A reference to a key held in a KeyRegistry. Every handle is released on its own,
+    explicitly or by leaving a with block; the key is dropped when the last handle
+    of it is released.
+    """
+
+    def __init__(self, registry: "KeyRegistry", key_id: str, key: KeyTypes):
+        self._registry = registry
+        self.key_id = key_id
+        self.private = _is_private(key)
+        self._key: Optional[KeyTypes] = key
+
+    @property
+    def value(self) -> KeyTypes:
+        """
+        :return: The key.
+        :raises ValueError: If the handle has been released.
+        """
+        key = self._key
+        if key is None:
+            raise ValueError(f"Key handle {self.key_id[:16]} was released")
+        return key
+
+    @property
+    def released(self) -> bool:
+        return self._key is None
+
+    def release(self, keep_session: bool = False) -> None:
+        """
+        Gives up the handle, releasing it again has no effect.
+        :param keep_session: Whether to keep the decrypted key in the session cache
+            when it is dropped from the registry, so it can be loaded again without
+            the PIN derivation. The key then stays in memory until the session expires.
+        """
+        self._registry._release(self, keep_session)
+
+    def __enter__(self) -> "KeyHandle":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
+
+
+class KeyRegistry:
+    """
+    Holds the keys in use by a process, any number of them at once, shared between
+    threads. Keys are identified by the fingerprint of their public key, so a key
+    loaded twice, from the same file or another copy, is held once and reference counted.
+    The private and the public half of a key pair are held apart.
+    When the last handle of a key is released, the registry drops its reference to it
+    and evicts the sessions of its key files, see KeyHandle.release. Once nothing else
+    refers to the key object it is freed, and OpenSSL clears the private numbers as it
+    frees them. Copies Python made on the way, e.g. of the PEM file, are not cleared.
+    The key stays in memory as long as anything refers to it: a session kept with
+    keep_session=True until it expires, and callers that passed handle.value on,
+    e.g. to a PDFSigner, until they drop it.
+    Processes do not share keys: every process loads its own from the key files.
+    """
+
+    def __init__(self, sessions: Optional[KeySessionManager] = None):
+        """
+        :param sessions: Cache of decrypted private keys, a new one by default.
+        """
+        self.sessions = sessions or KeySessionManager()
+        # (fingerprint, private) -> entry
+        self._entries: dict[tuple[str, bool], _KeyEntry] = {}
+        self._lock = threading.Lock()
+
+    def _acquire(self, key: KeyTypes, path: Optional[str] = None) -> KeyHandle:
+        identifier = key_id(key)
+        entry_key = (identifier, _is_private(key))
+        with self._lock:
+            entry = self._entries.get(entry_key)
+            if entry is None:
+                entry = self._entries[entry_key] = _KeyEntry(key)
+            entry.references += 1
+            if path is not None:
+                entry.paths.add(path)
+            key = entry.key
+            metrics.gauge("keys.registry_size", len(self._entries))
+        return KeyHandle(self, identifier, key)
+
+    def acquire_private(self, private_key_path: str, pin: str) -> KeyHandle:
+        """
+        Loads a private key file through the session cache, see KeySessionManager.load.
+        :param:
+            private_key_path: The path to the private key file.
+            pin: A PIN to decrypt the private key.
+        :return: A new handle of the key.
+        :raises ValueError: If the PIN is invalid.
+        :raises FileNotFoundError: If the key file does not exist.
+        """
+        private_key = self.sessions.load(private_key_path, pin)
+        return self._acquire(private_key, private_key_path)
+
+    def acquire_public(self, public_key_path: str) -> KeyHandle:
+        """
+        :param public_key_path: The path to the public key file in PEM format.
+        :return: A new handle of the key.
+        :raises ValueError: If the file does not hold a public key.
+        :raises FileNotFoundError: If the key file does not exist.
+        """
+        with metrics.span("keys.load_public_key"), open(public_key_path, "rb") as f:
+            public_key = serialization.load_pem_public_key(f.read())
+        return self._acquire(public_key)
+
+    def register(self, key: KeyTypes) -> KeyHandle:
+        """
+        Adds a key that is already in memory, e.g. a freshly generated one.
+        :param key: A private or a public key.
+        :return: A new handle of the key.
+        """
+        return self._acquire(key)
+
+    def _release(self, handle: KeyHandle, keep_session: bool) -> None:
+        identifier = handle.key_id
+        entry_key = (identifier, handle.private)
+        with self._lock:
+            if handle._key is None:
+                return
+            handle._key = None
+            entry = self._entries[entry_key]
+            entry.references -= 1
+            if entry.references > 0:
+                return
+            del self._entries[entry_key]
+            paths, entry.key = entry.paths, None
+            metrics.gauge("keys.registry_size", len(self._entries))
+        if not keep_session:
+            for path in paths:
+                self.sessions.evict(path)
+        logger.info(f"Key {identifier[:16]} was released")
+
+    def references(self, identifier: str, private: bool = True) -> int:
+        """
+        :param:
+            identifier: The key_id of a key.
+            private: Whether to count handles of the private or the public half.
+        :return: Number of live handles of the key, 0 if it is not held.
+        """
+        with self._lock:
+            entry = self._entries.get((identifier, private))
+            return entry.references if entry is not None else 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+# the registry of the application, shared by PrivateKey and PublicKey
+key_registry = KeyRegistry()
@@ -0,0 +1,160 @@
+import hmac
+import logging
+import os
+import secrets
+import threading
+import time
+from dataclasses import dataclass
+from hashlib import sha256
+from typing import Callable
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.types import PrivateKeyTypes
+
+from .pin_kdf import derive_password, read_parameters, strip_header
+
+from ..instrumentation import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_IDLE_TTL = 300.0
+DEFAULT_UNPLUG_GRACE = 30.0
+
+SessionId = tuple[int, int, int, bytes]
+
+
+@dataclass
+class _KeySession:
+    path: str
+    private_key: PrivateKeyTypes
+    pin_salt: bytes
+    pin_check: bytes
+    expires_at: float
+
+
+class KeySessionManager:
+    """
+    Keeps decrypted private keys in memory, so loading the same key file again
+    skips the PEM decryption and key parsing.
+    Sessions are identified by the key file's (device, inode, mtime, content fingerprint),
+    so a modified or replaced file is always loaded from scratch. The PIN is still
+    checked on every load, against a salted hash kept with the session.
+    """
+
+    def __init__(
+        self,
+        idle_ttl: float = DEFAULT_IDLE_TTL,
+        unplug_grace: float = DEFAULT_UNPLUG_GRACE,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        :param:
+            idle_ttl: Seconds a session is kept since it was last used.
+            unplug_grace: Seconds a session is kept after its pen drive was unplugged.
+            clock: Source of the current time in seconds.
+        """
+        self.idle_ttl = idle_ttl
+        self.unplug_grace = unplug_grace
+        self._clock = clock
+        self._sessions: dict[SessionId, _KeySession] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _pin_check(pin_salt: bytes, hashed_pin: bytes) -> bytes:
+        return hmac.new(pin_salt, hashed_pin, sha256).digest()
+
+    def load(self, private_key_path: str, pin: str) -> PrivateKeyTypes:
+        """
+        Returns the private key stored in the file, decrypting it only if there is
+        no live session for the file. The PEM password is derived from the PIN with
+        the KDF named in the key file, see pin_kdf; a session hit skips the derivation.
+        :param:
+            private_key_path: The path to the private key file.
+            pin: A PIN to decrypt the private key.
+        :return: The private key.
+        :raises ValueError: If the PIN is invalid.
+        :raises FileNotFoundError: If the key file does not exist.
+        """
+        with metrics.span("keys.load_private_key") as span:
+            private_key, session_hit = self._load(private_key_path, pin)
+            span.set(session="hit" if session_hit else "miss")
+            return private_key
+
+    def _load(self, private_key_path: str, pin: str) -> tuple[PrivateKeyTypes, bool]:
+        hashed_pin = sha256(pin.encode()).digest()
+        with open(private_key_path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            pem = f.read()
+        session_id = (stat.st_dev, stat.st_ino, stat.st_mtime_ns, sha256(pem).digest())
+
+        now = self._clock()
+        with self._lock:
+            self._purge_expired(now)
+            session = self._sessions.get(session_id)
+            if session is not None:
+                if not hmac.compare_digest(
+                    session.pin_check, self._pin_check(session.pin_salt, hashed_pin)
+                ):
+                    raise ValueError("Invalid password")
+                session.expires_at = now + self.idle_ttl
+                logger.info("private key was taken from the session cache")
+                return session.private_key, True
+
+        parameters = read_parameters(pem)
+        with metrics.span("keys.pin_kdf", algorithm=parameters.algorithm):
+            password = derive_password(pin, parameters)
+        private_key = serialization.load_pem_private_key(
+            strip_header(pem), password=password
+        )
+        pin_salt = secrets.token_bytes(16)
+        with self._lock:
+            self._sessions[session_id] = _KeySession(
+                path=os.path.abspath(private_key_path),
+                private_key=private_key,
+                pin_salt=pin_salt,
+                pin_check=self._pin_check(pin_salt, hashed_pin),
+                expires_at=now + self.idle_ttl,
+            )
+        return private_key, False
+
+    def release_mount(self, mount_point: str) -> None:
+        """
+        Shortens the lifetime of sessions of keys stored under the mount point
+        to the unplug grace period. Should be called when a pen drive is unplugged.
+        :param mount_point: The mount point of the unplugged pen drive.
+        """
+        prefix = os.path.join(os.path.abspath(mount_point), "")
+        deadline = self._clock() + self.unplug_grace
+        with self._lock:
+            for session in self._sessions.values():
+                if session.path.startswith(prefix):
+                    session.expires_at = min(session.expires_at, deadline)
+            self._purge_expired(self._clock())
+
+    def evict(self, private_key_path: str) -> None:
+        """
+        Removes all sessions of the key file immediately.
+        :param private_key_path: The path to the private key file.
+        """
+        path = os.path.abspath(private_key_path)
+        with self._lock:
+            for session_id, session in list(self._sessions.items()):
+                if session.path == path:
+                    del self._sessions[session_id]
+
+    def clear(self) -> None:
+        """
+        Removes all sessions.
+        """
+        with self._lock:
+            self._sessions.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._purge_expired(self._clock())
+            return len(self._sessions)
+
+    def _purge_expired(self, now: float) -> None:
+        for session_id, session in list(self._sessions.items()):
+            if session.expires_at <= now:
+                del self._sessions[session_id]
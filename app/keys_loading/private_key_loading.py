@@ -1,46 +1,68 @@
-from hashlib import sha256
 from typing import Optional
 
-from cryptography.hazmat.primitives import serialization
-from cryptography.hazmat.primitives.asymmetric import rsa
-from .singleton_meta import SingletonMeta
+from cryptography.hazmat.primitives.asymmetric.types import PrivateKeyTypes
+from .key_registry import KeyHandle, KeyRegistry, key_registry
+from .key_session import KeySessionManager
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
 
-class PrivateKey(metaclass=SingletonMeta):
+class PrivateKey:
     """
     A class for managing the private key.
-    Only one instance of the class can exist throughout the application.
+    Holds at most one key at a time, through a handle of the key registry, so
+    several instances can hold different keys at once.
     """
 
-    def __init__(self):
-        self.__private_key = None
+    def __init__(self, registry: KeyRegistry = key_registry):
+        """
+        :param registry: The registry the key is held in, the application's by default.
+        """
+        self.registry = registry
+        self._handle: Optional[KeyHandle] = None
+        self.last_unlock_ms: Optional[float] = None
+
+    @property
+    def sessions(self) -> KeySessionManager:
+        return self.registry.sessions
 
     def load_private_key(self, private_key_path: str, pin: str) -> bool:
         """
         Loads the private key from the specified path and decrypts it with the specified PIN.
-        Uses SHA-256 to hash the PIN before usage.
+        The PIN is stretched with the KDF named in the key file, see pin_kdf.
+        A key that was loaded recently is taken from the session cache.
+        The unlock time is kept in last_unlock_ms.
+        The previously loaded key is released.
         :param:
             private_key_path: The path to the private key file.
             pin: A PIN to decrypt the private key.
         """
-        hashed_pin = sha256(pin.encode()).digest()
-        with open(private_key_path, "rb") as f:
-            try:
-                self.__private_key = serialization.load_pem_private_key(
-                    f.read(), password=hashed_pin
-                )
-                logger.info("private key was loaded")
-                return True
-            except ValueError:
-                logger.error("Invalid password")
-                return False
+        start = time.perf_counter()
+        try:
+            handle = self.registry.acquire_private(private_key_path, pin)
+        except ValueError:
+            logger.error("Invalid password")
+            return False
+        self.reset_private_key()
+        self._handle = handle
+        self.last_unlock_ms = (time.perf_counter() - start) * 1000
+        logger.info(f"private key was loaded in {self.last_unlock_ms:.0f} ms")
+        return True
 
     @property
-    def value(self) -> Optional[rsa.RSAPrivateKey]:
-        return self.__private_key
+    def value(self) -> Optional[PrivateKeyTypes]:
+        handle = self._handle
+        return handle.value if handle is not None else None
 
-    def reset_private_key(self) -> None:
-        self.__private_key = None
+    def reset_private_key(self, keep_session: bool = False) -> None:
+        """
+        Releases the key and evicts its session.
+        :param keep_session: Whether to keep the session instead, so the key can be
+            loaded again without the PIN derivation until the session expires,
+            see KeySessionManager.release_mount.
+        """
+        handle, self._handle = self._handle, None
+        if handle is not None:
+            handle.release(keep_session)
@@ -1,46 +1,58 @@
 from typing import Optional
 
-from cryptography.hazmat.primitives import serialization
-from cryptography.hazmat.primitives.asymmetric import rsa
-from .singleton_meta import SingletonMeta
+from cryptography.hazmat.primitives.asymmetric.types import PublicKeyTypes
+from .key_registry import KeyHandle, KeyRegistry, key_registry
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-class PublicKey(metaclass=SingletonMeta):
+class PublicKey:
     """
     A class for managing the public key.
-    Only one instance of the class can exist throughout the application.
+    Holds at most one key at a time, through a handle of the key registry, so
+    several instances can hold different keys at once.
     """
 
-    def __init__(self):
-        self.__public_key = None
+    def __init__(self, registry: KeyRegistry = key_registry):
+        """
+        :param registry: The registry the key is held in, the application's by default.
+        """
+        self.registry = registry
+        self._handle: Optional[KeyHandle] = None
 
     def load_public_key(self, public_key_path: str) -> bool:
         """
         Loads the chosen public key from the specified path.
+        The previously loaded key is released.
         :param:
             public_key_path: The path to the public key file.
         :return:
             True if the public key was loaded successfully, False otherwise.
         """
         try:
-            with open(public_key_path, "rb") as f:
-                self.__public_key = serialization.load_pem_public_key(f.read())
-                logger.info("Public key was loaded")
-                return True
+            handle = self.registry.acquire_public(public_key_path)
         except FileNotFoundError:
             logger.error("Public key file not found")
             return False
         except ValueError:
             logger.error("Failed to load public key from the file")
             return False
+        self._release()
+        self._handle = handle
+        logger.info("Public key was loaded")
+        return True
+
+    def _release(self) -> None:
+        handle, self._handle = self._handle, None
+        if handle is not None:
+            handle.release()
 
     def reset_public_key(self) -> None:
-        self.__public_key = None
+        self._release()
         logger.info("Public key was reset")
 
     @property
-    def value(self) -> Optional[rsa.RSAPublicKey]:
-        return self.__public_key
+    def value(self) -> Optional[PublicKeyTypes]:
+        handle = self._handle
+        return handle.value if handle is not None else None
@@ -2,7 +2,7 @@ import os
 import sys
 from typing import Optional
 
-from PyQt6.QtCore import QTimer
+from PyQt6.QtCore import QThreadPool, QTimer
 from PyQt6.QtWidgets import (
     QApplication,
     QFileDialog,
@@ -12,10 +12,17 @@ from PyQt6.QtQml import QQmlApplicationEngine
 from PyQt6.QtCore import QObject, pyqtSlot
 from PyQt6.QtWidgets import QMessageBox
 
-from keys_loading import PrivateKey, PublicKey, PasswordDialog
-from pendrive_detection import PenDriveFinder
-from pdf.pdf_signer import PDFSigner
-from pdf.pdf_verifier import PDFVerifier
+# started as a script, with app/ on sys.path: its packages are imported through
+# the app package, as the CLI does, so their relative imports resolve
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.instrumentation import Instrumentation, InstrumentationOptions
+from app.jobs import BackgroundJob
+from app.keys_loading import PrivateKey, PublicKey, PasswordDialog
+from app.pendrive_detection import PenDriveFinder, PenDriveMonitor
+from app.pendrive_detection.pendrive_watcher import PenDriveWatcher
+from app.pdf.pdf_signer import PDFSigner
+from app.pdf.pdf_verifier import PDFVerifier
 import logging
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
@@ -37,12 +44,29 @@ class Backend(QObject):
         self.private_key = PrivateKey()
         self.public_key = PublicKey()
 
-        # implementation of pendrive detection
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.check_pendrive)
-        self.timer.start(1000)
+        # implementation of pendrive detection, event-driven where the system
+        # supports it and polled every second otherwise
+        self.watcher: Optional[PenDriveWatcher] = None
+        self.timer: Optional[QTimer] = None
+        monitor = PenDriveMonitor.for_current_system()
+        if monitor is not None:
+            self.watcher = PenDriveWatcher(monitor, self)
+            self.watcher.pen_drives_changed.connect(self.check_pendrive)
+            QTimer.singleShot(0, lambda: self.check_pendrive(self.watcher.pen_drives))
+        else:
+            self.timer = QTimer(self)
+            self.timer.timeout.connect(
+                lambda: self.check_pendrive(self.detector.find_all_pen_drives())
+            )
+            self.timer.start(1000)
 
         self.selected_pdf: Optional[str] = None
+        self.key_pen_drive: Optional[str] = None
+
+        # signing and verification run in worker threads to keep the window responsive
+        self.thread_pool = QThreadPool.globalInstance()
+        self.sign_job: Optional[BackgroundJob] = None
+        self.verify_job: Optional[BackgroundJob] = None
 
     def _show_message_dialog(
         self, title: str, message: str, icon=QMessageBox.Icon.Information
@@ -86,56 +110,129 @@ class Backend(QObject):
     def handle_sign_pdf(self):
         if self.private_key.value is None or self.selected_pdf is None:
             return
+        if self.sign_job is not None:
+            return
         self.root.setProperty("signingInProgress", True)
-        pdf_signer = PDFSigner(self.private_key.value)
-        try:
-            pdf_signer.sign(self.selected_pdf)
-            self.root.append_log(f"PDF signed successfully: {self.selected_pdf}")
-            self._show_message_dialog(
-                "Success",
-                f"PDF signed successfully: {self.selected_pdf}",
-                QMessageBox.Icon.NoIcon,
-            )
-        except Exception as e:
-            self.root.append_log(f"Error signing PDF: {str(e)}")
-            self._show_message_dialog(
-                "Error", f"Failed to sign PDF: {str(e)}", QMessageBox.Icon.Critical
-            )
-        finally:
-            self.root.setProperty("signingInProgress", False)
+        self.root.setProperty("operationProgress", 0)
+        pdf_file = self.selected_pdf
+        # the PDF may live on a pen drive that is unplugged while signing,
+        # so the signed file only replaces the original once it is complete,
+        # and it is not memory-mapped, which would crash on the unplug
+        pdf_signer = PDFSigner(self.private_key.value, atomic=True, mapped=False)
+
+        self.sign_job = BackgroundJob(
+            lambda progress: pdf_signer.sign(pdf_file, progress)
+        )
+        self.sign_job.signals.progress.connect(self._on_progress)
+        self.sign_job.signals.finished.connect(
+            lambda _: self._on_sign_finished(pdf_file)
+        )
+        self.sign_job.signals.failed.connect(self._on_sign_failed)
+        self.sign_job.signals.cancelled.connect(
+            lambda: self._on_sign_cancelled(pdf_file)
+        )
+        self.root.append_log(f"Signing PDF: {pdf_file}")
+        self.thread_pool.start(self.sign_job)
+
+    def _on_sign_finished(self, pdf_file: str):
+        self._finish_sign_job()
+        self.root.append_log(f"PDF signed successfully: {pdf_file}")
+        self._show_message_dialog(
+            "Success",
+            f"PDF signed successfully: {pdf_file}",
+            QMessageBox.Icon.NoIcon,
+        )
+
+    def _on_sign_failed(self, error: str):
+        self._finish_sign_job()
+        self.root.append_log(f"Error signing PDF: {error}")
+        self._show_message_dialog(
+            "Error", f"Failed to sign PDF: {error}", QMessageBox.Icon.Critical
+        )
+
+    def _on_sign_cancelled(self, pdf_file: str):
+        self._finish_sign_job()
+        self.root.append_log(f"PDF signing cancelled, file left unchanged: {pdf_file}")
+
+    def _finish_sign_job(self):
+        self.sign_job = None
+        self.root.setProperty("signingInProgress", False)
 
     @pyqtSlot()
     def handle_verify_pdf(self):
         if self.public_key.value is None or self.selected_pdf is None:
             return
+        if self.verify_job is not None:
+            return
         self.root.setProperty("verificationInProgress", True)
-        pdf_verifier = PDFVerifier(self.public_key.value)
-        try:
-            if pdf_verifier.verify(self.selected_pdf):
-                self.root.append_log(f"PDF verified successfully: {self.selected_pdf}")
-                self._show_message_dialog(
-                    "Success",
-                    f"PDF verified successfully: {self.selected_pdf}",
-                    QMessageBox.Icon.NoIcon,
-                )
-            else:
-                self.root.append_log(f"PDF verification failed: {self.selected_pdf}")
-                self._show_message_dialog(
-                    "Error",
-                    f"PDF verification failed: {self.selected_pdf}",
-                    QMessageBox.Icon.Critical,
-                )
-        except Exception as e:
-            self.root.append_log(f"Error verifying PDF: {str(e)}")
+        self.root.setProperty("operationProgress", 0)
+        pdf_file = self.selected_pdf
+        pdf_verifier = PDFVerifier(self.public_key.value, mapped=False)
+
+        self.verify_job = BackgroundJob(
+            lambda progress: pdf_verifier.verify(pdf_file, progress)
+        )
+        self.verify_job.signals.progress.connect(self._on_progress)
+        self.verify_job.signals.finished.connect(
+            lambda valid: self._on_verify_finished(pdf_file, valid)
+        )
+        self.verify_job.signals.failed.connect(self._on_verify_failed)
+        self.verify_job.signals.cancelled.connect(
+            lambda: self._on_verify_cancelled(pdf_file)
+        )
+        self.root.append_log(f"Verifying PDF: {pdf_file}")
+        self.thread_pool.start(self.verify_job)
+
+    def _on_verify_finished(self, pdf_file: str, valid: bool):
+        self._finish_verify_job()
+        if valid:
+            self.root.append_log(f"PDF verified successfully: {pdf_file}")
             self._show_message_dialog(
-                "Error", f"Failed to verify PDF: {str(e)}", QMessageBox.Icon.Critical
+                "Success",
+                f"PDF verified successfully: {pdf_file}",
+                QMessageBox.Icon.NoIcon,
             )
-        finally:
-            self.root.setProperty("verificationInProgress", False)
+        else:
+            self.root.append_log(f"PDF verification failed: {pdf_file}")
+            self._show_message_dialog(
+                "Error",
+                f"PDF verification failed: {pdf_file}",
+                QMessageBox.Icon.Critical,
+            )
+
+    def _on_verify_failed(self, error: str):
+        self._finish_verify_job()
+        self.root.append_log(f"Error verifying PDF: {error}")
+        self._show_message_dialog(
+            "Error", f"Failed to verify PDF: {error}", QMessageBox.Icon.Critical
+        )
+
+    def _on_verify_cancelled(self, pdf_file: str):
+        self._finish_verify_job()
+        self.root.append_log(f"PDF verification cancelled: {pdf_file}")
+
+    def _finish_verify_job(self):
+        self.verify_job = None
+        self.root.setProperty("verificationInProgress", False)
 
-    def check_pendrive(self) -> None:
-        pen_drives = self.detector.find_all_pen_drives()
+    def _on_progress(self, percent: int):
+        self.root.setProperty("operationProgress", percent)
 
+    @pyqtSlot()
+    def handle_cancel_operation(self):
+        for job in (self.sign_job, self.verify_job):
+            if job is not None:
+                job.cancel()
+        self.root.append_log("Cancelling...")
+
+    def check_pendrive(self, pen_drives: list[str]) -> None:
+        if self.key_pen_drive is not None and self.key_pen_drive not in pen_drives:
+            # the decrypted key stays cached for a short grace period,
+            # so re-inserting the same pen drive does not decrypt it again
+            self.private_key.sessions.release_mount(self.key_pen_drive)
+            self.key_pen_drive = None
+            self.private_key.reset_private_key(keep_session=True)
+            self.root.setProperty("privateKeyLoaded", False)
         if not pen_drives:
             self.private_key.reset_private_key()
             self.root.setProperty("privateKeyLoaded", False)
@@ -163,6 +260,7 @@ class Backend(QObject):
                 if self.private_key.load_private_key(
                     self.detector.get_private_key_path(pen_drive), password
                 ):
+                    self.key_pen_drive = pen_drive
                     self.root.append_log("Private key has been loaded successfully")
                     self.root.setProperty("privateKeyLoaded", True)
             except FileNotFoundError:
@@ -188,12 +286,16 @@ def main():
     root.selectPublicKey.connect(backend.handle_select_public_key)
     root.signPdf.connect(backend.handle_sign_pdf)
     root.verifyPdf.connect(backend.handle_verify_pdf)
+    root.cancelOperation.connect(backend.handle_cancel_operation)
 
     # Log boot messages
     root.append_log("Application started...")
     root.append_log("Detecting USB devices...")
 
-    sys.exit(app.exec())
+    # metrics and profiling are configured with the PADES_* environment variables
+    with Instrumentation(InstrumentationOptions.from_environment()):
+        exit_code = app.exec()
+    sys.exit(exit_code)
 
 
 if __name__ == "__main__":
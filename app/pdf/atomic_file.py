@@ -0,0 +1,155 @@
+import errno
+import os
+import secrets
+import shutil
+import tempfile
+from contextlib import contextmanager, suppress
+from typing import BinaryIO, Iterator, Optional
+
+from .digest import CHUNK_SIZE
+
+# errors meaning that a zero-copy method is not available for this pair of files
+_UNSUPPORTED_ERRORS = {
+    errno.ENOSYS,
+    errno.EXDEV,
+    errno.EINVAL,
+    errno.EOPNOTSUPP,
+    errno.ENOTSUP,
+}
+
+
+def _copy_file_range(source_fd: int, target_fd: int, offset: int, count: int) -> int:
+    return os.copy_file_range(source_fd, target_fd, count, offset, offset)
+
+
+def _sendfile(source_fd: int, target_fd: int, offset: int, count: int) -> int:
+    os.lseek(target_fd, offset, os.SEEK_SET)
+    return os.sendfile(target_fd, source_fd, offset, count)
+
+
+def _copy_buffered(source_fd: int, target_fd: int, offset: int, count: int) -> int:
+    os.lseek(source_fd, offset, os.SEEK_SET)
+    data = os.read(source_fd, min(count, CHUNK_SIZE))
+    os.lseek(target_fd, offset, os.SEEK_SET)
+    view = memoryview(data)
+    while view:
+        view = view[os.write(target_fd, view) :]
+    return len(data)
+
+
+def _copy_methods():
+    if hasattr(os, "copy_file_range"):
+        yield _copy_file_range
+    if hasattr(os, "sendfile") and os.name == "posix":
+        yield _sendfile
+    yield _copy_buffered
+
+
+def copy_file_prefix(source_fd: int, target_fd: int, length: int) -> None:
+    """
+    Copies the first bytes of a file to the beginning of another file.
+    The data is copied inside the kernel with copy_file_range, which can share the
+    blocks on copy-on-write filesystems, or with sendfile. Buffered reads and writes
+    are used where neither is available.
+    :param:
+        source_fd: Descriptor of the file to copy from.
+        target_fd: Descriptor of the file to copy to, left positioned at the end of the copy.
+        length: Number of bytes to copy.
+    :raises ValueError: If the source file is shorter than the length.
+    """
+    copied = 0
+    for copy in _copy_methods():
+        try:
+            while copied < length:
+                count = copy(source_fd, target_fd, copied, length - copied)
+                if not count:
+                    raise ValueError("File is shorter than the requested length")
+                copied += count
+            break
+        except OSError as e:
+            if e.errno not in _UNSUPPORTED_ERRORS or copy is _copy_buffered:
+                raise
+    os.lseek(target_fd, length, os.SEEK_SET)
+
+
+def _fsync_directory(directory: str) -> None:
+    # makes the rename durable; directories cannot be opened on Windows
+    if os.name != "posix":
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def atomic_update(path: str, length: Optional[int] = None) -> Iterator[BinaryIO]:
+    """
+    Updates a file without ever leaving it half-written.
+    Yields a temporary file in the same directory holding a copy of the file, opened
+    for reading and writing and positioned at the end, its name attribute is its path.
+    When the block completes,
+    the temporary file is synced to disk and renamed over the original. If the block
+    fails or the process dies, the original file stays untouched.
+    The permissions of the file are kept, its owner and hard links are not.
+    :param:
+        path: The path to the file. A symbolic link is resolved, the file it points to is updated.
+        length: The expected size of the file. Only this many bytes are copied.
+    :return: The temporary file.
+    :raises ValueError: If the size of the file is not the expected length.
+    """
+    target = os.path.realpath(path)
+    directory = os.path.dirname(target)
+    fd, temporary_path = tempfile.mkstemp(
+        prefix=f".{os.path.basename(target)}.", suffix=".tmp", dir=directory
+    )
+    os.close(fd)
+    try:
+        with open(temporary_path, "r+b") as f, open(target, "rb") as source:
+            size = os.fstat(source.fileno()).st_size
+            if length is None:
+                length = size
+            elif size != length:
+                raise ValueError(f"File was modified while signing: {path}")
+            shutil.copymode(target, temporary_path)
+            copy_file_prefix(source.fileno(), f.fileno(), length)
+            f.seek(length)
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary_path, target)
+    except BaseException:
+        with suppress(FileNotFoundError):
+            os.unlink(temporary_path)
+        raise
+    _fsync_directory(directory)
+
+
+def atomic_write(path: str, data: bytes) -> None:
+    """
+    Creates or replaces a small file, e.g. a detached signature, without ever leaving
+    it half-written. The data is written to a temporary file in the same directory,
+    synced to disk and renamed over the file. A new file gets the default permissions.
+    :param:
+        path: The path to the file.
+        data: The content of the file.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    temporary_path = os.path.join(
+        directory, f".{os.path.basename(path)}.{secrets.token_hex(4)}.tmp"
+    )
+    fd = os.open(temporary_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with open(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(path):
+            shutil.copymode(path, temporary_path)
+        os.replace(temporary_path, path)
+    except BaseException:
+        with suppress(FileNotFoundError):
+            os.unlink(temporary_path)
+        raise
+    _fsync_directory(directory)
@@ -0,0 +1,179 @@
+import glob
+import os
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Optional
+
+from cryptography.hazmat.primitives import serialization
+
+from .pdf_signer import PDFSigner
+from .signature_algorithms import SigningKey
+
+_worker_signer: Optional[PDFSigner] = None
+
+
+def _init_sign_worker(private_key_der: bytes) -> None:
+    """
+    Loads the private key once per worker process.
+    :param private_key_der: The decrypted private key in DER format.
+    """
+    global _worker_signer
+    private_key = serialization.load_der_private_key(private_key_der, password=None)
+    _worker_signer = PDFSigner(private_key)
+
+
+def _sign_digest_in_worker(digest: bytes) -> bytes:
+    return _worker_signer.sign_digest(digest)
+
+
+def find_pdf_files(pattern: str, recursive: bool = False) -> list[str]:
+    """
+    Expands a directory or a glob pattern into a sorted list of PDF files.
+    :param:
+        pattern: A directory path or a glob pattern.
+        recursive: Whether subdirectories of a directory should be included.
+    :return: A list of PDF file paths.
+    """
+    if os.path.isdir(pattern):
+        sub_pattern = os.path.join("**", "*.pdf") if recursive else "*.pdf"
+        pattern = os.path.join(pattern, sub_pattern)
+    return sorted(
+        path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path)
+    )
+
+
+@dataclass
+class SignResult:
+    """
+    Result of signing a single file in a batch.
+    """
+
+    path: str
+    size_in_bytes: int
+    seconds: float
+    error: Optional[str] = None
+    skipped: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class BatchSummary:
+    """
+    Throughput summary of a batch signing run.
+    """
+
+    files: int = 0
+    failed: int = 0
+    skipped: int = 0
+    size_in_bytes: int = 0
+    seconds: float = 0.0
+
+    def add(self, result: SignResult) -> None:
+        self.files += 1
+        if result.skipped:
+            self.skipped += 1
+        elif result.ok:
+            self.size_in_bytes += result.size_in_bytes
+        else:
+            self.failed += 1
+
+    @property
+    def files_per_second(self) -> float:
+        return self.files / self.seconds if self.seconds else 0.0
+
+    @property
+    def mb_per_second(self) -> float:
+        return self.size_in_bytes / 1_000_000 / self.seconds if self.seconds else 0.0
+
+
+class BatchSigner:
+    """
+    Signs many PDF files in one run.
+    Files are hashed in a thread pool (hashlib releases the GIL) and the digests are
+    signed in a process pool. The decrypted key is handed to every worker process
+    once, when the process starts.
+    With skip_signed, files already signed by the key are skipped after reading only
+    their trailer, so an interrupted batch can simply be run again.
+    """
+
+    def __init__(
+        self,
+        private_key: SigningKey,
+        hash_workers: Optional[int] = None,
+        sign_workers: Optional[int] = None,
+        atomic: bool = False,
+        skip_signed: bool = False,
+    ) -> None:
+        self._private_key = private_key
+        self._signer = PDFSigner(private_key, atomic)
+        self._skip_signed = skip_signed
+        self._hash_workers = hash_workers or min(32, (os.cpu_count() or 1) + 4)
+        self._sign_workers = sign_workers or os.cpu_count() or 1
+        self.summary = BatchSummary()
+
+    def _private_key_der(self) -> bytes:
+        return self._private_key.private_bytes(
+            encoding=serialization.Encoding.DER,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption(),
+        )
+
+    def _sign_file(
+        self, pdf_file_path: str, sign_pool: ProcessPoolExecutor
+    ) -> SignResult:
+        start = time.perf_counter()
+        try:
+            if self._skip_signed and self._signer.already_signed(pdf_file_path):
+                return SignResult(
+                    pdf_file_path, 0, time.perf_counter() - start, skipped=True
+                )
+            digest, signed_length = self._signer.hash_document(pdf_file_path)
+            signature = sign_pool.submit(_sign_digest_in_worker, digest).result()
+            self._signer.write_signature(pdf_file_path, signature, signed_length)
+        except Exception as e:
+            return SignResult(pdf_file_path, 0, time.perf_counter() - start, str(e))
+        return SignResult(pdf_file_path, signed_length, time.perf_counter() - start)
+
+    def sign_files(self, pdf_file_paths: Iterable[str]) -> Iterator[SignResult]:
+        """
+        Signs the given files and yields a result for every file as soon as it is done.
+        At most twice the number of hashing threads is queued at a time,
+        so the number of files does not affect memory usage.
+        :param pdf_file_paths: Paths of the PDF files to sign.
+        :return: An iterator of per-file results, in completion order.
+        """
+        self.summary = BatchSummary()
+        start = time.perf_counter()
+        max_pending = self._hash_workers * 2
+
+        with ProcessPoolExecutor(
+            max_workers=self._sign_workers,
+            initializer=_init_sign_worker,
+            initargs=(self._private_key_der(),),
+        ) as sign_pool, ThreadPoolExecutor(max_workers=self._hash_workers) as hash_pool:
+            pending: set[Future] = set()
+            for pdf_file_path in pdf_file_paths:
+                if len(pending) >= max_pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    yield from self._collect(done, start)
+                pending.add(hash_pool.submit(self._sign_file, pdf_file_path, sign_pool))
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                yield from self._collect(done, start)
+
+    def _collect(self, done: set[Future], start: float) -> Iterator[SignResult]:
+        for future in done:
+            result = future.result()
+            self.summary.add(result)
+            self.summary.seconds = time.perf_counter() - start
+            yield result
@@ -0,0 +1,142 @@
+import csv
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import asdict, dataclass, fields
+from typing import Iterable, Iterator, Optional, TextIO
+
+from cryptography.hazmat.primitives import serialization
+
+from .keyring import PublicKeyring
+from .multi_key_verifier import MultiKeyVerifier
+
+_worker_verifier: Optional[MultiKeyVerifier] = None
+
+
+def _init_verify_worker(public_keys_pem: dict[str, bytes]) -> None:
+    """
+    Loads the public keys once per worker process.
+    :param public_keys_pem: Public keys in PEM format, by key name.
+    """
+    global _worker_verifier
+    keyring = PublicKeyring()
+    for name, pem in public_keys_pem.items():
+        keyring.add(serialization.load_pem_public_key(pem), name)
+    # the pool already runs one process per CPU, candidates are tried in turn
+    _worker_verifier = MultiKeyVerifier(keyring, workers=1)
+
+
+def _verify_in_worker(pdf_file_path: str) -> "VerifyResult":
+    start = time.perf_counter()
+    try:
+        size_in_bytes = os.path.getsize(pdf_file_path)
+        entry = _worker_verifier.verify(pdf_file_path)
+    except (OSError, ValueError) as e:
+        # e.g. a file truncated or replaced during the audit, reported on its own row
+        return VerifyResult(pdf_file_path, False, None, 0, _ms_since(start), str(e))
+
+    if entry is not None:
+        return VerifyResult(
+            pdf_file_path, True, entry.name, size_in_bytes, _ms_since(start)
+        )
+    return VerifyResult(pdf_file_path, False, None, size_in_bytes, _ms_since(start))
+
+
+def _ms_since(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 3)
+
+
+@dataclass
+class VerifyResult:
+    """
+    Result of verifying a single file in a batch.
+    """
+
+    path: str
+    valid: bool
+    key: Optional[str]
+    size_in_bytes: int
+    ms: float
+    error: Optional[str] = None
+
+
+class BatchVerifier:
+    """
+    Verifies many PDF files against one or more public keys using a process pool.
+    Every file is hashed once. The signing key is looked up by the fingerprint in the
+    signature trailer, legacy files are checked against each key in turn.
+    """
+
+    def __init__(
+        self, public_keys_pem: dict[str, bytes], workers: Optional[int] = None
+    ) -> None:
+        for pem in public_keys_pem.values():
+            # fail early instead of breaking every worker process
+            serialization.load_pem_public_key(pem)
+        self._public_keys_pem = public_keys_pem
+        self._workers = workers or os.cpu_count() or 1
+
+    @classmethod
+    def from_key_files(
+        cls, public_key_paths: Iterable[str], workers: Optional[int] = None
+    ) -> "BatchVerifier":
+        """
+        Creates a verifier for the public keys stored in the given PEM files.
+        Keys are named after their file paths in the results.
+        :raises ValueError: If any of the files does not contain a valid public key.
+        """
+        public_keys_pem = {}
+        for public_key_path in public_key_paths:
+            with open(public_key_path, "rb") as f:
+                public_keys_pem[public_key_path] = f.read()
+        return cls(public_keys_pem, workers)
+
+    def verify_files(self, pdf_file_paths: Iterable[str]) -> Iterator[VerifyResult]:
+        """
+        Verifies the given files and yields a result for every file as soon as it is done.
+        The work queue is bounded, so the number of files does not affect memory usage.
+        :param pdf_file_paths: Paths of the PDF files to verify.
+        :return: An iterator of per-file results, in completion order.
+        """
+        max_pending = self._workers * 4
+
+        with ProcessPoolExecutor(
+            max_workers=self._workers,
+            initializer=_init_verify_worker,
+            initargs=(self._public_keys_pem,),
+        ) as pool:
+            pending: set[Future] = set()
+            for pdf_file_path in pdf_file_paths:
+                if len(pending) >= max_pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    yield from (future.result() for future in done)
+                pending.add(pool.submit(_verify_in_worker, pdf_file_path))
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                yield from (future.result() for future in done)
+
+
+class ReportWriter:
+    """
+    Streams verification results to a JSON lines or CSV report, one row per result.
+    """
+
+    FORMATS = ("jsonl", "csv")
+
+    def __init__(self, output: TextIO, report_format: str = "jsonl") -> None:
+        if report_format not in self.FORMATS:
+            raise ValueError(f"Unsupported report format: {report_format}")
+        self._output = output
+        self._csv_writer = None
+        if report_format == "csv":
+            field_names = [field.name for field in fields(VerifyResult)]
+            self._csv_writer = csv.DictWriter(output, fieldnames=field_names)
+            self._csv_writer.writeheader()
+
+    def write(self, result: VerifyResult) -> None:
+        if self._csv_writer is not None:
+            self._csv_writer.writerow(asdict(result))
+        else:
+            self._output.write(json.dumps(asdict(result)) + "\n")
+        self._output.flush()
@@ -0,0 +1,207 @@
+import os
+import struct
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import sha256
+from typing import Iterator, Optional
+
+from .digest import ProgressCallback
+from .document_reader import DocumentReader
+from .signature_trailer import CHUNK_DIGEST_SIZE, SignatureTrailer
+
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+MIN_CHUNK_SIZE = 4096
+MAX_CHUNK_SIZE = 2**32 - 1
+# prefixes of the signed digest and of the inner nodes of the Merkle tree
+DIGEST_DOMAIN = b"PADESIG-MERKLE-SHA256"
+NODE_PREFIX = b"\x01"
+
+
+def check_chunk_size(chunk_size: int) -> None:
+    """
+    :raises ValueError: If the chunk size cannot be stored in a chunked trailer.
+    """
+    if not MIN_CHUNK_SIZE <= chunk_size <= MAX_CHUNK_SIZE:
+        raise ValueError(
+            f"Chunk size must be between {MIN_CHUNK_SIZE} and {MAX_CHUNK_SIZE} bytes"
+        )
+
+
+def merkle_root(chunk_digests: list[bytes]) -> bytes:
+    """
+    Computes the root of a Merkle tree over the chunk digests. A node without a sibling
+    is moved up a level unchanged.
+    :param chunk_digests: SHA-256 digests of the chunks, in order.
+    :return: The root, or the digest of empty input if there are no chunks.
+    """
+    if not chunk_digests:
+        return sha256().digest()
+    level = chunk_digests
+    while len(level) > 1:
+        parents = [
+            sha256(NODE_PREFIX + level[i] + level[i + 1]).digest()
+            for i in range(0, len(level) - 1, 2)
+        ]
+        if len(level) % 2:
+            parents.append(level[-1])
+        level = parents
+    return level[0]
+
+
+def signed_digest(root: bytes, signed_length: int, chunk_size: int) -> bytes:
+    """
+    Binds the Merkle root to the document length and the chunk size, so neither can be
+    changed in the trailer without invalidating the signature.
+    :return: The digest to sign.
+    """
+    return sha256(
+        DIGEST_DOMAIN + struct.pack(">QI", signed_length, chunk_size) + root
+    ).digest()
+
+
+def chunk_ranges(length: int, chunk_size: int) -> list[tuple[int, int]]:
+    """
+    :return: (offset, length) pairs of the chunks of the first length bytes of a file.
+    """
+    return [
+        (offset, min(chunk_size, length - offset))
+        for offset in range(0, length, chunk_size)
+    ]
+
+
+def _hash_chunk(reader: DocumentReader, offset: int, length: int) -> bytes:
+    # hashlib releases the GIL for large buffers, so chunks are hashed in parallel
+    with reader.view(offset, length) as view:
+        return sha256(view).digest()
+
+
+def iter_chunk_digests(
+    reader: DocumentReader,
+    length: int,
+    chunk_size: int,
+    workers: Optional[int] = None,
+) -> Iterator[bytes]:
+    """
+    Hashes the chunks of a file concurrently in a thread pool over views of the reader.
+    Digests are yielded in order; chunks not yet hashed are cancelled when the iterator
+    is closed early.
+    :param:
+        reader: The reader of the file.
+        length: Number of bytes from the beginning of the file to hash.
+        chunk_size: Size of a chunk in bytes.
+        workers: Number of threads, the number of CPUs by default.
+    :raises ValueError: If the file is shorter than length.
+    """
+    if length > reader.size:
+        raise ValueError("File is shorter than the requested length")
+    if length == 0:
+        return
+    workers = workers or os.cpu_count() or 1
+    executor = ThreadPoolExecutor(workers)
+    try:
+        # keep a bounded number of chunks in flight, so closing early is cheap
+        # and an unmapped reader holds at most that many chunks in memory
+        window = 2 * workers
+        ranges = iter(chunk_ranges(length, chunk_size))
+        pending = deque(
+            executor.submit(_hash_chunk, reader, *chunk)
+            for _, chunk in zip(range(window), ranges)
+        )
+        while pending:
+            future = pending.popleft()
+            chunk = next(ranges, None)
+            if chunk is not None:
+                pending.append(executor.submit(_hash_chunk, reader, *chunk))
+            yield future.result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def hash_chunks(
+    reader: DocumentReader,
+    length: int,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: Optional[int] = None,
+    progress: Optional[ProgressCallback] = None,
+) -> list[bytes]:
+    """
+    Computes the SHA-256 digest of every chunk of the first length bytes of a file.
+    :param:
+        reader: The reader of the file.
+        length: Number of bytes from the beginning of the file to hash.
+        chunk_size: Size of a chunk in bytes.
+        workers: Number of threads, the number of CPUs by default.
+        progress: Called after every chunk with the number of bytes hashed so far
+            and the total number of bytes. Any exception it raises stops hashing.
+    :return: The chunk digests, in order.
+    """
+    digests = []
+    done = 0
+    chunks = iter_chunk_digests(reader, length, chunk_size, workers)
+    try:
+        for digest in chunks:
+            digests.append(digest)
+            done = min(done + chunk_size, length)
+            if progress is not None:
+                progress(done, length)
+    finally:
+        chunks.close()
+    return digests
+
+
+def read_chunk_table(reader: DocumentReader, trailer: SignatureTrailer) -> list[bytes]:
+    """
+    Reads the chunk digest table stored after the signed document.
+    :param:
+        reader: The reader of the file.
+        trailer: The chunked trailer of the file.
+    :return: The stored chunk digests, in order.
+    """
+    if trailer.signed_length + trailer.table_size > reader.size:
+        raise ValueError("Chunk table is truncated")
+    table = bytes(reader.view(trailer.signed_length, trailer.table_size))
+    return [
+        table[offset : offset + CHUNK_DIGEST_SIZE]
+        for offset in range(0, len(table), CHUNK_DIGEST_SIZE)
+    ]
+
+
+def find_corrupt_chunks(
+    reader: DocumentReader,
+    trailer: SignatureTrailer,
+    chunk_table: list[bytes],
+    first_only: bool = True,
+    workers: Optional[int] = None,
+    progress: Optional[ProgressCallback] = None,
+) -> list[tuple[int, int]]:
+    """
+    Hashes the chunks of a file concurrently and compares them with the chunk table.
+    :param:
+        reader: The reader of the file.
+        trailer: The chunked trailer of the file.
+        chunk_table: The chunk digests to compare with, see read_chunk_table.
+        first_only: Whether to stop at the first corrupt chunk.
+        workers: Number of threads, the number of CPUs by default.
+        progress: Optional progress callback, see hash_chunks.
+    :return: (offset, length) pairs of the corrupt byte ranges, adjacent ranges merged.
+    """
+    corrupt: list[tuple[int, int]] = []
+    ranges = chunk_ranges(trailer.signed_length, trailer.chunk_size)
+    chunks = iter_chunk_digests(
+        reader, trailer.signed_length, trailer.chunk_size, workers
+    )
+    try:
+        for (offset, length), digest, expected in zip(ranges, chunks, chunk_table):
+            if progress is not None:
+                progress(offset + length, trailer.signed_length)
+            if digest == expected:
+                continue
+            if corrupt and sum(corrupt[-1]) == offset:
+                corrupt[-1] = (corrupt[-1][0], corrupt[-1][1] + length)
+            else:
+                corrupt.append((offset, length))
+            if first_only:
+                break
+    finally:
+        chunks.close()
+    return corrupt
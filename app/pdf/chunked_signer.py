@@ -0,0 +1,109 @@
+from typing import Optional
+
+from .chunked_digest import (
+    DEFAULT_CHUNK_SIZE,
+    check_chunk_size,
+    hash_chunks,
+    merkle_root,
+    signed_digest,
+)
+from .digest import ProgressCallback
+from .document_reader import DocumentReader
+from .pdf_signer import PDFSigner
+from .signature_algorithms import SigningKey
+from .signature_trailer import AlreadySignedError
+
+from ..instrumentation import metrics
+
+
+class ChunkedPDFSigner(PDFSigner):
+    """
+    Signs a PDF file in the chunked mode: the file is split into fixed-size chunks hashed
+    in parallel, and the Merkle root of the chunk digests is signed. The chunk digest table
+    is stored in the trailer, so a verifier can stop at the first corrupt chunk and report
+    which byte ranges of a huge file are damaged.
+    """
+
+    def __init__(
+        self,
+        private_key: SigningKey,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        workers: Optional[int] = None,
+        atomic: bool = False,
+        mapped: bool = True,
+    ) -> None:
+        """
+        :param:
+            private_key: The private key.
+            chunk_size: Size of a chunk in bytes.
+            workers: Number of hashing threads, the number of CPUs by default.
+            atomic: Whether to replace the file with a signed copy, see PDFSigner.
+            mapped: Whether to memory-map files to hash them, see DocumentReader.
+        :raises ValueError: If the key type or the chunk size is not supported.
+        """
+        super().__init__(private_key, atomic, mapped)
+        check_chunk_size(chunk_size)
+        self.chunk_size = chunk_size
+        self._workers = workers
+
+    def hash_chunks(
+        self, pdf_file_path: str, progress: Optional[ProgressCallback] = None
+    ) -> tuple[list[bytes], int]:
+        """
+        Computes the digests of the chunks of the file content, read from a single
+        open file, see DocumentReader.
+        :param:
+            pdf_file_path: The path to the PDF file.
+            progress: Optional callback reporting hashing progress, see hash_chunks.
+        :return: The chunk digests and the number of hashed bytes.
+        :raises AlreadySignedError: If the file already ends with a signature trailer.
+        """
+        with DocumentReader(pdf_file_path, self.mapped) as reader:
+            if reader.trailer() is not None:
+                raise AlreadySignedError(f"File is already signed: {pdf_file_path}")
+            with metrics.span("pdf.hash_chunks"):
+                chunk_digests = hash_chunks(
+                    reader, reader.size, self.chunk_size, self._workers, progress
+                )
+            return chunk_digests, reader.size
+
+    def sign(
+        self, pdf_file_path: str, progress: Optional[ProgressCallback] = None
+    ) -> None:
+        """
+        Signs a PDF file with the private key in the chunked mode.
+        The file is left untouched if the operation is cancelled from the progress callback.
+        :param:
+            pdf_file_path: The path to the PDF file.
+            progress: Optional callback reporting hashing progress, see hash_chunks.
+        :raises AlreadySignedError: If the file is already signed.
+        """
+        with metrics.span("pdf.sign", mode="chunked"):
+            chunk_digests, signed_length = self.hash_chunks(pdf_file_path, progress)
+            digest = signed_digest(
+                merkle_root(chunk_digests), signed_length, self.chunk_size
+            )
+            self.write_chunked_signature(
+                pdf_file_path, self.sign_digest(digest), signed_length, chunk_digests
+            )
+
+    def write_chunked_signature(
+        self,
+        pdf_file_path: str,
+        signature: bytes,
+        signed_length: int,
+        chunk_digests: list[bytes],
+    ) -> None:
+        """
+        Appends the chunk digest table and the chunked trailer to the end of the PDF file.
+        :param:
+            pdf_file_path: The path to the PDF file.
+            signature: The signature of the Merkle root.
+            signed_length: The number of signed bytes.
+            chunk_digests: The chunk digests, in order.
+        :raises ValueError: If the file was modified after it had been hashed.
+        """
+        trailer = self.make_trailer(signature, signed_length, self.chunk_size)
+        self.append_to_file(
+            pdf_file_path, b"".join(chunk_digests) + trailer.to_bytes(), signed_length
+        )
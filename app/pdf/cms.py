@@ -0,0 +1,166 @@
+from hashlib import sha256
+from typing import Union
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec, padding, rsa
+
+# Minimal DER encoder for the CMS SignedData structure (RFC 5652) embedded in a
+# PAdES signature. Only the few ASN.1 types this structure needs are supported.
+
+OID_DATA = "1.2.840.113549.1.7.1"
+OID_SIGNED_DATA = "1.2.840.113549.1.7.2"
+OID_SHA256 = "2.16.840.1.101.3.4.2.1"
+OID_RSASSA_PSS = "1.2.840.113549.1.1.10"
+OID_MGF1 = "1.2.840.113549.1.1.8"
+OID_ECDSA_WITH_SHA256 = "1.2.840.10045.4.3.2"
+OID_CONTENT_TYPE = "1.2.840.113549.1.9.3"
+OID_MESSAGE_DIGEST = "1.2.840.113549.1.9.4"
+OID_SIGNING_CERTIFICATE_V2 = "1.2.840.113549.1.9.16.2.47"
+
+PSS_SALT_LENGTH = 32
+
+
+def _length(length: int) -> bytes:
+    if length < 0x80:
+        return bytes([length])
+    encoded = length.to_bytes((length.bit_length() + 7) // 8, "big")
+    return bytes([0x80 | len(encoded)]) + encoded
+
+
+def _tlv(tag: int, content: bytes) -> bytes:
+    return bytes([tag]) + _length(len(content)) + content
+
+
+def _sequence(*items: bytes) -> bytes:
+    return _tlv(0x30, b"".join(items))
+
+
+def _set(*items: bytes) -> bytes:
+    # DER requires the elements of a SET OF to be sorted by their encoding
+    return _tlv(0x31, b"".join(sorted(items)))
+
+
+def _integer(value: int) -> bytes:
+    return _tlv(0x02, value.to_bytes(value.bit_length() // 8 + 1, "big", signed=True))
+
+
+def _octet_string(value: bytes) -> bytes:
+    return _tlv(0x04, value)
+
+
+def _null() -> bytes:
+    return _tlv(0x05, b"")
+
+
+def _oid(dotted: str) -> bytes:
+    parts = [int(part) for part in dotted.split(".")]
+    encoded = bytearray([parts[0] * 40 + parts[1]])
+    for part in parts[2:]:
+        chunk = [part & 0x7F]
+        part >>= 7
+        while part:
+            chunk.append(0x80 | (part & 0x7F))
+            part >>= 7
+        encoded += bytes(reversed(chunk))
+    return _tlv(0x06, bytes(encoded))
+
+
+def _explicit(tag_number: int, content: bytes) -> bytes:
+    return _tlv(0xA0 | tag_number, content)
+
+
+def _algorithm(oid: str, parameters: bytes = b"") -> bytes:
+    return _sequence(_oid(oid), parameters)
+
+
+def _rsassa_pss_parameters() -> bytes:
+    sha256_algorithm = _algorithm(OID_SHA256, _null())
+    return _sequence(
+        _explicit(0, sha256_algorithm),
+        _explicit(1, _algorithm(OID_MGF1, sha256_algorithm)),
+        _explicit(2, _integer(PSS_SALT_LENGTH)),
+    )
+
+
+def _attribute(oid: str, value: bytes) -> bytes:
+    return _sequence(_oid(oid), _set(value))
+
+
+def _signed_attributes(
+    certificate: x509.Certificate, content_digest: bytes
+) -> list[bytes]:
+    certificate_der = certificate.public_bytes(serialization.Encoding.DER)
+    issuer_serial = _sequence(
+        _sequence(_tlv(0xA4, certificate.issuer.public_bytes())),
+        _integer(certificate.serial_number),
+    )
+    # ESSCertIDv2 with the default (SHA-256) hash algorithm omitted
+    signing_certificate = _sequence(
+        _sequence(
+            _sequence(_octet_string(sha256(certificate_der).digest()), issuer_serial)
+        )
+    )
+    return [
+        _attribute(OID_CONTENT_TYPE, _oid(OID_DATA)),
+        _attribute(OID_MESSAGE_DIGEST, _octet_string(content_digest)),
+        _attribute(OID_SIGNING_CERTIFICATE_V2, signing_certificate),
+    ]
+
+
+def _sign_attributes(
+    private_key: Union[rsa.RSAPrivateKey, ec.EllipticCurvePrivateKey], data: bytes
+) -> tuple[bytes, bytes]:
+    """
+    :return: The signature algorithm identifier and the signature of the data.
+    """
+    if isinstance(private_key, rsa.RSAPrivateKey):
+        signature = private_key.sign(
+            data,
+            padding.PSS(mgf=padding.MGF1(hashes.SHA256()), salt_length=PSS_SALT_LENGTH),
+            hashes.SHA256(),
+        )
+        return _algorithm(OID_RSASSA_PSS, _rsassa_pss_parameters()), signature
+    if isinstance(private_key, ec.EllipticCurvePrivateKey):
+        signature = private_key.sign(data, ec.ECDSA(hashes.SHA256()))
+        return _algorithm(OID_ECDSA_WITH_SHA256), signature
+    # Ed25519 would require SHA-512 message digests in CMS (RFC 8419)
+    raise ValueError(f"Unsupported key type for CMS: {type(private_key).__name__}")
+
+
+def build_signed_data(
+    private_key: Union[rsa.RSAPrivateKey, ec.EllipticCurvePrivateKey],
+    certificate: x509.Certificate,
+    content_digest: bytes,
+) -> bytes:
+    """
+    Builds a detached CMS SignedData (CAdES baseline) over an already computed digest.
+    The signature is RSASSA-PSS or ECDSA with SHA-256 over the DER encoded signed attributes.
+    :param:
+        private_key: The signer's private key.
+        certificate: The signer's certificate, embedded in the structure.
+        content_digest: SHA-256 digest of the signed content.
+    :return: The DER encoded ContentInfo.
+    """
+    attributes = _signed_attributes(certificate, content_digest)
+    # the signature covers the attributes encoded as a SET OF, not as [0] IMPLICIT
+    signature_algorithm, signature = _sign_attributes(private_key, _set(*attributes))
+
+    signer_info = _sequence(
+        _integer(1),
+        _sequence(
+            certificate.issuer.public_bytes(), _integer(certificate.serial_number)
+        ),
+        _algorithm(OID_SHA256, _null()),
+        _tlv(0xA0, b"".join(sorted(attributes))),
+        signature_algorithm,
+        _octet_string(signature),
+    )
+    signed_data = _sequence(
+        _integer(1),
+        _set(_algorithm(OID_SHA256, _null())),
+        _sequence(_oid(OID_DATA)),
+        _explicit(0, certificate.public_bytes(serialization.Encoding.DER)),
+        _set(signer_info),
+    )
+    return _sequence(_oid(OID_SIGNED_DATA), _explicit(0, signed_data))
@@ -0,0 +1,49 @@
+from typing import Optional
+
+# CHUNK_SIZE and ProgressCallback are imported from here by the signers and verifiers
+from .document_reader import CHUNK_SIZE, DocumentReader, ProgressCallback
+
+
+def sha256_ranges(
+    pdf_file_path: str,
+    byte_ranges: list[tuple[int, int]],
+    chunk_size: int = CHUNK_SIZE,
+    progress: Optional[ProgressCallback] = None,
+) -> bytes:
+    """
+    Computes the SHA-256 digest of the given byte ranges of a file.
+    The file is memory-mapped, or read in fixed-size chunks into a single reusable
+    buffer, so memory usage does not depend on the file size, see DocumentReader.
+    :param:
+        pdf_file_path: The path to the file.
+        byte_ranges: (offset, length) pairs of the ranges to hash, in order.
+        chunk_size: Size of the pieces passed to the hash in bytes.
+        progress: Called after every chunk with the number of bytes hashed so far
+            and the total number of bytes. Any exception it raises stops hashing.
+    :return: The SHA-256 digest of the hashed bytes.
+    :raises ValueError: If a range extends beyond the end of the file.
+    """
+    with DocumentReader(pdf_file_path) as reader:
+        return reader.sha256(byte_ranges, chunk_size, progress)
+
+
+def sha256_file(
+    pdf_file_path: str,
+    length: Optional[int] = None,
+    chunk_size: int = CHUNK_SIZE,
+    progress: Optional[ProgressCallback] = None,
+) -> bytes:
+    """
+    Computes the SHA-256 digest of the beginning of a file.
+    :param:
+        pdf_file_path: The path to the file.
+        length: Number of bytes from the beginning of the file to hash.
+            The whole file is hashed if not specified.
+        chunk_size: Size of the pieces passed to the hash in bytes.
+        progress: Optional progress callback, see sha256_ranges.
+    :return: The SHA-256 digest of the hashed bytes.
+    """
+    with DocumentReader(pdf_file_path) as reader:
+        if length is None:
+            length = reader.size
+        return reader.sha256([(0, length)], chunk_size, progress)
@@ -0,0 +1,233 @@
+import hashlib
+import mmap
+import os
+import stat
+import threading
+import time
+from typing import Callable, Iterable, Iterator, Optional
+
+from .signature_trailer import TAIL_SIZE, SignatureTrailer
+
+from ..instrumentation import metrics
+
+CHUNK_SIZE = 1024 * 1024
+
+ProgressCallback = Callable[[int, int], None]
+
+ByteRange = tuple[int, int]
+
+
+class DocumentReader:
+    """
+    Read access to a document being signed or verified: its size, its signature trailer
+    and views of byte ranges, shared by the signers and verifiers so a file is opened
+    and stat'ed once per operation.
+    Regular files are memory-mapped and ranges are handed out as memoryview slices of
+    the map, without copying them. Files that cannot be mapped, e.g. empty files or files
+    on filesystems without mmap support, are read through a single reusable buffer.
+    Only regular files are accepted: the size of a pipe or a device is not known
+    before it has been read to the end, so its signed length could not be taken.
+    Views are valid until the reader is closed. Pages are released from the map once
+    chunks() has handed them out, so resident memory stays bounded for any file size.
+    A mapped file that is truncated by another process while it is read makes the
+    process crash with SIGBUS, pass mapped=False for files that may be, e.g. on pen drives
+    that can be unplugged.
+    """
+
+    def __init__(self, pdf_file_path: str, mapped: bool = True):
+        """
+        :param:
+            pdf_file_path: The path to the file.
+            mapped: Whether to memory-map the file if possible.
+        :raises FileNotFoundError: If the file does not exist.
+        :raises ValueError: If the path is not a regular file, e.g. a pipe.
+        """
+        self.path = pdf_file_path
+        # opening a pipe blocks until a writer appears, unless it is non-blocking;
+        # the flag has no effect on regular files
+        fd = os.open(
+            pdf_file_path,
+            os.O_RDONLY | getattr(os, "O_NONBLOCK", 0) | getattr(os, "O_BINARY", 0),
+        )
+        try:
+            file_stat = os.fstat(fd)
+            if not stat.S_ISREG(file_stat.st_mode):
+                raise ValueError(f"Not a regular file: {pdf_file_path}")
+        except BaseException:
+            os.close(fd)
+            raise
+        self._file = open(fd, "rb", buffering=0)
+        self._map: Optional[mmap.mmap] = None
+        self._view: Optional[memoryview] = None
+        # unmapped reads seek the shared file, see _read_at
+        self._lock = threading.Lock()
+        try:
+            self.size = file_stat.st_size
+            if mapped and self.size > 0:
+                self._map_file()
+        except BaseException:
+            self._file.close()
+            raise
+
+    def _map_file(self) -> None:
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return  # not mappable, read through a buffer instead
+        if hasattr(mmap, "MADV_SEQUENTIAL"):
+            self._map.madvise(mmap.MADV_SEQUENTIAL)
+        self._view = memoryview(self._map)
+
+    def _unmap_pages(self, start: int, end: int) -> None:
+        # hashed pages are dropped from the process, so its resident memory does not
+        # grow with the file size; they stay in the page cache and are faulted back
+        # in if needed again
+        if hasattr(mmap, "MADV_DONTNEED"):
+            start -= start % mmap.PAGESIZE
+            self._map.madvise(mmap.MADV_DONTNEED, start, end - start)
+
+    @property
+    def mapped(self) -> bool:
+        return self._view is not None
+
+    def _check_range(self, offset: int, length: int) -> None:
+        if offset < 0 or length < 0:
+            raise ValueError("Invalid byte range")
+        if offset + length > self.size:
+            raise ValueError("File is shorter than the requested length")
+
+    def _read_at(self, offset: int, buffer: memoryview) -> None:
+        # reads are serialised, so views can be taken from several threads
+        with self._lock:
+            self._file.seek(offset)
+            read = 0
+            while read < len(buffer):
+                count = self._file.readinto(buffer[read:])
+                if not count:
+                    raise ValueError("File is shorter than the requested length")
+                read += count
+
+    def view(self, offset: int, length: int) -> memoryview:
+        """
+        :param:
+            offset: Start of the range.
+            length: Length of the range.
+        :return: The bytes of the range, a slice of the map if the file is mapped,
+            otherwise a copy of the range. Can be called from several threads.
+        :raises ValueError: If the range extends beyond the end of the file.
+        """
+        self._check_range(offset, length)
+        if self._view is not None:
+            return self._view[offset : offset + length]
+        buffer = memoryview(bytearray(length))
+        self._read_at(offset, buffer)
+        return buffer
+
+    def tail(self, length: int) -> memoryview:
+        """
+        :param length: Number of bytes, at most the size of the file.
+        :return: The last bytes of the file, see view.
+        """
+        length = min(length, self.size)
+        return self.view(self.size - length, length)
+
+    def trailer(self) -> Optional[SignatureTrailer]:
+        """
+        :return: The signature trailer the file ends with, or None, see SignatureTrailer.
+        """
+        # the trailer must outlive the reader, its few bytes are copied
+        return SignatureTrailer.from_tail(bytes(self.tail(TAIL_SIZE)), self.size)
+
+    def chunks(
+        self, byte_ranges: Iterable[ByteRange], chunk_size: int = CHUNK_SIZE
+    ) -> Iterator[memoryview]:
+        """
+        Iterates over byte ranges in pieces of at most chunk_size bytes.
+        Unmapped files are read into a single buffer, which is overwritten by the next
+        piece, so a piece must be used before the next one is requested.
+        :param:
+            byte_ranges: (offset, length) pairs of the ranges, in order.
+            chunk_size: Maximum size of a piece in bytes.
+        :return: An iterator of views of the pieces.
+        :raises ValueError: If a range extends beyond the end of the file.
+        """
+        if self._view is not None:
+            for offset, length in byte_ranges:
+                self._check_range(offset, length)
+                for start in range(offset, offset + length, chunk_size):
+                    end = min(start + chunk_size, offset + length)
+                    with self._view[start:end] as chunk:
+                        yield chunk
+                    self._unmap_pages(start, end)
+            return
+
+        buffer = memoryview(bytearray(chunk_size))
+        for offset, length in byte_ranges:
+            self._check_range(offset, length)
+            for start in range(offset, offset + length, chunk_size):
+                chunk = buffer[: min(chunk_size, offset + length - start)]
+                self._read_at(start, chunk)
+                yield chunk
+
+    def sha256(
+        self,
+        byte_ranges: Iterable[ByteRange],
+        chunk_size: int = CHUNK_SIZE,
+        progress: Optional[ProgressCallback] = None,
+    ) -> bytes:
+        """
+        Computes the SHA-256 digest of byte ranges of the file.
+        With metrics enabled, the time spent reading and hashing is recorded separately;
+        page faults of a mapped file count as hashing.
+        :param:
+            byte_ranges: (offset, length) pairs of the ranges to hash, in order.
+            chunk_size: Size of the pieces passed to the hash, see chunks.
+            progress: Called after every piece with the number of bytes hashed so far
+                and the total number of bytes. Any exception it raises stops hashing.
+        :return: The SHA-256 digest of the hashed bytes.
+        :raises ValueError: If a range extends beyond the end of the file.
+        """
+        byte_ranges = list(byte_ranges)
+        hasher = hashlib.sha256()
+        total = sum(length for _, length in byte_ranges)
+        done = 0
+        timed = metrics.enabled
+        read_seconds = hash_seconds = 0.0
+
+        started = time.perf_counter() if timed else 0.0
+        for chunk in self.chunks(byte_ranges, chunk_size):
+            if timed:
+                read_at = time.perf_counter()
+                read_seconds += read_at - started
+            hasher.update(chunk)
+            done += len(chunk)
+            if timed:
+                hash_seconds += time.perf_counter() - read_at
+            if progress is not None:
+                progress(done, total)
+            if timed:
+                started = time.perf_counter()
+
+        if timed:
+            metrics.observe("digest.read", read_seconds)
+            metrics.observe("digest.hash", hash_seconds)
+            metrics.count("digest.bytes", done)
+        return hasher.digest()
+
+    def close(self) -> None:
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                pass  # views are still in use, the map is closed with the last of them
+            self._map = None
+        self._file.close()
+
+    def __enter__(self) -> "DocumentReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -1,7 +1,8 @@
+# Run from the repository root: python -m app.pdf.example
 from cryptography.hazmat.primitives.asymmetric import rsa
 
-from pdf_signer import PDFSigner
-from pdf_verifier import PDFVerifier
+from app.pdf.pdf_signer import PDFSigner
+from app.pdf.pdf_verifier import PDFVerifier
 
 priv_key = rsa.generate_private_key(
     public_exponent=65537,
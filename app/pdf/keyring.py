@@ -0,0 +1,124 @@
+import glob
+import logging
+import os
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+from cryptography.hazmat.primitives import serialization
+
+from .signature_algorithms import VerifyingKey, algorithm_for_key
+from .signature_trailer import key_fingerprint
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class KeyringEntry:
+    """
+    A public key in a keyring.
+    """
+
+    name: str
+    public_key: VerifyingKey
+    fingerprint: bytes
+    path: Optional[str] = None
+
+
+class PublicKeyring:
+    """
+    A set of public keys indexed by the fingerprint of their SubjectPublicKeyInfo.
+    Unlike PublicKey, any number of keyrings can exist, each holding any number of keys.
+    """
+
+    def __init__(self):
+        self._entries: dict[bytes, KeyringEntry] = {}
+
+    @classmethod
+    def from_directory(cls, directory: str, recursive: bool = False) -> "PublicKeyring":
+        """
+        Creates a keyring from all public keys (*.pem) in a directory.
+        :param:
+            directory: The directory with the public keys.
+            recursive: Whether to include subdirectories.
+        :return: The keyring.
+        """
+        keyring = cls()
+        keyring.load_directory(directory, recursive)
+        return keyring
+
+    def add(
+        self, public_key: VerifyingKey, name: str, path: Optional[str] = None
+    ) -> KeyringEntry:
+        """
+        Adds a public key. A key that is already in the keyring keeps its first name.
+        :param:
+            public_key: The public key.
+            name: A name identifying the key owner.
+            path: The file the key was loaded from.
+        :return: The keyring entry of the key.
+        :raises ValueError: If the key type is not supported.
+        """
+        algorithm_for_key(public_key)
+        fingerprint = key_fingerprint(public_key)
+        entry = self._entries.get(fingerprint)
+        if entry is not None:
+            logger.warning(f"Public key {name} is already loaded as {entry.name}")
+            return entry
+        entry = KeyringEntry(name, public_key, fingerprint, path)
+        self._entries[fingerprint] = entry
+        return entry
+
+    def load_file(self, public_key_path: str) -> KeyringEntry:
+        """
+        Loads a public key file, named after the file.
+        :param public_key_path: The path to the public key file.
+        :return: The keyring entry of the key.
+        :raises ValueError: If the file does not hold a PEM public key.
+        """
+        with open(public_key_path, "rb") as f:
+            public_key = serialization.load_pem_public_key(f.read())
+        name = os.path.splitext(os.path.basename(public_key_path))[0]
+        return self.add(public_key, name, public_key_path)
+
+    def load_directory(self, directory: str, recursive: bool = False) -> int:
+        """
+        Loads all public keys (*.pem) in a directory. Files that are not public keys,
+        such as private keys stored next to them, are skipped.
+        :param:
+            directory: The directory with the public keys.
+            recursive: Whether to include subdirectories.
+        :return: The number of loaded files.
+        """
+        if recursive:
+            pattern = os.path.join(directory, "**", "*.pem")
+        else:
+            pattern = os.path.join(directory, "*.pem")
+
+        loaded = 0
+        for public_key_path in sorted(glob.glob(pattern, recursive=recursive)):
+            try:
+                self.load_file(public_key_path)
+                loaded += 1
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping {public_key_path}: {e}")
+        logger.info(f"Loaded {loaded} public keys from {directory}")
+        return loaded
+
+    def get(self, fingerprint: bytes) -> Optional[KeyringEntry]:
+        """
+        :param fingerprint: Fingerprint of the public key, see key_fingerprint.
+        :return: The keyring entry, or None if the key is not in the keyring.
+        """
+        return self._entries.get(fingerprint)
+
+    def remove(self, fingerprint: bytes) -> None:
+        self._entries.pop(fingerprint, None)
+
+    def __contains__(self, fingerprint: bytes) -> bool:
+        return fingerprint in self._entries
+
+    def __iter__(self) -> Iterator[KeyringEntry]:
+        return iter(list(self._entries.values()))
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,243 @@
+"""
+Signed manifests of directory trees.
+
+A manifest lists the relative path, size and SHA-256 digest of every file of a tree,
+one JSON object per line, and ends with a signature trailer (see signature_trailer):
+
+    {"format": "pades-manifest", "version": 1}
+    {"path": "contracts/a.pdf", "size": 1048576, "sha256": "9f86d0..."}
+    ...
+    [ signature ][ footer ]
+
+The whole tree is covered by a single private key operation, and the files themselves
+are never modified, so deduplicating storage and incremental backups are not disturbed.
+The manifest is signed like any other file, so `verify` accepts it too.
+"""
+
+import json
+import os
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from hashlib import sha256
+from typing import Iterable, Iterator, Optional
+
+from .atomic_file import atomic_write
+from .digest import sha256_file
+from .pdf_signer import PDFSigner
+from .pdf_verifier import PDFVerifier
+from .signature_trailer import SignatureTrailer
+
+from ..instrumentation import metrics
+
+MANIFEST_NAME = "MANIFEST.pades"
+MANIFEST_FORMAT = "pades-manifest"
+MANIFEST_VERSION = 1
+
+
+@dataclass(frozen=True)
+class ManifestEntry:
+    """
+    A file listed in a manifest, its path is relative to the root with forward slashes.
+    """
+
+    path: str
+    size: int
+    sha256: str
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {"path": self.path, "size": self.size, "sha256": self.sha256},
+            ensure_ascii=False,
+            separators=(", ", ": "),
+        )
+
+
+@dataclass
+class ManifestReport:
+    """
+    Result of checking a directory tree against its manifest.
+    """
+
+    signature_valid: bool
+    files: int = 0
+    missing: list[str] = field(default_factory=list)
+    modified: list[str] = field(default_factory=list)
+    unlisted: list[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        """
+        :return: Whether the signature is valid and every listed file is intact.
+            Unlisted files are reported, but they do not make the tree invalid.
+        """
+        return self.signature_valid and not self.missing and not self.modified
+
+
+def list_files(directory: str, exclude: Iterable[str] = ()) -> list[str]:
+    """
+    Lists the regular files of a directory tree. Symbolic links are not followed.
+    :param:
+        directory: The root of the tree.
+        exclude: Absolute paths of files to leave out, e.g. the manifest itself.
+    :return: Relative paths with forward slashes, sorted.
+    """
+    excluded = {os.path.abspath(path) for path in exclude}
+    files = []
+    directories = [os.path.abspath(directory)]
+    root = directories[0]
+    while directories:
+        with os.scandir(directories.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    directories.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    if entry.path not in excluded:
+                        relative_path = os.path.relpath(entry.path, root)
+                        files.append(relative_path.replace(os.sep, "/"))
+    return sorted(files)
+
+
+def _hash_entry(directory: str, relative_path: str) -> ManifestEntry:
+    path = os.path.join(directory, *relative_path.split("/"))
+    size = os.path.getsize(path)
+    return ManifestEntry(relative_path, size, sha256_file(path, size).hex())
+
+
+def hash_files(
+    directory: str, relative_paths: Iterable[str], workers: Optional[int] = None
+) -> Iterator[ManifestEntry]:
+    """
+    Hashes files in a thread pool (hashlib releases the GIL).
+    At most twice the number of threads is queued at a time, so the number of files
+    does not affect memory usage.
+    :param:
+        directory: The root of the tree.
+        relative_paths: Paths of the files relative to the root.
+        workers: Number of hashing threads.
+    :return: An iterator of entries, in the order of the paths.
+    """
+    workers = workers or min(32, (os.cpu_count() or 1) + 4)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending: deque[Future] = deque()
+        for relative_path in relative_paths:
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+            pending.append(pool.submit(_hash_entry, directory, relative_path))
+        while pending:
+            yield pending.popleft().result()
+
+
+def sign_manifest(
+    signer: PDFSigner,
+    directory: str,
+    manifest_path: Optional[str] = None,
+    workers: Optional[int] = None,
+) -> int:
+    """
+    Hashes every file of a directory tree and writes a signed manifest of it.
+    An existing manifest is replaced atomically.
+    :param:
+        signer: The signer, its key signs the manifest.
+        directory: The root of the tree.
+        manifest_path: The manifest file, MANIFEST.pades in the directory by default.
+            It is left out of the listing if it is inside the tree.
+        workers: Number of hashing threads.
+    :return: Number of files in the manifest.
+    """
+    if manifest_path is None:
+        manifest_path = os.path.join(directory, MANIFEST_NAME)
+    relative_paths = list_files(directory, exclude=[manifest_path])
+
+    with metrics.span("manifest.sign"):
+        lines = [json.dumps({"format": MANIFEST_FORMAT, "version": MANIFEST_VERSION})]
+        lines += [
+            entry.to_json() for entry in hash_files(directory, relative_paths, workers)
+        ]
+        content = ("\n".join(lines) + "\n").encode()
+        signature = signer.sign_digest(sha256(content).digest())
+        trailer = signer.make_trailer(signature, len(content))
+        atomic_write(manifest_path, content + trailer.to_bytes())
+    metrics.count("manifest.files", len(relative_paths))
+    return len(relative_paths)
+
+
+def read_manifest(content: bytes) -> list[ManifestEntry]:
+    """
+    Parses the signed content of a manifest.
+    :param content: The manifest without its trailer.
+    :return: The entries.
+    :raises ValueError: If the content is not a manifest of a supported version,
+        or a path is absolute or leads out of the tree.
+    """
+    lines = content.decode().splitlines()
+    header = json.loads(lines[0]) if lines else {}
+    if header.get("format") != MANIFEST_FORMAT or header.get("version") != (
+        MANIFEST_VERSION
+    ):
+        raise ValueError("Not a supported manifest")
+
+    entries = []
+    for line in lines[1:]:
+        item = json.loads(line)
+        path = item["path"]
+        if os.path.isabs(path) or ".." in path.replace(os.sep, "/").split("/"):
+            raise ValueError(f"Invalid path in manifest: {path}")
+        entries.append(ManifestEntry(path, int(item["size"]), item["sha256"]))
+    return entries
+
+
+def verify_manifest(
+    verifier: PDFVerifier,
+    manifest_path: str,
+    directory: Optional[str] = None,
+    workers: Optional[int] = None,
+) -> ManifestReport:
+    """
+    Checks a directory tree against its signed manifest. Files whose size differs
+    from the manifest are reported as modified without hashing them.
+    :param:
+        verifier: The verifier with the public key of the signer.
+        manifest_path: The manifest file.
+        directory: The root of the tree, the directory of the manifest by default.
+        workers: Number of hashing threads.
+    :return: The report. Nothing but the signature is checked if it is not valid.
+    :raises ValueError: If the signed content is not a valid manifest.
+    """
+    if directory is None:
+        directory = os.path.dirname(os.path.abspath(manifest_path))
+
+    with metrics.span("manifest.verify") as span:
+        with open(manifest_path, "rb") as f:
+            trailer = SignatureTrailer.from_file(f)
+            if trailer is None or trailer.chunked:
+                span.set(valid=False)
+                return ManifestReport(signature_valid=False)
+            f.seek(0)
+            content = f.read(trailer.signed_length)
+        if not verifier.verify_digest(sha256(content).digest(), trailer.signature):
+            span.set(valid=False)
+            return ManifestReport(signature_valid=False)
+        entries = read_manifest(content)
+
+        report = ManifestReport(signature_valid=True, files=len(entries))
+        present = set(list_files(directory, exclude=[manifest_path]))
+        to_hash = []
+        for entry in entries:
+            path = os.path.join(directory, *entry.path.split("/"))
+            if entry.path not in present:
+                report.missing.append(entry.path)
+            elif os.path.getsize(path) != entry.size:
+                report.modified.append(entry.path)
+            else:
+                to_hash.append(entry)
+
+        expected = {entry.path: entry.sha256 for entry in to_hash}
+        for actual in hash_files(directory, expected, workers):
+            if actual.sha256 != expected[actual.path]:
+                report.modified.append(actual.path)
+        report.modified.sort()
+        listed = {entry.path for entry in entries}
+        report.unlisted = sorted(present - listed)
+        span.set(valid=report.ok)
+    return report
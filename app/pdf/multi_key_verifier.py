@@ -0,0 +1,133 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from .digest import ProgressCallback
+from .document_reader import DocumentReader
+from .keyring import KeyringEntry, PublicKeyring
+from .pdf_verifier import PDFVerifier
+from .signature_trailer import SignatureTrailer
+
+# a public key operation takes well under a millisecond, so small candidate sets
+# are checked in the calling thread
+MIN_CANDIDATES_PER_WORKER = 32
+
+
+class MultiKeyVerifier:
+    """
+    Verifies PDF files against all keys of a public keyring.
+    The file is opened and hashed once. If its signature trailer names the signing key,
+    that key is looked up by fingerprint and checked alone. Legacy files without a trailer
+    are checked against every key of the matching size, split between worker threads.
+    """
+
+    def __init__(self, keyring: PublicKeyring, workers: Optional[int] = None):
+        """
+        :param:
+            keyring: The public keys to verify against.
+            workers: Number of threads trying candidate keys, the CPU count by default.
+        """
+        self.keyring = keyring
+        self._workers = workers or os.cpu_count() or 1
+        self._verifiers: dict[bytes, PDFVerifier] = {}
+
+    def verify(
+        self, pdf_file_path: str, progress: Optional[ProgressCallback] = None
+    ) -> Optional[KeyringEntry]:
+        """
+        Verifies the signature of a PDF file.
+        :param:
+            pdf_file_path: The path to the PDF file.
+            progress: Optional callback reporting hashing progress, see sha256_file.
+        :return:
+            KeyringEntry - The key that made the signature, or
+            None - If the signature is not valid for any key of the keyring.
+        """
+        with DocumentReader(pdf_file_path) as reader:
+            trailer = reader.trailer()
+            # reject files signed by an unknown key before hashing them
+            if trailer is not None and trailer.fingerprint not in self.keyring:
+                return None
+            # the trailer and the content are read from the same open file
+            signed_content = PDFVerifier._read_signed_content(reader, trailer, progress)
+        if signed_content is None:
+            return None
+
+        return self.verify_content(*signed_content, trailer)
+
+    def verify_content(
+        self, digest: bytes, signature: bytes, trailer: Optional[SignatureTrailer]
+    ) -> Optional[KeyringEntry]:
+        """
+        Verifies already hashed content.
+        :param:
+            digest: The SHA256 digest of the signed content.
+            signature: The signature to check.
+            trailer: The signature trailer, None for legacy files.
+        :return: The key that made the signature, or None if there is none.
+        """
+        if trailer is None:
+            return self.find_signer(digest, signature)
+        entry = self.keyring.get(trailer.fingerprint)
+        if entry is None:
+            return None
+        verifier = self._verifier(entry)
+        if trailer.algorithm != verifier.algorithm.algorithm_id:
+            return None
+        return entry if verifier.verify_digest(digest, signature) else None
+
+    def find_signer(self, digest: bytes, signature: bytes) -> Optional[KeyringEntry]:
+        """
+        Tries every RSA key with the size of the signature until one of them verifies it.
+        Only RSA signatures were made without a trailer.
+        :param:
+            digest: The SHA256 digest of the signed content.
+            signature: The signature to check.
+        :return: The key that made the signature, or None if there is none.
+        """
+        candidates = [
+            entry
+            for entry in self.keyring
+            if isinstance(entry.public_key, rsa.RSAPublicKey)
+            and (entry.public_key.key_size + 7) // 8 == len(signature)
+        ]
+        workers = min(self._workers, len(candidates) // MIN_CANDIDATES_PER_WORKER)
+        if workers <= 1:
+            for entry in candidates:
+                if self._verify_with(entry, digest, signature):
+                    return entry
+            return None
+
+        found = threading.Event()
+
+        def try_candidates(entries: list[KeyringEntry]) -> Optional[KeyringEntry]:
+            for entry in entries:
+                if found.is_set():
+                    return None
+                if self._verify_with(entry, digest, signature):
+                    found.set()
+                    return entry
+            return None
+
+        with ThreadPoolExecutor(workers) as executor:
+            chunks = [candidates[i::workers] for i in range(workers)]
+            for entry in executor.map(try_candidates, chunks):
+                if entry is not None:
+                    return entry
+        return None
+
+    def _verifier(self, entry: KeyringEntry) -> PDFVerifier:
+        verifier = self._verifiers.get(entry.fingerprint)
+        if verifier is None:
+            verifier = self._verifiers[entry.fingerprint] = PDFVerifier(
+                entry.public_key
+            )
+        return verifier
+
+    def _verify_with(
+        self, entry: KeyringEntry, digest: bytes, signature: bytes
+    ) -> bool:
+        return self._verifier(entry).verify_digest(digest, signature)
@@ -0,0 +1,377 @@
+import datetime
+import os
+from typing import BinaryIO, Optional, Union
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from cryptography.x509.oid import NameOID
+
+from .atomic_file import atomic_update
+from .cms import build_signed_data
+from .digest import ProgressCallback, sha256_ranges
+from .pdf_structure import Name, PDFObject, PDFStructure, Raw, Ref, serialize
+from .signature_trailer import AlreadySignedError, SignatureTrailer
+
+from ..instrumentation import metrics
+
+# bytes reserved for the CMS structure in /Contents, stored hex encoded (twice as many characters)
+CONTENTS_SIZE = 8192
+# width of every number in the /ByteRange array, so it can be filled in after layout
+BYTE_RANGE_WIDTH = 10
+BYTE_RANGE_PLACEHOLDER = b"[" + b" ".join([b"0" * BYTE_RANGE_WIDTH] * 4) + b"]"
+CERTIFICATE_VALIDITY = datetime.timedelta(days=365)
+
+PAdESKey = Union[rsa.RSAPrivateKey, ec.EllipticCurvePrivateKey]
+
+
+def self_signed_certificate(
+    private_key: PAdESKey, common_name: str
+) -> x509.Certificate:
+    """
+    Creates a self-signed certificate for a key that has no certificate of its own.
+    :param:
+        private_key: The key to certify.
+        common_name: Common name of the subject and the issuer.
+    :return: The certificate.
+    """
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, common_name)])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(private_key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(minutes=5))
+        .not_valid_after(now + CERTIFICATE_VALIDITY)
+        .add_extension(
+            x509.KeyUsage(
+                digital_signature=True,
+                content_commitment=True,
+                key_encipherment=False,
+                data_encipherment=False,
+                key_agreement=False,
+                key_cert_sign=False,
+                crl_sign=False,
+                encipher_only=False,
+                decipher_only=False,
+            ),
+            critical=True,
+        )
+        .sign(private_key, hashes.SHA256())
+    )
+
+
+class PAdESSigner:
+    """
+    Signs a PDF file with a PAdES baseline signature (ETSI.CAdES.detached) added
+    as an incremental update.
+    The update holds a signature dictionary with a fixed-size /Contents placeholder,
+    a signature field and the updated catalog and page. The two byte ranges around
+    the placeholder are hashed in a streaming pass and the CMS structure is written
+    into the placeholder with a single positioned write. The original document is
+    neither rewritten nor loaded into memory, unless the atomic mode is used: then
+    the update is made on a temporary copy, which replaces the original when complete.
+    """
+
+    def __init__(
+        self,
+        private_key: PAdESKey,
+        certificate: Optional[x509.Certificate] = None,
+        signer_name: str = "PAdES tool signer",
+        contents_size: int = CONTENTS_SIZE,
+        atomic: bool = False,
+    ) -> None:
+        """
+        :param:
+            private_key: The signer's private key, RSA or ECDSA.
+            certificate: The signer's certificate, a self-signed one is created if not given.
+            signer_name: Name of the signer, stored in the signature dictionary.
+            contents_size: Number of bytes reserved for the CMS structure.
+            atomic: Whether to replace the file with a signed copy, see atomic_file.
+        :raises ValueError: If the key is not an RSA or ECDSA key, or the signature
+            does not fit into contents_size.
+        """
+        if not isinstance(private_key, (rsa.RSAPrivateKey, ec.EllipticCurvePrivateKey)):
+            raise ValueError("PAdES signatures need an RSA or ECDSA key")
+        self._private_key = private_key
+        self._certificate = certificate or self_signed_certificate(
+            private_key, signer_name
+        )
+        self._signer_name = signer_name
+        self._contents_size = contents_size
+        self.atomic = atomic
+
+        # certificate, signature and a generous allowance for the ASN.1 structure
+        estimated_size = (
+            len(self._certificate.public_bytes(serialization.Encoding.DER))
+            + private_key.key_size // 8
+            + 1024
+        )
+        if estimated_size > contents_size:
+            raise ValueError(
+                f"Signature needs about {estimated_size} bytes, "
+                f"only {contents_size} are reserved"
+            )
+
+    def sign(
+        self, pdf_file_path: str, progress: Optional[ProgressCallback] = None
+    ) -> None:
+        """
+        Signs a PDF file. The file is restored to its original size if signing fails
+        or is cancelled from the progress callback; in the atomic mode it is not
+        modified at all.
+        :param:
+            pdf_file_path: The path to the PDF file.
+            progress: Optional callback reporting hashing progress, see sha256_ranges.
+        :raises AlreadySignedError: If the file ends with a raw signature trailer.
+        :raises PDFSyntaxError: If the PDF structure cannot be parsed.
+        """
+        with metrics.span("pdf.sign", mode="pades", atomic=self.atomic):
+            if SignatureTrailer.read(pdf_file_path) is not None:
+                raise AlreadySignedError(
+                    f"File already has an appended signature: {pdf_file_path}"
+                )
+            if self.atomic:
+                with atomic_update(pdf_file_path) as f:
+                    self._sign_file(f, f.name, progress)
+            else:
+                with open(pdf_file_path, "r+b") as f:
+                    self._sign_file(f, pdf_file_path, progress)
+
+    def _sign_file(
+        self, f: BinaryIO, pdf_file_path: str, progress: Optional[ProgressCallback]
+    ) -> None:
+        """
+        Appends the incremental update to an open file and fills in the signature.
+        """
+        structure = PDFStructure(f)
+        original_size = structure.file_size
+        f.seek(original_size - 1)
+        separator = b"" if f.read(1) in (b"\n", b"\r") else b"\n"
+        update, contents_offset = self._build_update(structure, separator)
+
+        f.seek(original_size)
+        f.write(update)
+        f.flush()
+        try:
+            contents_start = original_size + contents_offset
+            contents_end = contents_start + 2 + self._contents_size * 2
+            file_size = original_size + len(update)
+            digest = sha256_ranges(
+                pdf_file_path,
+                [(0, contents_start), (contents_end, file_size - contents_end)],
+                progress=progress,
+            )
+
+            with metrics.span("pdf.sign_digest", algorithm="cms"):
+                cms = build_signed_data(self._private_key, self._certificate, digest)
+            if len(cms) > self._contents_size:
+                raise ValueError("Signature does not fit into the reserved space")
+            self._write_at(f, cms.hex().encode(), contents_start + 1)
+        except BaseException:
+            f.truncate(original_size)
+            raise
+
+    @staticmethod
+    def _write_at(f, data: bytes, offset: int) -> None:
+        if hasattr(os, "pwrite"):
+            os.pwrite(f.fileno(), data, offset)
+        else:
+            f.seek(offset)
+            f.write(data)
+            f.flush()
+
+    def _build_update(
+        self, structure: PDFStructure, separator: bytes
+    ) -> tuple[bytes, int]:
+        """
+        Lays out the incremental update.
+        :param:
+            structure: The structure of the document being updated.
+            separator: Bytes to put between the document and the update.
+        :return: The update and the offset of the /Contents placeholder within it.
+        """
+        root_ref = structure.trailer["Root"]
+        catalog = structure.read_object(root_ref.number)
+        page_ref = self._first_page(structure, catalog["Pages"])
+        page = structure.read_object(page_ref.number)
+
+        signature_ref = Ref(structure.size)
+        field_ref = Ref(structure.size + 1)
+        next_number = structure.size + 2
+        updated: dict[Ref, PDFObject] = {root_ref: catalog, page_ref: page}
+
+        acro_form = catalog.get("AcroForm")
+        if isinstance(acro_form, Ref):
+            acro_form_ref = acro_form
+            acro_form = structure.read_object(acro_form_ref.number)
+            updated[acro_form_ref] = acro_form
+        elif acro_form is None:
+            acro_form = catalog[Name("AcroForm")] = {Name("Fields"): []}
+        field_count = self._append(structure, acro_form, "Fields", field_ref, updated)
+        acro_form[Name("SigFlags")] = 3
+        self._append(structure, page, "Annots", field_ref, updated)
+
+        signing_time = datetime.datetime.now(datetime.timezone.utc)
+        contents_placeholder = b"<" + b"0" * self._contents_size * 2 + b">"
+        signature_object = (
+            b"<</Type/Sig/Filter/Adobe.PPKLite/SubFilter/ETSI.CAdES.detached"
+            + b"/Name "
+            + self._pdf_string(self._signer_name)
+            + b"/M "
+            + self._pdf_string(signing_time.strftime("D:%Y%m%d%H%M%S+00'00'"))
+            + b"/ByteRange "
+            + BYTE_RANGE_PLACEHOLDER
+            + b"/Contents "
+            + contents_placeholder
+            + b">>"
+        )
+        field = {
+            Name("Type"): Name("Annot"),
+            Name("Subtype"): Name("Widget"),
+            Name("FT"): Name("Sig"),
+            Name("T"): self._pdf_string(f"Signature{field_count}"),
+            Name("V"): signature_ref,
+            Name("F"): 132,
+            Name("Rect"): [0, 0, 0, 0],
+            Name("P"): page_ref,
+        }
+
+        objects = {signature_ref: signature_object, field_ref: serialize(field)}
+        objects.update({ref: serialize(obj) for ref, obj in updated.items()})
+
+        update = bytearray(separator)
+        start = structure.file_size
+        offsets = {}
+        for ref, body in objects.items():
+            offsets[ref] = start + len(update)
+            update += b"%d %d obj\n" % ref + body + b"\nendobj\n"
+
+        xref_offset = start + len(update)
+        if structure.uses_xref_stream:
+            update += self._xref_stream(structure, offsets, next_number, xref_offset)
+        else:
+            update += self._xref_table(structure, offsets, next_number)
+        update += b"startxref\n%d\n%%%%EOF\n" % xref_offset
+
+        # the placeholders are laid out, now the byte ranges are known
+        contents_offset = update.index(contents_placeholder)
+        contents_end = start + contents_offset + len(contents_placeholder)
+        byte_range = b"[0 %d %d %d]" % (
+            start + contents_offset,
+            contents_end,
+            start + len(update) - contents_end,
+        )
+        placeholder_offset = update.index(BYTE_RANGE_PLACEHOLDER)
+        update[
+            placeholder_offset : placeholder_offset + len(BYTE_RANGE_PLACEHOLDER)
+        ] = byte_range.ljust(len(BYTE_RANGE_PLACEHOLDER))
+        return bytes(update), contents_offset
+
+    @staticmethod
+    def _pdf_string(text: str) -> Raw:
+        escaped = text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+        return Raw(b"(" + escaped.encode("latin-1", errors="replace") + b")")
+
+    @staticmethod
+    def _first_page(structure: PDFStructure, node_ref: Ref) -> Ref:
+        node = structure.read_object(node_ref.number)
+        while node.get("Type") != "Page":
+            node_ref = node["Kids"][0]
+            node = structure.read_object(node_ref.number)
+        return node_ref
+
+    @staticmethod
+    def _append(
+        structure: PDFStructure,
+        container: dict,
+        key: str,
+        item: PDFObject,
+        updated: dict[Ref, PDFObject],
+    ) -> int:
+        """
+        Appends an item to an array stored in the container directly or by reference.
+        :return: The new length of the array.
+        """
+        array = container.get(key)
+        if isinstance(array, Ref):
+            array_ref = array
+            array = structure.read_object(array_ref.number)
+            updated[array_ref] = array
+        elif array is None:
+            array = container[Name(key)] = []
+        array.append(item)
+        return len(array)
+
+    @staticmethod
+    def _subsections(numbers: list[int]) -> list[list[int]]:
+        subsections = []
+        for number in sorted(numbers):
+            if subsections and subsections[-1][-1] == number - 1:
+                subsections[-1].append(number)
+            else:
+                subsections.append([number])
+        return subsections
+
+    def _trailer(self, structure: PDFStructure, size: int) -> dict:
+        trailer = {
+            Name("Size"): size,
+            Name("Root"): structure.trailer["Root"],
+            Name("Prev"): structure.startxref,
+        }
+        for key in ("Info", "ID"):
+            if key in structure.trailer:
+                trailer[Name(key)] = structure.trailer[key]
+        return trailer
+
+    def _xref_table(
+        self, structure: PDFStructure, offsets: dict[Ref, int], size: int
+    ) -> bytes:
+        by_number = {
+            ref.number: (offset, ref.generation) for ref, offset in offsets.items()
+        }
+        table = b"xref\n"
+        for subsection in self._subsections(list(by_number)):
+            table += b"%d %d\n" % (subsection[0], len(subsection))
+            for number in subsection:
+                table += b"%010d %05d n\r\n" % by_number[number]
+        return table + b"trailer\n" + serialize(self._trailer(structure, size)) + b"\n"
+
+    def _xref_stream(
+        self,
+        structure: PDFStructure,
+        offsets: dict[Ref, int],
+        xref_number: int,
+        xref_offset: int,
+    ) -> bytes:
+        by_number = {
+            ref.number: (offset, ref.generation) for ref, offset in offsets.items()
+        }
+        by_number[xref_number] = (xref_offset, 0)
+        index, rows = [], b""
+        for subsection in self._subsections(list(by_number)):
+            index += [subsection[0], len(subsection)]
+            for number in subsection:
+                offset, generation = by_number[number]
+                rows += (
+                    b"\x01" + offset.to_bytes(4, "big") + generation.to_bytes(2, "big")
+                )
+
+        stream_dict = self._trailer(structure, xref_number + 1)
+        stream_dict.update(
+            {
+                Name("Type"): Name("XRef"),
+                Name("W"): [1, 4, 2],
+                Name("Index"): index,
+                Name("Length"): len(rows),
+            }
+        )
+        return (
+            b"%d 0 obj\n" % xref_number
+            + serialize(stream_dict)
+            + b"\nstream\n"
+            + rows
+            + b"\nendstream\nendobj\n"
+        )
@@ -1,46 +1,212 @@
 from typing import Optional
 
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.asymmetric import padding, rsa
+from .atomic_file import atomic_update, atomic_write
+from .digest import ProgressCallback
+from .document_reader import DocumentReader
+from .signature_algorithms import SigningKey, algorithm_for_key
+from .signature_trailer import (
+    CHUNKED_VERSION,
+    VERSION,
+    AlreadySignedError,
+    SignatureTrailer,
+    key_fingerprint,
+    sidecar_path,
+)
+
+from ..instrumentation import metrics
 
 
 class PDFSigner:
     """
-    Signs a PDF file using a private key. Signature is appended to the end of the file.
+    Signs a PDF file using a private key. Signature is appended to the end of the file,
+    followed by a footer describing it (see signature_trailer).
+    The file is hashed in chunks, so memory usage does not depend on the file size.
+    The signature algorithm is chosen by the type of the key: RSA, ECDSA or Ed25519.
+    In the atomic mode the signed file is written to a temporary copy, which replaces
+    the original only when it is complete and synced to disk.
+    A detached signature is written to a sidecar file instead, leaving the PDF unchanged.
     """
 
-    def __init__(self, private_key: rsa.RSAPrivateKey) -> None:
+    def __init__(
+        self, private_key: SigningKey, atomic: bool = False, mapped: bool = True
+    ) -> None:
+        """
+        :param:
+            private_key: The private key.
+            atomic: Whether to replace the file with a signed copy instead of appending
+                to it in place, see atomic_file.
+            mapped: Whether to memory-map files to hash them, see DocumentReader.
+        :raises ValueError: If the key type is not supported.
+        """
         self._private_key = private_key
+        self.algorithm = algorithm_for_key(private_key)
+        self._fingerprint = key_fingerprint(private_key.public_key())
+        self.atomic = atomic
+        self.mapped = mapped
 
-    def _generate_signature(self, pdf_file_path: str) -> Optional[bytes]:
+    def already_signed(self, pdf_file_path: str) -> bool:
         """
-        Generates a signature for the PDF file by signing SHA256 hash of the file content.
+        Checks whether the file already ends with a signature trailer made by this key.
+        Only the end of the file is read and the signature is not verified, so finished
+        files can be skipped cheaply when a batch is signed again.
         :param pdf_file_path: The path to the PDF file.
         """
+        trailer = SignatureTrailer.read(pdf_file_path)
+        return (
+            trailer is not None
+            and trailer.fingerprint == self._fingerprint
+            and trailer.algorithm == self.algorithm.algorithm_id
+        )
+
+    def hash_document(
+        self, pdf_file_path: str, progress: Optional[ProgressCallback] = None
+    ) -> tuple[bytes, int]:
+        """
+        Computes SHA256 hash of the file content in a streaming pass over a single
+        open file, see DocumentReader.
+        :param:
+            pdf_file_path: The path to the PDF file.
+            progress: Optional callback reporting hashing progress, see sha256_file.
+        :return: The digest and the number of hashed bytes.
+        :raises AlreadySignedError: If the file already ends with a signature trailer.
+        """
+        with DocumentReader(pdf_file_path, self.mapped) as reader:
+            if reader.trailer() is not None:
+                raise AlreadySignedError(f"File is already signed: {pdf_file_path}")
+            with metrics.span("pdf.hash_document"):
+                digest = reader.sha256([(0, reader.size)], progress=progress)
+            return digest, reader.size
+
+    def _generate_signature(
+        self, pdf_file_path: str, progress: Optional[ProgressCallback] = None
+    ) -> Optional[tuple[bytes, int]]:
+        """
+        Generates a signature for the PDF file by signing SHA256 hash of the file content.
+        The hash is computed in a streaming pass and signed as a prehashed digest.
+        :param:
+            pdf_file_path: The path to the PDF file.
+            progress: Optional callback reporting hashing progress, see sha256_file.
+        :return: The signature and the number of signed bytes.
+        """
         try:
-            with open(pdf_file_path, "rb") as f:
-                pdf_content = f.read()
-            signature = self._private_key.sign(
-                pdf_content,
-                padding.PSS(
-                    mgf=padding.MGF1(hashes.SHA256()),
-                    salt_length=padding.PSS.MAX_LENGTH,
-                ),
-                hashes.SHA256(),
-            )
-            return signature
+            digest, signed_length = self.hash_document(pdf_file_path, progress)
         except FileNotFoundError:
             return None
 
-    def sign(self, pdf_file_path: str) -> None:
+        return self.sign_digest(digest), signed_length
+
+    def sign_digest(self, digest: bytes) -> bytes:
+        """
+        Signs an already computed SHA256 digest of the PDF file content.
+        :param digest: The SHA256 digest to sign.
+        :return: The signature.
+        """
+        with metrics.span("pdf.sign_digest", algorithm=self.algorithm.name):
+            return self.algorithm.sign_digest(self._private_key, digest)
+
+    def sign(
+        self, pdf_file_path: str, progress: Optional[ProgressCallback] = None
+    ) -> None:
         """
         Signs a PDF file with the private key.
-        :param pdf_file_path: The path to the PDF file.
+        The file is left untouched if the operation is cancelled from the progress callback.
+        :param:
+            pdf_file_path: The path to the PDF file.
+            progress: Optional callback reporting hashing progress, see sha256_file.
+        :raises AlreadySignedError: If the file is already signed.
+        """
+        with metrics.span("pdf.sign", mode="trailer"):
+            generated = self._generate_signature(pdf_file_path, progress)
+
+            if generated is None:
+                return
+
+            self.write_signature(pdf_file_path, *generated)
+
+    def sign_detached(
+        self, pdf_file_path: str, progress: Optional[ProgressCallback] = None
+    ) -> str:
+        """
+        Signs a PDF file without modifying it. The trailer is written to a sidecar
+        file next to it (see signature_trailer), replacing an older one atomically.
+        :param:
+            pdf_file_path: The path to the PDF file.
+            progress: Optional callback reporting hashing progress, see sha256_file.
+        :return: The path to the sidecar file.
+        """
+        with metrics.span("pdf.sign", mode="detached"):
+            with DocumentReader(pdf_file_path, self.mapped) as reader:
+                signed_length = reader.size
+                with metrics.span("pdf.hash_document"):
+                    digest = reader.sha256([(0, signed_length)], progress=progress)
+            trailer = self.make_trailer(self.sign_digest(digest), signed_length)
+            sidecar_file_path = sidecar_path(pdf_file_path)
+            with metrics.span("pdf.write_signature", atomic=True):
+                atomic_write(sidecar_file_path, trailer.to_bytes())
+        return sidecar_file_path
+
+    def make_trailer(
+        self, signature: bytes, signed_length: int, chunk_size: int = 0
+    ) -> SignatureTrailer:
+        """
+        Describes a signature made by this signer.
+        :param:
+            signature: The signature generated for the file content.
+            signed_length: The number of signed bytes.
+            chunk_size: Chunk size of a signed Merkle root, see chunked_signer.
+                0 if the digest of the whole content was signed.
+        :return: The trailer to append to the file.
         """
-        signature = self._generate_signature(pdf_file_path)
+        return SignatureTrailer(
+            algorithm=self.algorithm.algorithm_id,
+            key_size=self.algorithm.key_size(self._private_key),
+            fingerprint=self._fingerprint,
+            signed_length=signed_length,
+            signature=signature,
+            version=CHUNKED_VERSION if chunk_size else VERSION,
+            chunk_size=chunk_size,
+        )
 
-        if signature is None:
-            return
+    def write_signature(
+        self, pdf_file_path: str, signature: bytes, signed_length: int
+    ) -> None:
+        """
+        Appends the signature trailer to the end of the PDF file.
+        :param:
+            pdf_file_path: The path to the PDF file.
+            signature: The signature generated for the file content.
+            signed_length: The number of signed bytes.
+        :raises ValueError: If the file was modified after it had been hashed.
+        """
+        trailer = self.make_trailer(signature, signed_length)
+        self.append_to_file(pdf_file_path, trailer.to_bytes(), signed_length)
+
+    def append_to_file(
+        self, pdf_file_path: str, data: bytes, signed_length: int
+    ) -> None:
+        """
+        Appends signature data to the signed content of the file, in place or
+        atomically. An in-place append that fails is truncated back to the signed content.
+        :param:
+            pdf_file_path: The path to the PDF file.
+            data: The bytes to append.
+            signed_length: The number of signed bytes, the expected size of the file.
+        :raises ValueError: If the file was modified after it had been hashed.
+        """
+        with metrics.span("pdf.write_signature", atomic=self.atomic):
+            if self.atomic:
+                with atomic_update(pdf_file_path, signed_length) as f:
+                    f.write(data)
+                return
 
-        with open(pdf_file_path, "ab") as f:
-            f.write(signature)
+            with open(pdf_file_path, "ab") as f:
+                if f.tell() != signed_length:
+                    raise ValueError(
+                        f"File was modified while signing: {pdf_file_path}"
+                    )
+                try:
+                    f.write(data)
+                    f.flush()
+                except BaseException:
+                    f.truncate(signed_length)
+                    raise
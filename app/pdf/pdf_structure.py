@@ -0,0 +1,385 @@
+import re
+import zlib
+from typing import BinaryIO, NamedTuple, Optional, Union
+
+WHITESPACE = b"\x00\t\n\x0c\r "
+DELIMITERS = b"()<>[]{}/%"
+TAIL_SIZE = 4096
+OBJECT_READ_SIZE = 64 * 1024
+
+
+class PDFSyntaxError(ValueError):
+    """
+    Raised when the PDF structure cannot be parsed.
+    """
+
+
+class Name(str):
+    """
+    A PDF name object, stored without the leading slash.
+    """
+
+
+class Ref(NamedTuple):
+    """
+    An indirect reference to a PDF object.
+    """
+
+    number: int
+    generation: int = 0
+
+
+class Raw(bytes):
+    """
+    A PDF object kept in its original encoding (strings, reals, booleans, null).
+    """
+
+
+PDFObject = Union[dict, list, Name, Ref, Raw, int]
+
+
+def _skip_whitespace(data: bytes, pos: int) -> int:
+    while pos < len(data):
+        if data[pos] in WHITESPACE:
+            pos += 1
+        elif data[pos : pos + 1] == b"%":
+            while pos < len(data) and data[pos] not in b"\r\n":
+                pos += 1
+        else:
+            break
+    return pos
+
+
+def _read_regular(data: bytes, pos: int) -> tuple[bytes, int]:
+    end = pos
+    while end < len(data) and data[end] not in WHITESPACE + DELIMITERS:
+        end += 1
+    return data[pos:end], end
+
+
+def _read_literal_string(data: bytes, pos: int) -> int:
+    depth = 0
+    while pos < len(data):
+        char = data[pos : pos + 1]
+        if char == b"\\":
+            pos += 2
+            continue
+        if char == b"(":
+            depth += 1
+        elif char == b")":
+            depth -= 1
+            if depth == 0:
+                return pos + 1
+        pos += 1
+    raise PDFSyntaxError("Unterminated string")
+
+
+def parse_object(data: bytes, pos: int = 0) -> tuple[PDFObject, int]:
+    """
+    Parses a single PDF object.
+    :param:
+        data: Buffer holding the object.
+        pos: Offset of the object in the buffer.
+    :return: The parsed object and the offset right after it.
+    :raises PDFSyntaxError: If the buffer does not hold a valid object.
+    """
+    pos = _skip_whitespace(data, pos)
+    if pos >= len(data):
+        raise PDFSyntaxError("Unexpected end of data")
+
+    if data.startswith(b"<<", pos):
+        result = {}
+        pos += 2
+        while True:
+            pos = _skip_whitespace(data, pos)
+            if data.startswith(b">>", pos):
+                return result, pos + 2
+            key, pos = parse_object(data, pos)
+            if not isinstance(key, Name):
+                raise PDFSyntaxError("Dictionary key is not a name")
+            result[key], pos = parse_object(data, pos)
+
+    char = data[pos : pos + 1]
+    if char == b"[":
+        result = []
+        pos += 1
+        while True:
+            pos = _skip_whitespace(data, pos)
+            if data.startswith(b"]", pos):
+                return result, pos + 1
+            item, pos = parse_object(data, pos)
+            result.append(item)
+    if char == b"/":
+        token, end = _read_regular(data, pos + 1)
+        return Name(token.decode("latin-1")), end
+    if char == b"(":
+        end = _read_literal_string(data, pos)
+        return Raw(data[pos:end]), end
+    if char == b"<":
+        end = data.index(b">", pos) + 1
+        return Raw(data[pos:end]), end
+
+    token, end = _read_regular(data, pos)
+    if not token:
+        raise PDFSyntaxError(f"Unexpected character at offset {pos}")
+    if re.fullmatch(rb"[+-]?\d+", token):
+        # an integer may start an indirect reference: "12 0 R"
+        match = re.compile(rb"\s+(\d+)\s+R(?![^\x00\t\n\x0c\r ()<>\[\]{}/%])").match(
+            data, end
+        )
+        if match:
+            return Ref(int(token), int(match.group(1))), match.end()
+        return int(token), end
+    return Raw(token), end
+
+
+def serialize(obj: PDFObject) -> bytes:
+    """
+    Serializes a PDF object parsed with parse_object.
+    """
+    if isinstance(obj, dict):
+        return (
+            b"<<"
+            + b"".join(serialize(Name(k)) + b" " + serialize(v) for k, v in obj.items())
+            + b">>"
+        )
+    if isinstance(obj, list):
+        return b"[" + b" ".join(serialize(item) for item in obj) + b"]"
+    if isinstance(obj, Name):
+        return b"/" + obj.encode("latin-1")
+    if isinstance(obj, Ref):
+        return b"%d %d R" % (obj.number, obj.generation)
+    if isinstance(obj, Raw):
+        return bytes(obj)
+    if isinstance(obj, bool):
+        return b"true" if obj else b"false"
+    if isinstance(obj, int):
+        return b"%d" % obj
+    raise TypeError(f"Cannot serialize {type(obj).__name__}")
+
+
+def _png_unpredict(data: bytes, columns: int) -> bytes:
+    row_size = columns + 1
+    previous = bytearray(columns)
+    output = bytearray()
+    for start in range(0, len(data), row_size):
+        filter_type, row = data[start], bytearray(data[start + 1 : start + row_size])
+        for i in range(len(row)):
+            left = row[i - 1] if i else 0
+            up = previous[i]
+            up_left = previous[i - 1] if i else 0
+            if filter_type == 1:
+                row[i] = (row[i] + left) & 0xFF
+            elif filter_type == 2:
+                row[i] = (row[i] + up) & 0xFF
+            elif filter_type == 3:
+                row[i] = (row[i] + (left + up) // 2) & 0xFF
+            elif filter_type == 4:
+                p = left + up - up_left
+                pa, pb, pc = abs(p - left), abs(p - up), abs(p - up_left)
+                predictor = (
+                    left if pa <= pb and pa <= pc else up if pb <= pc else up_left
+                )
+                row[i] = (row[i] + predictor) & 0xFF
+        output += row
+        previous = row
+    return bytes(output)
+
+
+class XrefEntry(NamedTuple):
+    """
+    Location of an object: at a file offset (in_stream is None) or inside an object stream.
+    """
+
+    offset: int
+    generation: int = 0
+    in_stream: Optional[int] = None
+
+
+class PDFStructure:
+    """
+    Reads the cross-reference sections, the trailer and single objects of a PDF file
+    without loading the document body. Supports classic cross-reference tables,
+    cross-reference streams and compressed object streams.
+    """
+
+    def __init__(self, f: BinaryIO):
+        self._f = f
+        f.seek(0, 2)
+        self.file_size = f.tell()
+        self.startxref = self._find_startxref()
+        self.uses_xref_stream = False
+        self.trailer: dict = {}
+        self._xref: dict[int, Optional[XrefEntry]] = {}
+        self._load_xref_chain()
+
+    def _read_at(self, offset: int, size: int) -> bytes:
+        self._f.seek(offset)
+        return self._f.read(size)
+
+    def _find_startxref(self) -> int:
+        tail_offset = max(0, self.file_size - TAIL_SIZE)
+        tail = self._read_at(tail_offset, TAIL_SIZE)
+        index = tail.rfind(b"startxref")
+        if index < 0:
+            raise PDFSyntaxError("startxref not found")
+        offset, _ = parse_object(tail, index + len(b"startxref"))
+        if not isinstance(offset, int):
+            raise PDFSyntaxError("Invalid startxref")
+        return offset
+
+    def _load_xref_chain(self) -> None:
+        offset: Optional[int] = self.startxref
+        visited = set()
+        first = True
+        while offset is not None and offset not in visited:
+            visited.add(offset)
+            data = self._read_at(offset, 4)
+            if data.startswith(b"xref"):
+                section_trailer = self._read_xref_table(offset)
+            else:
+                section_trailer = self._read_xref_stream(offset)
+                if first:
+                    self.uses_xref_stream = True
+            if first:
+                self.trailer = section_trailer
+                first = False
+            # entries of the hybrid-reference stream of a classic section
+            if isinstance(section_trailer.get("XRefStm"), int):
+                self._read_xref_stream(section_trailer["XRefStm"])
+            previous = section_trailer.get("Prev")
+            offset = previous if isinstance(previous, int) else None
+
+    def _read_xref_table(self, offset: int) -> dict:
+        data = self._read_at(offset, OBJECT_READ_SIZE)
+        pos = len(b"xref")
+        while True:
+            pos = _skip_whitespace(data, pos)
+            if data.startswith(b"trailer", pos):
+                trailer, _ = parse_object(data, pos + len(b"trailer"))
+                return trailer
+            header = re.compile(rb"(\d+)\s+(\d+)").match(data, pos)
+            if header is None:
+                raise PDFSyntaxError("Invalid cross-reference table")
+            first, count = int(header.group(1)), int(header.group(2))
+            pos = _skip_whitespace(data, header.end())
+            # every entry is exactly 20 bytes long
+            needed = pos + count * 20 + TAIL_SIZE
+            if needed > len(data):
+                data = self._read_at(offset, needed)
+            for i in range(count):
+                entry = data[pos + i * 20 : pos + i * 20 + 18].split()
+                number = first + i
+                if number in self._xref:
+                    continue
+                if entry[2] == b"n":
+                    self._xref[number] = XrefEntry(int(entry[0]), int(entry[1]))
+                else:
+                    self._xref[number] = None
+            pos += count * 20
+
+    def _read_xref_stream(self, offset: int) -> dict:
+        stream_dict, data = self._read_stream_object(offset)
+        widths = stream_dict["W"]
+        index = stream_dict.get("Index", [0, stream_dict["Size"]])
+        entry_size = sum(widths)
+
+        pos = 0
+        for first, count in zip(index[::2], index[1::2]):
+            for number in range(first, first + count):
+                fields = []
+                for width in widths:
+                    fields.append(int.from_bytes(data[pos : pos + width], "big"))
+                    pos += width
+                if widths[0] == 0:
+                    fields[0] = 1
+                if number in self._xref:
+                    continue
+                entry_type, field_2, field_3 = fields
+                if entry_type == 1:
+                    self._xref[number] = XrefEntry(field_2, field_3)
+                elif entry_type == 2:
+                    self._xref[number] = XrefEntry(field_3, 0, field_2)
+                else:
+                    self._xref[number] = None
+        if pos > len(data) or entry_size == 0:
+            raise PDFSyntaxError("Invalid cross-reference stream")
+        return stream_dict
+
+    def _parse_indirect_object(self, offset: int) -> tuple[PDFObject, bytes, int]:
+        data = self._read_at(offset, OBJECT_READ_SIZE)
+        header = re.compile(rb"\s*(\d+)\s+(\d+)\s+obj").match(data)
+        if header is None:
+            raise PDFSyntaxError(f"No object at offset {offset}")
+        while True:
+            try:
+                obj, end = parse_object(data, header.end())
+                return obj, data, end
+            except (PDFSyntaxError, ValueError):
+                if len(data) >= self.file_size - offset:
+                    raise
+                data = self._read_at(offset, len(data) * 4)
+
+    def _read_stream_object(self, offset: int) -> tuple[dict, bytes]:
+        stream_dict, data, end = self._parse_indirect_object(offset)
+        match = re.compile(rb"\s*stream(\r\n|\n|\r)").match(data, end)
+        if not isinstance(stream_dict, dict) or match is None:
+            raise PDFSyntaxError(f"No stream at offset {offset}")
+        length = stream_dict["Length"]
+        if isinstance(length, Ref):
+            length = self.read_object(length.number)
+        content = self._read_at(offset + match.end(), length)
+
+        filters = stream_dict.get("Filter", [])
+        filters = filters if isinstance(filters, list) else [filters]
+        for name in filters:
+            if name != "FlateDecode":
+                raise PDFSyntaxError(f"Unsupported stream filter: {name}")
+            content = zlib.decompress(content)
+        parameters = stream_dict.get("DecodeParms") or {}
+        if isinstance(parameters, dict) and parameters.get("Predictor", 1) >= 10:
+            content = _png_unpredict(content, parameters.get("Columns", 1))
+        return stream_dict, content
+
+    @property
+    def size(self) -> int:
+        """
+        The number of the next free object.
+        """
+        return max(self.trailer.get("Size", 0), max(self._xref, default=0) + 1)
+
+    def read_object(self, number: int) -> PDFObject:
+        """
+        Reads a single object by its number.
+        :param number: The object number.
+        :return: The parsed object.
+        :raises PDFSyntaxError: If the object does not exist or cannot be parsed.
+        """
+        entry = self._xref.get(number)
+        if entry is None:
+            raise PDFSyntaxError(f"Object {number} not found")
+        if entry.in_stream is None:
+            obj, _, _ = self._parse_indirect_object(entry.offset)
+            return obj
+
+        stream_offset = self._xref[entry.in_stream].offset
+        stream_dict, content = self._read_stream_object(stream_offset)
+        pos = 0
+        offsets = []
+        for _ in range(stream_dict["N"]):
+            object_number, pos = parse_object(content, pos)
+            object_offset, pos = parse_object(content, pos)
+            offsets.append((object_number, object_offset))
+        for object_number, object_offset in offsets:
+            if object_number == number:
+                obj, _ = parse_object(content, stream_dict["First"] + object_offset)
+                return obj
+        raise PDFSyntaxError(f"Object {number} not found in object stream")
+
+    def resolve(self, obj: PDFObject) -> PDFObject:
+        """
+        Returns the referenced object if obj is an indirect reference, otherwise obj itself.
+        """
+        if isinstance(obj, Ref):
+            return self.read_object(obj.number)
+        return obj
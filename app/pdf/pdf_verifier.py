@@ -1,41 +1,257 @@
 import os
+from typing import Optional
 
-from cryptography.exceptions import InvalidSignature
-from cryptography.hazmat.primitives.asymmetric import padding, rsa
-from cryptography.hazmat.primitives import hashes
+from .chunked_digest import (
+    find_corrupt_chunks,
+    merkle_root,
+    read_chunk_table,
+    signed_digest,
+)
+from .digest import ProgressCallback
+from .document_reader import DocumentReader
+from .signature_algorithms import VerifyingKey, algorithm_for_key
+from .signature_trailer import (
+    SignatureTrailer,
+    key_fingerprint,
+    read_sidecar,
+    sidecar_path,
+)
+from .verification_cache import VerificationCache, content_hash, partial_hash
 
+from ..instrumentation import metrics
+
+# size of a signature in the legacy format: raw RSA-4096 signature without a trailer
 SIGNATURE_SIZE_IN_BYTES = 512
 
 
 class PDFVerifier:
     """
     Verifies the signature of a PDF file using a public key.
+    The signed part of the file is hashed in chunks, so memory usage does not depend on the file size.
+    Files with a signature trailer made by a different key are rejected without hashing them.
+    Files without a trailer are verified in the legacy format, with a raw 512-byte signature at the end.
+    Files signed in the chunked mode are hashed in parallel and rejected at the first corrupt chunk.
+    The signature algorithm is chosen by the type of the key: RSA, ECDSA or Ed25519.
+    With a verification cache, a repeated check of an unchanged file costs a single stat call.
+    Detached signatures are read from sidecar files, see verify_detached.
+    The trailer and the signed content are read from a single open file, see DocumentReader.
     """
 
-    def __init__(self, public_key: rsa.RSAPublicKey):
+    def __init__(
+        self,
+        public_key: VerifyingKey,
+        cache: Optional[VerificationCache] = None,
+        mapped: bool = True,
+    ):
+        """
+        :param:
+            public_key: The public key.
+            cache: Optional cache of verification results.
+            mapped: Whether to memory-map files to hash them, see DocumentReader.
+        :raises ValueError: If the key type is not supported.
+        """
         self._public_key = public_key
+        self.algorithm = algorithm_for_key(public_key)
+        self._fingerprint = key_fingerprint(public_key)
+        self._cache = cache
+        self.mapped = mapped
 
-    def verify(self, pdf_file_path: str) -> bool:
+    def verify(
+        self, pdf_file_path: str, progress: Optional[ProgressCallback] = None
+    ) -> bool:
         """
         Verifies the signature of a PDF file.
-        :param pdf_file_path: The path to the PDF file.
+        :param:
+            pdf_file_path: The path to the PDF file.
+            progress: Optional callback reporting hashing progress, see sha256_file.
         :return: True if the signature is valid, False otherwise.
         """
-        size_in_bytes = os.path.getsize(pdf_file_path)
-        with open(pdf_file_path, "rb") as f:
-            pdf_content = f.read(size_in_bytes - SIGNATURE_SIZE_IN_BYTES)
-            signature = f.read()
-
-        try:
-            self._public_key.verify(
-                signature,
-                pdf_content,
-                padding.PSS(
-                    mgf=padding.MGF1(hashes.SHA256()),
-                    salt_length=padding.PSS.MAX_LENGTH,
-                ),
-                hashes.SHA256(),
-            )
-            return True
-        except InvalidSignature:
+        with metrics.span("pdf.verify") as span:
+            valid = self._verify(pdf_file_path, progress)
+            span.set(valid=valid)
+            return valid
+
+    def _verify(self, pdf_file_path: str, progress: Optional[ProgressCallback]) -> bool:
+        if self._cache is not None:
+            stat = os.stat(pdf_file_path)
+            valid = self._cache.lookup(pdf_file_path, self._fingerprint, stat)
+            metrics.count("pdf.verify_cache", result="miss" if valid is None else "hit")
+            if valid is not None:
+                return valid
+
+        with DocumentReader(pdf_file_path, self.mapped) as reader:
+            trailer = reader.trailer()
+            if trailer is not None and (
+                trailer.fingerprint != self._fingerprint
+                or trailer.algorithm != self.algorithm.algorithm_id
+            ):
+                return False
+            signed_content = self._read_signed_content(reader, trailer, progress)
+
+        if signed_content is None:
             return False
+
+        if self._cache is None:
+            return self.verify_digest(*signed_content)
+        return self._verify_cached(pdf_file_path, stat, signed_content)
+
+    def verify_detached(
+        self,
+        pdf_file_path: str,
+        sidecar_file_path: Optional[str] = None,
+        progress: Optional[ProgressCallback] = None,
+    ) -> bool:
+        """
+        Verifies a detached signature of a PDF file, stored in a sidecar file.
+        :param:
+            pdf_file_path: The path to the PDF file.
+            sidecar_file_path: The path to the sidecar file, the file path with
+                the .sig suffix by default.
+            progress: Optional callback reporting hashing progress, see sha256_file.
+        :return: True if the signature is valid, False otherwise, also if there is no sidecar.
+        """
+        if sidecar_file_path is None:
+            sidecar_file_path = sidecar_path(pdf_file_path)
+        with metrics.span("pdf.verify", mode="detached") as span:
+            valid = self._verify_detached(pdf_file_path, sidecar_file_path, progress)
+            span.set(valid=valid)
+            return valid
+
+    def _verify_detached(
+        self,
+        pdf_file_path: str,
+        sidecar_file_path: str,
+        progress: Optional[ProgressCallback],
+    ) -> bool:
+        with DocumentReader(pdf_file_path, self.mapped) as reader:
+            try:
+                trailer = read_sidecar(sidecar_file_path, reader.size)
+            except FileNotFoundError:
+                return False
+            if (
+                trailer is None
+                or trailer.fingerprint != self._fingerprint
+                or trailer.algorithm != self.algorithm.algorithm_id
+            ):
+                return False
+            digest = reader.sha256([(0, reader.size)], progress=progress)
+        return self.verify_digest(digest, trailer.signature)
+
+    def _verify_cached(
+        self,
+        pdf_file_path: str,
+        stat: os.stat_result,
+        signed_content: tuple[bytes, bytes],
+    ) -> bool:
+        """
+        Verifies the signed content unless a file with the same content is cached,
+        then stores the result if the file was not modified in the meantime.
+        """
+        partial = partial_hash(pdf_file_path, stat)
+        content = content_hash(*signed_content)
+        valid = self._cache.lookup_content(partial, self._fingerprint, content)
+        if valid is None:
+            valid = self.verify_digest(*signed_content)
+
+        current = os.stat(pdf_file_path)
+        if (current.st_size, current.st_mtime_ns, current.st_ino) == (
+            stat.st_size,
+            stat.st_mtime_ns,
+            stat.st_ino,
+        ):
+            self._cache.store(
+                pdf_file_path, self._fingerprint, stat, partial, content, valid
+            )
+        return valid
+
+    @staticmethod
+    def read_signed_content(
+        pdf_file_path: str, progress: Optional[ProgressCallback] = None
+    ) -> Optional[tuple[bytes, bytes]]:
+        """
+        Hashes the signed part of a PDF file and reads the signature appended to it.
+        :param:
+            pdf_file_path: The path to the PDF file.
+            progress: Optional callback reporting hashing progress, see sha256_file.
+        :return:
+            tuple - The SHA256 digest of the signed content and the signature, or
+            None - If the file is too short to contain a signature, or a chunk of
+                a file signed in the chunked mode does not match its digest.
+        """
+        with DocumentReader(pdf_file_path) as reader:
+            return PDFVerifier._read_signed_content(reader, reader.trailer(), progress)
+
+    @staticmethod
+    def _read_signed_content(
+        reader: DocumentReader,
+        trailer: Optional[SignatureTrailer],
+        progress: Optional[ProgressCallback],
+    ) -> Optional[tuple[bytes, bytes]]:
+        with metrics.span("pdf.read_signed_content"):
+            if trailer is not None and trailer.chunked:
+                return PDFVerifier._read_chunked_content(reader, trailer, progress)
+            if trailer is not None:
+                signed_length, signature = trailer.signed_length, trailer.signature
+            else:
+                signed_length = reader.size - SIGNATURE_SIZE_IN_BYTES
+                if signed_length < 0:
+                    return None
+                signature = bytes(reader.tail(SIGNATURE_SIZE_IN_BYTES))
+
+            digest = reader.sha256([(0, signed_length)], progress=progress)
+            return digest, signature
+
+    @staticmethod
+    def _read_chunked_content(
+        reader: DocumentReader,
+        trailer: SignatureTrailer,
+        progress: Optional[ProgressCallback] = None,
+    ) -> Optional[tuple[bytes, bytes]]:
+        chunk_table = read_chunk_table(reader, trailer)
+        if find_corrupt_chunks(reader, trailer, chunk_table, progress=progress):
+            return None
+        root = merkle_root(chunk_table)
+        digest = signed_digest(root, trailer.signed_length, trailer.chunk_size)
+        return digest, trailer.signature
+
+    def find_corrupt_ranges(
+        self, pdf_file_path: str, first_only: bool = False
+    ) -> Optional[list[tuple[int, int]]]:
+        """
+        Finds the corrupt byte ranges of a file signed in the chunked mode. The chunk table
+        is trusted only if its signature is valid.
+        :param:
+            pdf_file_path: The path to the PDF file.
+            first_only: Whether to stop at the first corrupt chunk.
+        :return:
+            list - (offset, length) pairs of the corrupt ranges, empty if the file is intact, or
+            None - If the file is not signed in the chunked mode by this key,
+                or its chunk table was tampered with.
+        """
+        with DocumentReader(pdf_file_path, self.mapped) as reader:
+            trailer = reader.trailer()
+            if (
+                trailer is None
+                or not trailer.chunked
+                or trailer.fingerprint != self._fingerprint
+                or trailer.algorithm != self.algorithm.algorithm_id
+            ):
+                return None
+
+            chunk_table = read_chunk_table(reader, trailer)
+            root = merkle_root(chunk_table)
+            digest = signed_digest(root, trailer.signed_length, trailer.chunk_size)
+            if not self.verify_digest(digest, trailer.signature):
+                return None
+            return find_corrupt_chunks(reader, trailer, chunk_table, first_only)
+
+    def verify_digest(self, digest: bytes, signature: bytes) -> bool:
+        """
+        Verifies a signature against an already computed SHA256 digest of the signed content.
+        :param:
+            digest: The SHA256 digest of the signed content.
+            signature: The signature to check.
+        :return: True if the signature is valid, False otherwise.
+        """
+        with metrics.span("pdf.verify_digest", algorithm=self.algorithm.name):
+            return self.algorithm.verify_digest(self._public_key, digest, signature)
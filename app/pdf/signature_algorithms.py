@@ -0,0 +1,161 @@
+from typing import Optional, Union
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, padding, rsa, utils
+
+from .signature_trailer import (
+    ALGORITHM_ECDSA_SHA256,
+    ALGORITHM_ED25519_SHA256,
+    ALGORITHM_RSA_PSS_SHA256,
+)
+
+SigningKey = Union[
+    rsa.RSAPrivateKey, ec.EllipticCurvePrivateKey, ed25519.Ed25519PrivateKey
+]
+VerifyingKey = Union[
+    rsa.RSAPublicKey, ec.EllipticCurvePublicKey, ed25519.Ed25519PublicKey
+]
+
+SUPPORTED_CURVES = (ec.SECP256R1, ec.SECP384R1)
+ED25519_KEY_SIZE = 256
+
+
+class SignatureAlgorithm:
+    """
+    Signs and verifies the SHA-256 digest of a document with one type of key.
+    Signatures have the natural size of the algorithm, they are not padded.
+    """
+
+    algorithm_id: int
+    name: str
+
+    def supports(self, key: Union[SigningKey, VerifyingKey]) -> bool:
+        raise NotImplementedError
+
+    def sign_digest(self, private_key: SigningKey, digest: bytes) -> bytes:
+        raise NotImplementedError
+
+    def verify_digest(
+        self, public_key: VerifyingKey, digest: bytes, signature: bytes
+    ) -> bool:
+        """
+        :return: True if the signature is valid, False otherwise.
+        """
+        try:
+            self._verify(public_key, digest, signature)
+            return True
+        except InvalidSignature:
+            return False
+
+    def _verify(self, public_key: VerifyingKey, digest: bytes, signature: bytes):
+        raise NotImplementedError
+
+    @staticmethod
+    def key_size(key: Union[SigningKey, VerifyingKey]) -> int:
+        """
+        :return: The key size in bits, as stored in the signature trailer.
+        """
+        if isinstance(key, (ed25519.Ed25519PrivateKey, ed25519.Ed25519PublicKey)):
+            return ED25519_KEY_SIZE
+        return key.key_size
+
+
+class RSAPSSAlgorithm(SignatureAlgorithm):
+    """
+    RSASSA-PSS with SHA-256 and the maximum salt length, for RSA keys of any size.
+    """
+
+    algorithm_id = ALGORITHM_RSA_PSS_SHA256
+    name = "rsa-pss-sha256"
+
+    _padding = padding.PSS(
+        mgf=padding.MGF1(hashes.SHA256()),
+        salt_length=padding.PSS.MAX_LENGTH,
+    )
+
+    def supports(self, key: Union[SigningKey, VerifyingKey]) -> bool:
+        return isinstance(key, (rsa.RSAPrivateKey, rsa.RSAPublicKey))
+
+    def sign_digest(self, private_key: rsa.RSAPrivateKey, digest: bytes) -> bytes:
+        return private_key.sign(digest, self._padding, utils.Prehashed(hashes.SHA256()))
+
+    def _verify(self, public_key: rsa.RSAPublicKey, digest: bytes, signature: bytes):
+        public_key.verify(
+            signature, digest, self._padding, utils.Prehashed(hashes.SHA256())
+        )
+
+
+class ECDSAAlgorithm(SignatureAlgorithm):
+    """
+    ECDSA over the SHA-256 digest on the P-256 or P-384 curve, DER encoded signature.
+    """
+
+    algorithm_id = ALGORITHM_ECDSA_SHA256
+    name = "ecdsa-sha256"
+
+    _signature_algorithm = ec.ECDSA(utils.Prehashed(hashes.SHA256()))
+
+    def supports(self, key: Union[SigningKey, VerifyingKey]) -> bool:
+        return isinstance(
+            key, (ec.EllipticCurvePrivateKey, ec.EllipticCurvePublicKey)
+        ) and isinstance(key.curve, SUPPORTED_CURVES)
+
+    def sign_digest(
+        self, private_key: ec.EllipticCurvePrivateKey, digest: bytes
+    ) -> bytes:
+        return private_key.sign(digest, self._signature_algorithm)
+
+    def _verify(
+        self, public_key: ec.EllipticCurvePublicKey, digest: bytes, signature: bytes
+    ):
+        public_key.verify(signature, digest, self._signature_algorithm)
+
+
+class Ed25519Algorithm(SignatureAlgorithm):
+    """
+    Ed25519 signature of the SHA-256 digest, which is signed as the message.
+    """
+
+    algorithm_id = ALGORITHM_ED25519_SHA256
+    name = "ed25519-sha256"
+
+    def supports(self, key: Union[SigningKey, VerifyingKey]) -> bool:
+        return isinstance(key, (ed25519.Ed25519PrivateKey, ed25519.Ed25519PublicKey))
+
+    def sign_digest(
+        self, private_key: ed25519.Ed25519PrivateKey, digest: bytes
+    ) -> bytes:
+        return private_key.sign(digest)
+
+    def _verify(
+        self, public_key: ed25519.Ed25519PublicKey, digest: bytes, signature: bytes
+    ):
+        public_key.verify(signature, digest)
+
+
+ALGORITHMS: dict[int, SignatureAlgorithm] = {
+    algorithm.algorithm_id: algorithm
+    for algorithm in (RSAPSSAlgorithm(), ECDSAAlgorithm(), Ed25519Algorithm())
+}
+
+
+def algorithm_for_key(key: Union[SigningKey, VerifyingKey]) -> SignatureAlgorithm:
+    """
+    Detects the signature algorithm from the type of a private or public key.
+    :param key: The key.
+    :return: The algorithm.
+    :raises ValueError: If the key type or curve is not supported.
+    """
+    for algorithm in ALGORITHMS.values():
+        if algorithm.supports(key):
+            return algorithm
+    raise ValueError(f"Unsupported key type: {type(key).__name__}")
+
+
+def algorithm_by_id(algorithm_id: int) -> Optional[SignatureAlgorithm]:
+    """
+    :param algorithm_id: Algorithm identifier stored in a signature trailer.
+    :return: The algorithm, or None if it is unknown.
+    """
+    return ALGORITHMS.get(algorithm_id)
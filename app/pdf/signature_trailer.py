@@ -0,0 +1,235 @@
+import os
+import struct
+from dataclasses import dataclass
+from hashlib import sha256
+from typing import BinaryIO, Optional
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.types import PublicKeyTypes
+
+# The trailer appended to a signed PDF file:
+#
+#   [ document (signed_length bytes) ][ signature ][ footer (FOOTER_SIZE bytes) ]
+#
+# The footer has a fixed size and ends with MAGIC, so it can be found with a single
+# seek from the end of the file, without any cryptographic operation.
+#
+# A chunked trailer (CHUNKED_VERSION) signs the Merkle root of per-chunk digests
+# instead of the digest of the whole document, see chunked_digest. The table of chunk
+# digests follows the document and the chunk size precedes the footer:
+#
+#   [ document ][ chunk digests (32 bytes each) ][ signature ][ chunk size ][ footer ]
+#
+# A detached signature is a trailer of a whole document stored in a sidecar file
+# next to it, so the document itself stays unchanged:
+#
+#   document.pdf       [ document ]
+#   document.pdf.sig   [ signature ][ footer ]
+MAGIC = b"%PADESIG"
+VERSION = 1
+CHUNKED_VERSION = 2
+FOOTER_FORMAT = ">BBH32sQH8s"
+FOOTER_SIZE = struct.calcsize(FOOTER_FORMAT)
+CHUNK_SIZE_FORMAT = ">I"
+CHUNK_SIZE_SIZE = struct.calcsize(CHUNK_SIZE_FORMAT)
+CHUNK_DIGEST_SIZE = 32
+MAX_SIGNATURE_SIZE = 1024
+SIDECAR_SUFFIX = ".sig"
+# the most bytes a trailer can take at the end of a file, not counting a chunk table
+TAIL_SIZE = FOOTER_SIZE + MAX_SIGNATURE_SIZE + CHUNK_SIZE_SIZE
+
+# algorithm identifiers, see signature_algorithms
+ALGORITHM_RSA_PSS_SHA256 = 1
+ALGORITHM_ECDSA_SHA256 = 2
+ALGORITHM_ED25519_SHA256 = 3
+
+
+class AlreadySignedError(ValueError):
+    """
+    Raised when signing a file that already ends with a signature trailer.
+    """
+
+
+def key_fingerprint(public_key: PublicKeyTypes) -> bytes:
+    """
+    Computes the fingerprint of a public key: SHA-256 of its DER encoded SubjectPublicKeyInfo.
+    :param public_key: The public key.
+    :return: The 32 bytes long fingerprint.
+    """
+    return sha256(
+        public_key.public_bytes(
+            encoding=serialization.Encoding.DER,
+            format=serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+    ).digest()
+
+
+@dataclass(frozen=True)
+class SignatureTrailer:
+    """
+    Self-describing signature stored at the end of a signed PDF file.
+    """
+
+    algorithm: int
+    key_size: int
+    fingerprint: bytes
+    signed_length: int
+    signature: bytes
+    version: int = VERSION
+    chunk_size: int = 0
+
+    @property
+    def chunked(self) -> bool:
+        return self.version == CHUNKED_VERSION
+
+    @property
+    def chunk_count(self) -> int:
+        if not self.chunked:
+            return 0
+        return -(-self.signed_length // self.chunk_size)
+
+    @property
+    def table_size(self) -> int:
+        """
+        :return: Size of the chunk digest table following the document, in bytes.
+        """
+        return self.chunk_count * CHUNK_DIGEST_SIZE
+
+    def to_bytes(self) -> bytes:
+        """
+        :return: The signature followed by the fixed-size footer. The chunk digest table
+            of a chunked trailer is not included, it has to be written before these bytes.
+        """
+        chunk_size = b""
+        if self.chunked:
+            chunk_size = struct.pack(CHUNK_SIZE_FORMAT, self.chunk_size)
+        footer = struct.pack(
+            FOOTER_FORMAT,
+            self.version,
+            self.algorithm,
+            self.key_size,
+            self.fingerprint,
+            self.signed_length,
+            len(self.signature),
+            MAGIC,
+        )
+        return self.signature + chunk_size + footer
+
+    @property
+    def size(self) -> int:
+        """
+        :return: Number of bytes following the signed document, including the chunk table.
+        """
+        extra = CHUNK_SIZE_SIZE if self.chunked else 0
+        return self.table_size + len(self.signature) + extra + FOOTER_SIZE
+
+    @classmethod
+    def from_file(cls, f: BinaryIO) -> Optional["SignatureTrailer"]:
+        """
+        Reads the trailer from the end of an open file with a single seek.
+        :param f: The file opened in binary mode.
+        :return:
+            SignatureTrailer - The trailer, or
+            None - If the file does not end with a valid trailer.
+        """
+        file_size = os.fstat(f.fileno()).st_size
+        tail_size = min(file_size, TAIL_SIZE)
+        f.seek(file_size - tail_size)
+        return cls.from_tail(f.read(tail_size), file_size)
+
+    @classmethod
+    def from_tail(cls, tail: bytes, file_size: int) -> Optional["SignatureTrailer"]:
+        """
+        Parses the trailer from the last bytes of a file.
+        :param:
+            tail: The last TAIL_SIZE bytes of the file, or the whole file if it is shorter.
+            file_size: The size of the whole file.
+        :return: The trailer, or None if the file does not end with a valid trailer.
+        """
+        if len(tail) < FOOTER_SIZE:
+            return None
+
+        (
+            version,
+            algorithm,
+            key_size,
+            fingerprint,
+            signed_length,
+            signature_length,
+            magic,
+        ) = struct.unpack(FOOTER_FORMAT, tail[-FOOTER_SIZE:])
+        if magic != MAGIC or version not in (VERSION, CHUNKED_VERSION):
+            return None
+
+        chunk_size = 0
+        end = len(tail) - FOOTER_SIZE
+        if version == CHUNKED_VERSION:
+            if end < CHUNK_SIZE_SIZE:
+                return None
+            (chunk_size,) = struct.unpack(
+                CHUNK_SIZE_FORMAT, tail[end - CHUNK_SIZE_SIZE : end]
+            )
+            if chunk_size == 0:
+                return None
+            end -= CHUNK_SIZE_SIZE
+        if signature_length > MAX_SIGNATURE_SIZE or signature_length > end:
+            return None
+
+        trailer = cls(
+            algorithm,
+            key_size,
+            fingerprint,
+            signed_length,
+            tail[end - signature_length : end],
+            version,
+            chunk_size,
+        )
+        if signed_length + trailer.size != file_size:
+            return None
+        return trailer
+
+    @classmethod
+    def read(cls, pdf_file_path: str) -> Optional["SignatureTrailer"]:
+        """
+        Reads the trailer of a PDF file.
+        :param pdf_file_path: The path to the PDF file.
+        :return: The trailer, or None if the file is not signed in this format.
+        """
+        with open(pdf_file_path, "rb") as f:
+            return cls.from_file(f)
+
+
+def sidecar_path(pdf_file_path: str) -> str:
+    """
+    :return: The path of the detached signature of a file.
+    """
+    return pdf_file_path + SIDECAR_SUFFIX
+
+
+def read_sidecar(
+    sidecar_file_path: str, document_size: int
+) -> Optional[SignatureTrailer]:
+    """
+    Reads a detached signature.
+    :param:
+        sidecar_file_path: The path to the sidecar file.
+        document_size: Size of the signed document, it must match the signed length.
+    :return: The trailer, or None if the sidecar is not a detached signature
+        of a document of this size.
+    """
+    with open(sidecar_file_path, "rb") as f:
+        data = f.read(TAIL_SIZE + 1)
+    if len(data) > TAIL_SIZE:
+        return None
+    trailer = SignatureTrailer.from_tail(data, document_size + len(data))
+    if trailer is None or trailer.chunked:
+        return None
+    return trailer
+
+
+def is_signed(pdf_file_path: str) -> bool:
+    """
+    Checks whether a PDF file ends with a signature trailer, without verifying it.
+    :param pdf_file_path: The path to the PDF file.
+    """
+    return SignatureTrailer.read(pdf_file_path) is not None
@@ -0,0 +1,194 @@
+import os
+import sqlite3
+import threading
+import time
+from hashlib import sha256
+from typing import Optional
+
+# bytes hashed at each end of the file for the partial hash
+PARTIAL_HASH_SIZE = 64 * 1024
+DEFAULT_MAX_ENTRIES = 100_000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS verifications (
+    path TEXT NOT NULL,
+    fingerprint BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    device INTEGER NOT NULL,
+    partial_hash BLOB NOT NULL,
+    content_hash BLOB NOT NULL,
+    valid INTEGER NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (path, fingerprint)
+);
+CREATE INDEX IF NOT EXISTS verifications_partial_hash
+    ON verifications (partial_hash, fingerprint);
+CREATE INDEX IF NOT EXISTS verifications_last_used ON verifications (last_used);
+"""
+
+
+def partial_hash(pdf_file_path: str, stat: os.stat_result) -> bytes:
+    """
+    Hashes the size, the beginning and the end of a file. Cheap to compute and used
+    to find cached results of a file that was copied, moved or touched.
+    :param:
+        pdf_file_path: The path to the file.
+        stat: The stat result of the file.
+    :return: The SHA256 digest.
+    """
+    hash_sha256 = sha256(stat.st_size.to_bytes(8, "big"))
+    with open(pdf_file_path, "rb") as f:
+        hash_sha256.update(f.read(PARTIAL_HASH_SIZE))
+        if stat.st_size > PARTIAL_HASH_SIZE:
+            f.seek(max(PARTIAL_HASH_SIZE, stat.st_size - PARTIAL_HASH_SIZE))
+            hash_sha256.update(f.read(PARTIAL_HASH_SIZE))
+    return hash_sha256.digest()
+
+
+def content_hash(digest: bytes, signature: bytes) -> bytes:
+    """
+    Identifies the signed content: the digest of the signed part and the signature.
+    """
+    return sha256(digest + signature).digest()
+
+
+class VerificationCache:
+    """
+    Persistent cache of signature verification results stored in SQLite.
+    An entry is found in two steps:
+        1. by path and key fingerprint, accepted if size, mtime, inode and device are unchanged,
+           which costs a single stat call,
+        2. by partial hash and key fingerprint, accepted if the content hash matches,
+           which saves the public key operation for copied or touched files.
+    Least recently used entries are evicted once the cache holds more than max_entries.
+    The cache can be shared between threads.
+    """
+
+    def __init__(
+        self, database_path: str = ":memory:", max_entries: int = DEFAULT_MAX_ENTRIES
+    ):
+        """
+        :param:
+            database_path: The SQLite database file, kept in memory by default.
+            max_entries: Maximum number of cached results.
+        """
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            database_path, check_same_thread=False, isolation_level=None
+        )
+        if database_path != ":memory:":
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+
+    def lookup(
+        self, pdf_file_path: str, fingerprint: bytes, stat: os.stat_result
+    ) -> Optional[bool]:
+        """
+        Looks up the result for an unchanged file.
+        :param:
+            pdf_file_path: The path to the PDF file.
+            fingerprint: Fingerprint of the public key.
+            stat: The current stat result of the file.
+        :return: The cached result, or None if the file is not cached or has changed.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT size, mtime_ns, inode, device, valid FROM verifications "
+                "WHERE path = ? AND fingerprint = ?",
+                (os.path.abspath(pdf_file_path), fingerprint),
+            ).fetchone()
+            if row is None or row[:4] != self._stat_key(stat):
+                return None
+            self._touch(pdf_file_path, fingerprint)
+        return bool(row[4])
+
+    def lookup_content(
+        self, partial: bytes, fingerprint: bytes, content: bytes
+    ) -> Optional[bool]:
+        """
+        Looks up the result for a file with the same content as a cached one.
+        :param:
+            partial: The partial hash of the file, see partial_hash.
+            fingerprint: Fingerprint of the public key.
+            content: The content hash of the file, see content_hash.
+        :return: The cached result, or None if no file with this content is cached.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT valid FROM verifications "
+                "WHERE partial_hash = ? AND fingerprint = ? AND content_hash = ? "
+                "LIMIT 1",
+                (partial, fingerprint, content),
+            ).fetchone()
+        return None if row is None else bool(row[0])
+
+    def store(
+        self,
+        pdf_file_path: str,
+        fingerprint: bytes,
+        stat: os.stat_result,
+        partial: bytes,
+        content: bytes,
+        valid: bool,
+    ) -> None:
+        """
+        Stores a verification result and evicts the least recently used entries
+        if the cache is full.
+        :param:
+            pdf_file_path: The path to the PDF file.
+            fingerprint: Fingerprint of the public key.
+            stat: The stat result of the file taken before it was read.
+            partial: The partial hash of the file.
+            content: The content hash of the file.
+            valid: The verification result.
+        """
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO verifications VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    os.path.abspath(pdf_file_path),
+                    fingerprint,
+                    *self._stat_key(stat),
+                    partial,
+                    content,
+                    int(valid),
+                    time.time(),
+                ),
+            )
+            (entries,) = self._connection.execute(
+                "SELECT COUNT(*) FROM verifications"
+            ).fetchone()
+            if entries > self.max_entries:
+                self._connection.execute(
+                    "DELETE FROM verifications WHERE rowid IN "
+                    "(SELECT rowid FROM verifications ORDER BY last_used LIMIT ?)",
+                    (entries - self.max_entries,),
+                )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connection.execute("DELETE FROM verifications")
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute(
+                "SELECT COUNT(*) FROM verifications"
+            ).fetchone()[0]
+
+    def _touch(self, pdf_file_path: str, fingerprint: bytes) -> None:
+        self._connection.execute(
+            "UPDATE verifications SET last_used = ? WHERE path = ? AND fingerprint = ?",
+            (time.time(), os.path.abspath(pdf_file_path), fingerprint),
+        )
+
+    @staticmethod
+    def _stat_key(stat: os.stat_result) -> tuple[int, int, int, int]:
+        return stat.st_size, stat.st_mtime_ns, stat.st_ino, stat.st_dev
@@ -1,3 +1,12 @@
+from .key_index import KeyFileInfo, KeyIndex
 from .pendrive_detector import PenDriveFinder
+from .pendrive_monitor import FakeEventSource, FakeMountTable, PenDriveMonitor
 
-__all__ = ["PenDriveFinder"]
+__all__ = [
+    "PenDriveFinder",
+    "PenDriveMonitor",
+    "FakeEventSource",
+    "FakeMountTable",
+    "KeyIndex",
+    "KeyFileInfo",
+]
@@ -0,0 +1,211 @@
+import base64
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+from hashlib import sha256
+from typing import Optional
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from ..instrumentation import metrics
+from ..pdf.signature_trailer import key_fingerprint
+
+DEFAULT_MAX_DEPTH = 2
+DEFAULT_TIME_BUDGET = 0.5
+MAX_KEY_FILE_SIZE = 64 * 1024
+
+_STANDARD_RSA_KEY_SIZES = (1024, 2048, 3072, 4096, 8192)
+
+
+@dataclass(frozen=True)
+class KeyFileInfo:
+    """
+    Description of a *.pem file found on a pen drive.
+    key_size is exact for public keys and estimated from the encoded length
+    for private keys, which cannot be parsed without the PIN.
+    fingerprint is the SHA-256 fingerprint of a public key, the same as in signature
+    trailers, see key_fingerprint; it is None for private keys, which are told apart
+    by file_digest, the SHA-256 digest of the file.
+    """
+
+    path: str
+    kind: str
+    encrypted: bool
+    key_size: Optional[int]
+    fingerprint: Optional[str]
+    file_digest: str
+    depth: int
+
+    @property
+    def is_private(self) -> bool:
+        return self.kind == "private"
+
+
+def _estimate_rsa_key_size(der_length: int, kind: str) -> Optional[int]:
+    # An RSA private key holds about 4.5 times the modulus size (n, d, p, q, dp, dq, qinv),
+    # a public key about the modulus size only. Shorter keys are elliptic curve keys.
+    if der_length < 256:
+        return None
+    factor = 4.5 if kind == "private" else 1.0
+    modulus_bits = der_length / factor * 8
+    return min(_STANDARD_RSA_KEY_SIZES, key=lambda size: abs(size - modulus_bits))
+
+
+def classify_pem(path: str, depth: int = 0) -> Optional[KeyFileInfo]:
+    """
+    Classifies a PEM file by its armor header, without decrypting private keys.
+    The whole file is read, up to MAX_KEY_FILE_SIZE bytes: the key size of a private key
+    is estimated from the length of its body, and public keys are parsed for their
+    fingerprint.
+    :param:
+        path: The path to the PEM file.
+        depth: Directory depth of the file below the scanned mount point.
+    :return:
+        KeyFileInfo - Description of the key, or
+        None - If the file is not a PEM key or is too large to be one, or a public key
+            cannot be parsed.
+    """
+    with open(path, "rb") as f:
+        content = f.read(MAX_KEY_FILE_SIZE + 1)
+    if len(content) > MAX_KEY_FILE_SIZE:
+        return None
+
+    lines = content.decode("ascii", errors="replace").splitlines()
+    begin = next((line for line in lines if line.startswith("-----BEGIN ")), None)
+    if begin is None:
+        return None
+    label = begin[len("-----BEGIN ") :].rstrip("-")
+
+    if label.endswith("PUBLIC KEY"):
+        kind = "public"
+    elif label.endswith("PRIVATE KEY"):
+        kind = "private"
+    else:
+        return None
+    encrypted = label.startswith("ENCRYPTED ") or any(
+        line.startswith("Proc-Type:") and "ENCRYPTED" in line for line in lines
+    )
+
+    body = "".join(
+        line
+        for line in lines
+        if line and not line.startswith("-----") and ":" not in line
+    )
+    fingerprint = None
+    if kind == "public":
+        try:
+            public_key = serialization.load_pem_public_key(content)
+        except (ValueError, TypeError):
+            return None
+        fingerprint = key_fingerprint(public_key).hex()
+        key_size = (
+            public_key.key_size if isinstance(public_key, rsa.RSAPublicKey) else None
+        )
+    else:
+        try:
+            der_length = len(base64.b64decode(body))
+        except ValueError:
+            return None
+        key_size = (
+            _estimate_rsa_key_size(der_length, kind) if "EC " not in label else None
+        )
+
+    return KeyFileInfo(
+        path=path,
+        kind=kind,
+        encrypted=encrypted,
+        key_size=key_size,
+        fingerprint=fingerprint,
+        file_digest=sha256(content).hexdigest(),
+        depth=depth,
+    )
+
+
+class KeyIndex:
+    """
+    Index of the PEM keys stored on each mounted pen drive.
+    Each mount point is scanned once, within a depth and time budget, and the
+    results are kept until the mount point changes or is forgotten.
+    """
+
+    def __init__(
+        self,
+        max_depth: int = DEFAULT_MAX_DEPTH,
+        time_budget: float = DEFAULT_TIME_BUDGET,
+    ):
+        """
+        :param:
+            max_depth: How many directory levels below the mount point are scanned.
+            time_budget: Maximum time of scanning a single mount point in seconds.
+        """
+        self.max_depth = max_depth
+        self.time_budget = time_budget
+        self._entries: dict[str, tuple[tuple[int, int], list[KeyFileInfo]]] = {}
+
+    @staticmethod
+    def _mount_identity(mount_point: str) -> tuple[int, int]:
+        stat = os.stat(mount_point)
+        return stat.st_dev, stat.st_ino
+
+    def keys(self, mount_point: str) -> list[KeyFileInfo]:
+        """
+        Returns all keys stored on the pen drive, scanning it only if it is not indexed yet.
+        :param mount_point: The mount point of the pen drive.
+        :return: Keys ordered by directory depth and path.
+        """
+        identity = self._mount_identity(mount_point)
+        cached = self._entries.get(mount_point)
+        if cached is not None and cached[0] == identity:
+            metrics.count("pendrive.index", result="hit")
+            return cached[1]
+
+        metrics.count("pendrive.index", result="miss")
+        with metrics.span("pendrive.scan"):
+            keys = self._scan(mount_point)
+        metrics.count("pendrive.keys_found", len(keys))
+        self._entries[mount_point] = (identity, keys)
+        return keys
+
+    def private_keys(self, mount_point: str) -> list[KeyFileInfo]:
+        return [key for key in self.keys(mount_point) if key.is_private]
+
+    def forget(self, mount_point: str) -> None:
+        self._entries.pop(mount_point, None)
+
+    def retain(self, mount_points: list[str]) -> None:
+        """
+        Forgets all mount points that are not in the given list.
+        :param mount_points: Currently mounted pen drives.
+        """
+        for mount_point in list(self._entries):
+            if mount_point not in mount_points:
+                del self._entries[mount_point]
+
+    def _scan(self, mount_point: str) -> list[KeyFileInfo]:
+        deadline = time.monotonic() + self.time_budget
+        keys = []
+        directories = deque([(mount_point, 0)])
+
+        while directories and time.monotonic() < deadline:
+            directory, depth = directories.popleft()
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.name.startswith("."):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    if depth < self.max_depth:
+                        directories.append((entry.path, depth + 1))
+                elif entry.name.endswith(".pem") and entry.is_file():
+                    try:
+                        key = classify_pem(entry.path, depth)
+                    except OSError:
+                        continue
+                    if key is not None:
+                        keys.append(key)
+
+        return sorted(keys, key=lambda key: (key.depth, key.path))
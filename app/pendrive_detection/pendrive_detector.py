@@ -1,7 +1,10 @@
-import os
 import sys
 from typing import Optional
 
+from .key_index import KeyIndex
+
+from ..instrumentation import metrics
+
 if sys.platform == "linux":
     import pyudev
     import psutil
@@ -18,6 +21,7 @@ class PenDriveFinder:
 
     def __init__(self):
         self._wmi_client = None
+        self.key_index = KeyIndex()
 
     def find_all_pen_drives(self) -> list[str]:
         """
@@ -27,13 +31,14 @@ class PenDriveFinder:
             list - A list of detected pen drive mount points (partitions or whole drives).
             An empty list is returned if no pen drives are detected.
         """
-        if sys.platform == "linux":
-            return self.__find_all_pen_drives_linux()
-        elif sys.platform == "win32":
-            return self.__find_all_pen_drives_win()
-        elif sys.platform == "darwin":
-            pass  # TODO implement macos function
-        return []
+        with metrics.span("pendrive.find_all", platform=sys.platform):
+            if sys.platform == "linux":
+                return self.__find_all_pen_drives_linux()
+            elif sys.platform == "win32":
+                return self.__find_all_pen_drives_win()
+            elif sys.platform == "darwin":
+                pass  # TODO implement macos function
+            return []
 
     @staticmethod
     def __find_all_pen_drives_linux() -> list[str]:
@@ -85,31 +90,36 @@ class PenDriveFinder:
 
         return pen_drives
 
-    @staticmethod
-    def find_pen_drive_with_private_key(pen_drives: list[str]) -> Optional[str]:
+    def find_pen_drive_with_private_key(self, pen_drives: list[str]) -> Optional[str]:
         """
         Scans all connected and mounted drives to detect a pen drive containing a private key (*.pem) file.
+        Every pen drive is scanned only once, the results are kept in the key index.
         :param:
             pen_drives: list - A list of detected pen drive mount points (partitions or whole drives).
         :return:
             str - Mount point of the partition containing the `.pem` private key file, or
             None - If no partition with a `.pem` file is found.
         """
+        self.key_index.retain(pen_drives)
         for pen_drive in pen_drives:
-            for entry in os.scandir(pen_drive):
-                if entry.name.endswith(".pem") and entry.is_file():
-                    return pen_drive
+            if self.key_index.private_keys(pen_drive):
+                return pen_drive
         return None
 
-    @staticmethod
-    def get_private_key_path(pen_drive_path: str) -> Optional[str]:
+    def get_private_key_path(
+        self, pen_drive_path: str, file_digest: Optional[str] = None
+    ) -> Optional[str]:
         """
         Searches the specified pen drive (mount point) for a private key (*.pem) file.
-        :param pen_drive_path: str - The mount point of the pen drive to scan.
+        :param:
+            pen_drive_path: str - The mount point of the pen drive to scan.
+            file_digest: str - SHA-256 digest of the preferred key file if the drive holds several keys.
         :return:
             str - Full path to the `.pem` private key file if found, or
             None - If no `.pem` file is found on the provided pen drive path.
         """
-        for entry in os.scandir(pen_drive_path):
-            if entry.name.endswith(".pem") and entry.is_file():
-                return entry.path
+        private_keys = self.key_index.private_keys(pen_drive_path)
+        for key in private_keys:
+            if file_digest is None or key.file_digest == file_digest:
+                return key.path
+        return private_keys[0].path if private_keys else None
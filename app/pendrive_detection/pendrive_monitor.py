@@ -0,0 +1,255 @@
+import logging
+import os
+import select
+import sys
+from dataclasses import dataclass
+from typing import Optional, Protocol
+
+if sys.platform == "linux":
+    import pyudev
+    import psutil
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class DeviceEvent:
+    """
+    A block device was plugged in ("add") or unplugged ("remove").
+    """
+
+    action: str
+    device_node: str
+    removable: bool = False
+
+
+class DeviceEventSource(Protocol):
+    """
+    A source of block device events. fileno() becomes readable when events are pending.
+    """
+
+    def fileno(self) -> int: ...
+
+    def list_removable_devices(self) -> list[str]: ...
+
+    def read_events(self) -> list[DeviceEvent]: ...
+
+
+class MountTable(Protocol):
+    """
+    The table of mounted filesystems. fileno() signals a change whenever something is
+    mounted or unmounted: as an exceptional condition (POLLPRI) if `exceptional` is True,
+    otherwise by becoming readable.
+    """
+
+    exceptional: bool
+
+    def fileno(self) -> int: ...
+
+    def read_mounts(self) -> dict[str, str]: ...
+
+
+class UdevEventSource:
+    """
+    Block device events received from udev through a netlink socket.
+    """
+
+    def __init__(self):
+        self._context = pyudev.Context()
+        self._monitor = pyudev.Monitor.from_netlink(self._context)
+        self._monitor.filter_by(subsystem="block")
+        self._monitor.start()
+
+    def fileno(self) -> int:
+        return self._monitor.fileno()
+
+    @staticmethod
+    def _is_removable(device: "pyudev.Device") -> bool:
+        disk = device if device.device_type == "disk" else device.find_parent("block")
+        if disk is None:
+            return False
+        return disk.attributes.get("removable") == b"1"
+
+    def list_removable_devices(self) -> list[str]:
+        """
+        Enumerates removable disks and their partitions that are already connected.
+        """
+        return [
+            device.device_node
+            for device in self._context.list_devices(subsystem="block")
+            if device.device_node and self._is_removable(device)
+        ]
+
+    def read_events(self) -> list[DeviceEvent]:
+        """
+        Returns all pending events without blocking.
+        """
+        events = []
+        while (device := self._monitor.poll(timeout=0)) is not None:
+            if not device.device_node or device.action not in ("add", "remove"):
+                continue
+            removable = device.action == "add" and self._is_removable(device)
+            events.append(DeviceEvent(device.action, device.device_node, removable))
+        return events
+
+
+class ProcMountTable:
+    """
+    Mounted filesystems read from /proc/self/mountinfo.
+    """
+
+    exceptional = True
+
+    def __init__(self):
+        self._mountinfo = open("/proc/self/mountinfo", "rb")
+
+    def fileno(self) -> int:
+        return self._mountinfo.fileno()
+
+    def read_mounts(self) -> dict[str, str]:
+        # reading the file also acknowledges the pending mount change
+        self._mountinfo.seek(0)
+        self._mountinfo.read()
+        return {p.device: p.mountpoint for p in psutil.disk_partitions()}
+
+
+class FakeEventSource:
+    """
+    An in-memory DeviceEventSource for testing without real hardware.
+    Emitted events make fileno() readable, like a udev socket.
+    """
+
+    def __init__(self, removable_devices: Optional[list[str]] = None):
+        self._removable_devices = list(removable_devices or [])
+        self._events: list[DeviceEvent] = []
+        self._read_fd, self._write_fd = os.pipe()
+        os.set_blocking(self._read_fd, False)
+
+    def fileno(self) -> int:
+        return self._read_fd
+
+    def emit(self, action: str, device_node: str, removable: bool = True) -> None:
+        self._events.append(DeviceEvent(action, device_node, removable))
+        os.write(self._write_fd, b"\0")
+
+    def list_removable_devices(self) -> list[str]:
+        return list(self._removable_devices)
+
+    def read_events(self) -> list[DeviceEvent]:
+        try:
+            os.read(self._read_fd, 4096)
+        except BlockingIOError:
+            pass
+        events, self._events = self._events, []
+        return events
+
+
+class FakeMountTable:
+    """
+    An in-memory MountTable for testing without real hardware.
+    """
+
+    exceptional = False
+
+    def __init__(self, mounts: Optional[dict[str, str]] = None):
+        self._mounts = dict(mounts or {})
+        self._read_fd, self._write_fd = os.pipe()
+        os.set_blocking(self._read_fd, False)
+
+    def fileno(self) -> int:
+        return self._read_fd
+
+    def set_mounts(self, mounts: dict[str, str]) -> None:
+        self._mounts = dict(mounts)
+        os.write(self._write_fd, b"\0")
+
+    def read_mounts(self) -> dict[str, str]:
+        try:
+            os.read(self._read_fd, 4096)
+        except BlockingIOError:
+            pass
+        return dict(self._mounts)
+
+
+class PenDriveMonitor:
+    """
+    Keeps an incremental cache of mounted pen drives, updated only when
+    a device event or a mount table change arrives.
+    Nothing is scanned while the system is idle.
+    """
+
+    def __init__(self, event_source: DeviceEventSource, mount_table: MountTable):
+        self.event_source = event_source
+        self.mount_table = mount_table
+        self._removable_devices = set(event_source.list_removable_devices())
+        self._mounts = mount_table.read_mounts()
+
+    @classmethod
+    def for_current_system(cls) -> Optional["PenDriveMonitor"]:
+        """
+        Creates a monitor backed by udev and /proc/self/mountinfo.
+        :return: The monitor, or None if event-driven detection is not supported on this
+            system or not available to the process, e.g. in a container or a sandbox.
+        """
+        if sys.platform != "linux":
+            return None
+        try:
+            return cls(UdevEventSource(), ProcMountTable())
+        except (OSError, ImportError) as e:
+            # ImportError is raised by pyudev if libudev cannot be loaded
+            logger.warning(f"Pen drive events are not available, polling instead: {e}")
+            return None
+
+    @property
+    def pen_drives(self) -> list[str]:
+        """
+        :return: Mount points of all mounted pen drives (partitions or whole drives).
+        """
+        return sorted(
+            mount_point
+            for device_node, mount_point in self._mounts.items()
+            if device_node in self._removable_devices
+        )
+
+    def process_device_events(self) -> bool:
+        """
+        Applies pending device events to the cache.
+        :return: True if the list of pen drives has changed.
+        """
+        before = self.pen_drives
+        for event in self.event_source.read_events():
+            if event.action == "add" and event.removable:
+                self._removable_devices.add(event.device_node)
+            elif event.action == "remove":
+                self._removable_devices.discard(event.device_node)
+                self._mounts.pop(event.device_node, None)
+        return self.pen_drives != before
+
+    def process_mount_change(self) -> bool:
+        """
+        Re-reads the mount table after it has changed.
+        :return: True if the list of pen drives has changed.
+        """
+        before = self.pen_drives
+        self._mounts = self.mount_table.read_mounts()
+        return self.pen_drives != before
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Blocks until a device event or a mount change arrives, or the timeout expires,
+        and applies it. Useful without a Qt event loop.
+        :param timeout: Maximum time to wait in seconds, no limit if None.
+        :return: True if the list of pen drives has changed.
+        """
+        mount_events = select.POLLPRI if self.mount_table.exceptional else select.POLLIN
+        poller = select.poll()
+        poller.register(self.event_source.fileno(), select.POLLIN)
+        poller.register(self.mount_table.fileno(), mount_events)
+        ready = dict(poller.poll(None if timeout is None else timeout * 1000))
+
+        changed = False
+        if ready.get(self.event_source.fileno(), 0) & select.POLLIN:
+            changed |= self.process_device_events()
+        if ready.get(self.mount_table.fileno(), 0) & mount_events:
+            changed |= self.process_mount_change()
+        return changed
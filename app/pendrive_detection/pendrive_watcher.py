@@ -0,0 +1,43 @@
+from PyQt6.QtCore import QObject, QSocketNotifier, pyqtSignal
+
+from .pendrive_monitor import PenDriveMonitor
+
+
+class PenDriveWatcher(QObject):
+    """
+    Feeds a PenDriveMonitor from the Qt event loop through socket notifiers
+    and emits the list of pen drives whenever it changes.
+    """
+
+    pen_drives_changed = pyqtSignal(list)
+
+    def __init__(self, monitor: PenDriveMonitor, parent: QObject = None):
+        super().__init__(parent)
+        self.monitor = monitor
+
+        self._device_notifier = QSocketNotifier(
+            monitor.event_source.fileno(), QSocketNotifier.Type.Read, self
+        )
+        self._device_notifier.activated.connect(self._on_device_event)
+
+        mount_notifier_type = (
+            QSocketNotifier.Type.Exception
+            if monitor.mount_table.exceptional
+            else QSocketNotifier.Type.Read
+        )
+        self._mount_notifier = QSocketNotifier(
+            monitor.mount_table.fileno(), mount_notifier_type, self
+        )
+        self._mount_notifier.activated.connect(self._on_mount_change)
+
+    @property
+    def pen_drives(self) -> list[str]:
+        return self.monitor.pen_drives
+
+    def _on_device_event(self) -> None:
+        if self.monitor.process_device_events():
+            self.pen_drives_changed.emit(self.monitor.pen_drives)
+
+    def _on_mount_change(self) -> None:
+        if self.monitor.process_mount_change():
+            self.pen_drives_changed.emit(self.monitor.pen_drives)
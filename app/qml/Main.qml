@@ -15,6 +15,7 @@ ApplicationWindow {
     signal selectPublicKey()
     signal signPdf()
     signal verifyPdf()
+    signal cancelOperation()
 
     property bool usbConnected: false
     property bool privateKeyLoaded: false
@@ -22,6 +23,7 @@ ApplicationWindow {
     property bool pdfFileLoaded: false
     property bool signingInProgress: false
     property bool verificationInProgress: false
+    property int operationProgress: 0
 
     ColumnLayout {
         anchors.fill: parent
@@ -102,7 +104,7 @@ ApplicationWindow {
                     id: signButton
                     text: signingInProgress ? "Signing..." : "Sign PDF"
                     anchors.fill: parent
-                    enabled: privateKeyLoaded && pdfFileLoaded && !signingInProgress
+                    enabled: privateKeyLoaded && pdfFileLoaded && !signingInProgress && !verificationInProgress
                     Material.background: Material.Teal
                     Material.foreground: "white"
                     onClicked: signPdf()
@@ -131,7 +133,7 @@ ApplicationWindow {
                     id: verifyButton
                     text: verificationInProgress ? "Verifying..." : "Verify Signature"
                     anchors.fill: parent
-                    enabled: pdfFileLoaded && publicKeyLoaded && !verificationInProgress
+                    enabled: pdfFileLoaded && publicKeyLoaded && !verificationInProgress && !signingInProgress
                     Material.background: Material.Blue
                     Material.foreground: "white"
                     onClicked: verifyPdf()
@@ -151,6 +153,27 @@ ApplicationWindow {
             }
         }
 
+        // PROGRESS OF THE RUNNING OPERATION
+        RowLayout {
+            Layout.fillWidth: true
+            spacing: 12
+            visible: signingInProgress || verificationInProgress
+
+            ProgressBar {
+                Layout.fillWidth: true
+                from: 0
+                to: 100
+                value: operationProgress
+            }
+
+            Button {
+                text: "Cancel"
+                onClicked: cancelOperation()
+                Material.background: Material.Red
+                Material.foreground: "white"
+            }
+        }
+
         Rectangle {
             Layout.fillWidth: true
             height: 120
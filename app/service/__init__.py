@@ -0,0 +1,3 @@
+from .signing_service import SigningService, StreamingDigest
+
+__all__ = ["SigningService", "StreamingDigest"]
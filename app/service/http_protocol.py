@@ -0,0 +1,161 @@
+import asyncio
+import json
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+
+# Minimal HTTP/1.1 over asyncio streams: enough for the signing service and its
+# load generator, without depending on a web framework.
+
+READ_SIZE = 64 * 1024
+MAX_HEADER_SIZE = 16 * 1024
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    409: "Conflict",
+    411: "Length Required",
+    413: "Payload Too Large",
+    422: "Unprocessable Content",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+class HTTPError(Exception):
+    """
+    Raised while handling a request to answer it with an error status.
+    """
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    headers: dict[str, str]
+    reader: asyncio.StreamReader
+
+    @property
+    def keep_alive(self) -> bool:
+        return self.headers.get("connection", "").lower() != "close"
+
+    async def body(self, max_size: Optional[int] = None) -> AsyncIterator[bytes]:
+        """
+        Yields the request body in chunks as they arrive, so it is never held in memory.
+        The socket is only read as fast as the chunks are consumed.
+        :param max_size: Maximum accepted body size in bytes.
+        :raises HTTPError: If the body is too large or its framing is invalid.
+        """
+        if self.headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = self._chunked_body()
+        elif "content-length" in self.headers:
+            try:
+                length = int(self.headers["content-length"])
+            except ValueError:
+                raise HTTPError(400, "Invalid Content-Length")
+            if length < 0:
+                raise HTTPError(400, "Invalid Content-Length")
+            if max_size is not None and length > max_size:
+                raise HTTPError(413, f"Body is larger than {max_size} bytes")
+            chunks = self._sized_body(length)
+        else:
+            raise HTTPError(411, "Content-Length or chunked encoding required")
+
+        received = 0
+        async for chunk in chunks:
+            received += len(chunk)
+            if max_size is not None and received > max_size:
+                raise HTTPError(413, f"Body is larger than {max_size} bytes")
+            yield chunk
+
+    async def _sized_body(self, length: int) -> AsyncIterator[bytes]:
+        while length > 0:
+            chunk = await self.reader.read(min(length, READ_SIZE))
+            if not chunk:
+                raise HTTPError(400, "Body ended early")
+            length -= len(chunk)
+            yield chunk
+
+    async def _chunked_body(self) -> AsyncIterator[bytes]:
+        while True:
+            size_line = await self.reader.readline()
+            try:
+                size = int(size_line.split(b";")[0], 16)
+            except ValueError:
+                raise HTTPError(400, "Invalid chunk size")
+            if size < 0:
+                raise HTTPError(400, "Invalid chunk size")
+            if size == 0:
+                # skip trailer fields up to the empty line
+                while (await self.reader.readline()).strip():
+                    pass
+                return
+            while size > 0:
+                chunk = await self.reader.read(min(size, READ_SIZE))
+                if not chunk:
+                    raise HTTPError(400, "Body ended early")
+                size -= len(chunk)
+                yield chunk
+            await self.reader.readexactly(2)
+
+
+async def read_request(reader: asyncio.StreamReader) -> Optional[Request]:
+    """
+    Reads the request line and the headers.
+    :param reader: The connection's stream reader.
+    :return: The request, or None if the client closed the connection.
+    :raises HTTPError: If the request head is malformed.
+    """
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError as e:
+        if e.partial.strip():
+            raise HTTPError(400, "Incomplete request")
+        return None
+    except asyncio.LimitOverrunError:
+        raise HTTPError(400, "Request head too large")
+    if len(head) > MAX_HEADER_SIZE:
+        raise HTTPError(400, "Request head too large")
+
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, _ = lines[0].split(" ", 2)
+    except ValueError:
+        raise HTTPError(400, "Invalid request line")
+    headers = {}
+    for line in lines[1:]:
+        if line:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+    return Request(method.upper(), target.split("?", 1)[0], headers, reader)
+
+
+def response(
+    status: int,
+    body: bytes = b"",
+    content_type: str = "application/octet-stream",
+    headers: Optional[dict[str, str]] = None,
+    keep_alive: bool = True,
+) -> bytes:
+    """
+    Encodes a complete response.
+    """
+    lines = [
+        f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+        f"Content-Type: {content_type}",
+        f"Content-Length: {len(body)}",
+        f"Connection: {'keep-alive' if keep_alive else 'close'}",
+    ]
+    lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+
+def json_response(status: int, content: dict, keep_alive: bool = True) -> bytes:
+    return response(
+        status, json.dumps(content).encode(), "application/json", keep_alive=keep_alive
+    )
@@ -0,0 +1,246 @@
+import asyncio
+import logging
+import os
+from concurrent.futures import Executor, ThreadPoolExecutor
+from hashlib import sha256
+from typing import AsyncIterator, Optional
+
+from ..pdf.multi_key_verifier import MultiKeyVerifier
+from ..pdf.pdf_signer import PDFSigner
+from ..pdf.pdf_verifier import SIGNATURE_SIZE_IN_BYTES
+from ..pdf.signature_trailer import TAIL_SIZE, SignatureTrailer
+from .http_protocol import HTTPError, Request, json_response, read_request, response
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8750
+DEFAULT_MAX_BODY_SIZE = 4 * 1024**3
+
+
+class StreamingDigest:
+    """
+    Hashes a stream of unknown length while keeping its last TAIL_SIZE bytes aside,
+    so the signature trailer can be excluded once the end of the stream is reached.
+    """
+
+    def __init__(self):
+        self._hasher = sha256()
+        self._tail = bytearray()
+        self.size = 0
+
+    def update(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        self._tail += chunk
+        excess = len(self._tail) - TAIL_SIZE
+        if excess > 0:
+            self._hasher.update(memoryview(self._tail)[:excess])
+            del self._tail[:excess]
+
+    def trailer(self) -> Optional[SignatureTrailer]:
+        """
+        :return: The signature trailer at the end of the stream, or None if there is none.
+        """
+        return SignatureTrailer.from_tail(bytes(self._tail), self.size)
+
+    def tail(self, length: int) -> bytes:
+        """
+        :param length: Number of bytes, at most TAIL_SIZE.
+        :return: The last bytes of the stream.
+        """
+        return bytes(self._tail[len(self._tail) - length :])
+
+    def digest(self, length: int) -> bytes:
+        """
+        :param length: Number of bytes from the start of the stream, not less than
+            the stream size minus TAIL_SIZE.
+        :return: The SHA256 digest of the first length bytes of the stream.
+        """
+        hasher = self._hasher.copy()
+        hasher.update(self._tail[: length - (self.size - len(self._tail))])
+        return hasher.digest()
+
+
+class SigningService:
+    """
+    Signs and verifies PDF files streamed over a local HTTP connection, on a TCP port
+    bound to localhost or on a Unix domain socket.
+
+        POST /sign    request body: the PDF file
+                      response body: the signature trailer to append to the file
+        POST /verify  request body: the signed PDF file
+                      response body: {"valid": bool, "key": name of the signing key}
+        GET  /health
+
+    Bodies are hashed chunk by chunk as they arrive, and public key operations run in
+    an executor. At most max_concurrency requests are processed at once; bodies of the
+    waiting requests are not read, so their clients are slowed down by the transport.
+    """
+
+    def __init__(
+        self,
+        signer: Optional[PDFSigner] = None,
+        verifier: Optional[MultiKeyVerifier] = None,
+        max_concurrency: Optional[int] = None,
+        max_body_size: int = DEFAULT_MAX_BODY_SIZE,
+        executor: Optional[Executor] = None,
+    ):
+        """
+        :param:
+            signer: Signer used by /sign, which is unavailable without it.
+            verifier: Verifier used by /verify, which is unavailable without it.
+            max_concurrency: Maximum number of requests processed at once, the CPU count by default.
+            max_body_size: Maximum size of a request body in bytes.
+            executor: Executor for public key operations, a thread pool by default.
+        """
+        self._signer = signer
+        self._verifier = verifier
+        self.max_concurrency = max_concurrency or os.cpu_count() or 1
+        self._max_body_size = max_body_size
+        self._executor = executor or ThreadPoolExecutor(self.max_concurrency)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.in_flight = 0
+
+    async def start(
+        self,
+        unix_socket: Optional[str] = None,
+        host: str = "127.0.0.1",
+        port: int = DEFAULT_PORT,
+    ) -> asyncio.AbstractServer:
+        """
+        Starts listening on a Unix domain socket if given, on a TCP port otherwise.
+        :return: The started server.
+        """
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        if unix_socket is not None:
+            server = await asyncio.start_unix_server(
+                self._handle_connection, unix_socket
+            )
+            logger.info(f"Listening on {unix_socket}")
+        else:
+            server = await asyncio.start_server(self._handle_connection, host, port)
+            logger.info(f"Listening on {host}:{port}")
+        return server
+
+    async def serve_forever(
+        self,
+        unix_socket: Optional[str] = None,
+        host: str = "127.0.0.1",
+        port: int = DEFAULT_PORT,
+    ) -> None:
+        server = await self.start(unix_socket, host, port)
+        async with server:
+            await server.serve_forever()
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                    if request is None:
+                        break
+                    reply = await self._dispatch(request)
+                    keep_alive = request.keep_alive
+                except HTTPError as e:
+                    # the rest of the body is unread, so the connection cannot be reused
+                    reply = json_response(e.status, {"error": str(e)}, False)
+                    keep_alive = False
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    raise
+                except Exception:
+                    logger.exception("Failed to handle a request")
+                    reply = json_response(
+                        500, {"error": "Internal server error"}, False
+                    )
+                    keep_alive = False
+                writer.write(reply)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, request: Request) -> bytes:
+        routes = {
+            "/sign": ("POST", self._sign),
+            "/verify": ("POST", self._verify),
+            "/health": ("GET", self._health),
+        }
+        if request.path not in routes:
+            raise HTTPError(404, f"Unknown path: {request.path}")
+        method, handler = routes[request.path]
+        if request.method != method:
+            raise HTTPError(405, f"{request.path} accepts {method} only")
+
+        async with self._semaphore:
+            self.in_flight += 1
+            try:
+                return await handler(request)
+            finally:
+                self.in_flight -= 1
+
+    async def _health(self, request: Request) -> bytes:
+        return json_response(
+            200,
+            {
+                "sign": self._signer is not None,
+                "verify": self._verifier is not None,
+                "in_flight": self.in_flight,
+            },
+            request.keep_alive,
+        )
+
+    async def _read_digest(self, body: AsyncIterator[bytes]) -> StreamingDigest:
+        digest = StreamingDigest()
+        async for chunk in body:
+            digest.update(chunk)
+        return digest
+
+    async def _sign(self, request: Request) -> bytes:
+        if self._signer is None:
+            raise HTTPError(503, "Signing is not configured")
+        digest = await self._read_digest(request.body(self._max_body_size))
+        if digest.trailer() is not None:
+            raise HTTPError(409, "File is already signed")
+
+        signature = await asyncio.get_running_loop().run_in_executor(
+            self._executor, self._signer.sign_digest, digest.digest(digest.size)
+        )
+        trailer = self._signer.make_trailer(signature, digest.size)
+        return response(
+            200,
+            trailer.to_bytes(),
+            headers={"X-Signed-Length": str(digest.size)},
+            keep_alive=request.keep_alive,
+        )
+
+    async def _verify(self, request: Request) -> bytes:
+        if self._verifier is None:
+            raise HTTPError(503, "Verification is not configured")
+        digest = await self._read_digest(request.body(self._max_body_size))
+
+        trailer = digest.trailer()
+        if trailer is not None and trailer.chunked:
+            raise HTTPError(422, "Chunked signatures can only be verified from files")
+        if trailer is not None:
+            signed_length, signature = trailer.signed_length, trailer.signature
+        else:
+            signed_length = digest.size - SIGNATURE_SIZE_IN_BYTES
+            signature = digest.tail(SIGNATURE_SIZE_IN_BYTES)
+        entry = None
+        if signed_length >= 0:
+            entry = await asyncio.get_running_loop().run_in_executor(
+                self._executor,
+                self._verifier.verify_content,
+                digest.digest(signed_length),
+                signature,
+                trailer,
+            )
+        return json_response(
+            200,
+            {"valid": entry is not None, "key": entry.name if entry else None},
+            request.keep_alive,
+        )
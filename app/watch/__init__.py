@@ -0,0 +1,20 @@
+from .events import (
+    FakeFileEventSource,
+    FileEventSource,
+    InotifyEventSource,
+    PollingEventSource,
+    event_source_for,
+)
+from .signing_daemon import SigningDaemon
+from .state_index import FileState, StateIndex
+
+__all__ = [
+    "FakeFileEventSource",
+    "FileEventSource",
+    "FileState",
+    "InotifyEventSource",
+    "PollingEventSource",
+    "SigningDaemon",
+    "StateIndex",
+    "event_source_for",
+]
@@ -0,0 +1,254 @@
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import sys
+import time
+from typing import Optional, Protocol
+
+logger = logging.getLogger(__name__)
+
+# inotify constants from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = (
+    IN_MODIFY
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_ONLYDIR
+)
+EVENT_HEADER = struct.Struct("iIII")
+READ_SIZE = 64 * 1024
+
+
+class FileEventSource(Protocol):
+    """
+    A source of change notifications for a directory tree.
+    wait() returns the paths that may have changed: files that were created, written,
+    moved or deleted, and directories whose whole content has to be scanned again,
+    e.g. a directory moved into the tree or the root after lost events.
+    """
+
+    def wait(self, timeout: Optional[float] = None) -> set[str]: ...
+
+    def close(self) -> None: ...
+
+
+class InotifyEventSource:
+    """
+    Change notifications from the Linux inotify API, called through ctypes.
+    Every directory of the tree is watched; directories created later are added
+    as they appear.
+    """
+
+    def __init__(self, directory: str):
+        """
+        :param directory: The root of the tree.
+        :raises OSError: If inotify is not available or the tree cannot be watched.
+        """
+        self.directory = os.path.abspath(directory)
+        libc_name = ctypes.util.find_library("c")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        self._directories: dict[int, str] = {}
+        try:
+            self._watch_tree(self.directory)
+        except OSError:
+            os.close(self._fd)
+            raise
+
+    def fileno(self) -> int:
+        return self._fd
+
+    def _watch_tree(self, directory: str) -> None:
+        for root, subdirectories, _ in os.walk(directory):
+            self._watch(root)
+            subdirectories[:] = [
+                name
+                for name in subdirectories
+                if not os.path.islink(os.path.join(root, name))
+            ]
+
+    def _watch(self, directory: str) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            if error in (errno.ENOENT, errno.ENOTDIR):
+                return  # removed before it could be watched
+            raise OSError(error, os.strerror(error), directory)
+        self._directories[wd] = directory
+
+    def wait(self, timeout: Optional[float] = None) -> set[str]:
+        """
+        Blocks until events arrive or the timeout expires.
+        :param timeout: Maximum time to wait in seconds, no limit if None.
+        :return: The changed paths.
+        """
+        poller = select.poll()
+        poller.register(self._fd, select.POLLIN)
+        if not poller.poll(None if timeout is None else timeout * 1000):
+            return set()
+
+        changed = set()
+        while True:
+            try:
+                data = os.read(self._fd, READ_SIZE)
+            except BlockingIOError:
+                break
+            changed |= self._parse(data)
+        return changed
+
+    def _parse(self, data: bytes) -> set[str]:
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                logger.warning("inotify queue overflowed, rescanning the tree")
+                changed.add(self.directory)
+                continue
+            if mask & IN_IGNORED:
+                self._directories.pop(wd, None)
+                continue
+            directory = self._directories.get(wd)
+            if directory is None:
+                continue
+            path = os.path.join(directory, name) if name else directory
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                self._watch_tree(path)
+            changed.add(path)
+        return changed
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+class PollingEventSource:
+    """
+    Change notifications found by comparing the size and modification time of every
+    file of the tree, scanned at a fixed interval. Used where inotify is not available.
+    """
+
+    def __init__(self, directory: str, interval: float = 1.0):
+        """
+        :param:
+            directory: The root of the tree.
+            interval: Seconds between two scans.
+        """
+        self.directory = os.path.abspath(directory)
+        self.interval = interval
+        self._snapshot = self._scan()
+        self._next_scan = time.monotonic() + interval
+
+    def _scan(self) -> dict[str, tuple[int, int]]:
+        snapshot = {}
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path, follow_symlinks=False)
+                except FileNotFoundError:
+                    continue
+                snapshot[path] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def wait(self, timeout: Optional[float] = None) -> set[str]:
+        """
+        Sleeps until the next scan, or until the timeout expires if it is shorter.
+        :param timeout: Maximum time to wait in seconds, no limit if None.
+        :return: The changed paths, empty if no scan was due.
+        """
+        delay = max(0.0, self._next_scan - time.monotonic())
+        if timeout is not None and timeout < delay:
+            time.sleep(timeout)
+            return set()
+        time.sleep(delay)
+        self._next_scan = time.monotonic() + self.interval
+
+        snapshot = self._scan()
+        changed = {
+            path
+            for path in snapshot.keys() | self._snapshot.keys()
+            if snapshot.get(path) != self._snapshot.get(path)
+        }
+        self._snapshot = snapshot
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+class FakeFileEventSource:
+    """
+    An in-memory FileEventSource for testing without a real filesystem watcher.
+    Emitted paths are returned by the next wait().
+    """
+
+    def __init__(self):
+        self._paths: set[str] = set()
+        self._read_fd, self._write_fd = os.pipe()
+        os.set_blocking(self._read_fd, False)
+
+    def emit(self, *paths: str) -> None:
+        self._paths.update(os.path.abspath(path) for path in paths)
+        os.write(self._write_fd, b"\0")
+
+    def wait(self, timeout: Optional[float] = None) -> set[str]:
+        ready, _, _ = select.select([self._read_fd], [], [], timeout)
+        if ready:
+            try:
+                os.read(self._read_fd, 4096)
+            except BlockingIOError:
+                pass
+        paths, self._paths = self._paths, set()
+        return paths
+
+    def close(self) -> None:
+        os.close(self._read_fd)
+        os.close(self._write_fd)
+
+
+def event_source_for(
+    directory: str, poll_interval: float = 1.0, polling: bool = False
+) -> FileEventSource:
+    """
+    Creates an inotify event source on Linux, and a polling one elsewhere or if
+    inotify cannot watch the tree, e.g. on network filesystems or when the watch
+    limit is reached.
+    :param:
+        directory: The root of the tree.
+        poll_interval: Seconds between two scans of the polling source.
+        polling: Whether to use the polling source even if inotify is available.
+    :return: The event source.
+    """
+    if sys.platform == "linux" and not polling:
+        try:
+            return InotifyEventSource(directory)
+        except (OSError, AttributeError) as e:
+            logger.warning(f"inotify is not available, polling instead: {e}")
+    return PollingEventSource(directory, poll_interval)
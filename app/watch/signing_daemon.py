@@ -0,0 +1,276 @@
+import logging
+import os
+import stat
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional
+
+from ..instrumentation import metrics
+from ..pdf.pdf_signer import PDFSigner
+from ..pdf.signature_trailer import AlreadySignedError
+from .events import FileEventSource
+from .state_index import FileState, StateIndex
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SETTLE_TIME = 2.0
+# longest wait for events while files are being signed, so results are picked up
+RESULT_POLL_INTERVAL = 0.25
+IDLE_POLL_INTERVAL = 1.0
+
+
+class SigningDaemon:
+    """
+    Watches a directory tree and signs new and modified PDF files as they appear.
+
+    A file is signed once it has not changed for the settle time, so files that are
+    still being copied are not signed half-written. Handled files are recorded in
+    the state index with their size and modification time after signing; a restarted
+    daemon skips files that have not changed since without reading them.
+    Only regular files are signed: symbolic links are skipped like linked directories,
+    so a file outside the tree is never modified through a link.
+    Files are signed in a thread pool of a fixed size, the remaining ones wait in a
+    queue whose length is reported as the watch.queue_depth gauge.
+    Events, the queue and the index are handled on the thread calling run() or step().
+    """
+
+    def __init__(
+        self,
+        signer: PDFSigner,
+        directory: str,
+        index: StateIndex,
+        source: FileEventSource,
+        settle_time: float = DEFAULT_SETTLE_TIME,
+        workers: int = 2,
+        suffix: str = ".pdf",
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        :param:
+            signer: The signer, its atomic mode is used for every file.
+            directory: The root of the watched tree.
+            index: The state index, see state_index.
+            source: The event source for the tree, see events.
+            settle_time: Seconds a file must stay unchanged before it is signed.
+            workers: Number of files signed at once.
+            suffix: Only files with this suffix are signed, case-insensitive.
+            clock: Monotonic time source in seconds.
+        """
+        self.signer = signer
+        self.directory = os.path.abspath(directory)
+        self.index = index
+        self.source = source
+        self.settle_time = settle_time
+        self.workers = max(1, workers)
+        self.suffix = suffix.lower()
+        self._clock = clock
+        self._stop = threading.Event()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="pades-watch"
+        )
+        # path -> (due time, size, mtime_ns) of files waiting to settle
+        self._settling: dict[str, tuple[float, int, int]] = {}
+        self._ready: deque[str] = deque()
+        self._signing: dict[str, Future] = {}
+        # files changed while being signed, observed again when signing completes
+        self._changed_while_signing: set[str] = set()
+        # path -> (size, mtime_ns) of files that failed, retried once they change
+        self._failed: dict[str, tuple[int, int]] = {}
+
+    @property
+    def queue_depth(self) -> int:
+        """
+        :return: Number of files waiting to settle, waiting for a worker or being signed.
+        """
+        return len(self._settling) + len(self._ready) + len(self._signing)
+
+    def scan(self) -> None:
+        """
+        Forgets indexed files that no longer exist and queues every file of the tree
+        that is not in the index or changed since it was handled.
+        """
+        for path in self.index.paths():
+            if not os.path.exists(path):
+                self.index.remove(path)
+        self._observe(self.directory)
+        self._report_queue()
+
+    def _wanted(self, path: str) -> bool:
+        name = os.path.basename(path)
+        # hidden files include temporary copies of the atomic mode and the index
+        return not name.startswith(".") and name.lower().endswith(self.suffix)
+
+    def _observe(self, path: str) -> None:
+        if os.path.isdir(path) and not os.path.islink(path):
+            for root, subdirectories, files in os.walk(path):
+                subdirectories[:] = [
+                    name for name in subdirectories if not name.startswith(".")
+                ]
+                for name in files:
+                    self._observe_file(os.path.join(root, name))
+            return
+        self._observe_file(path)
+
+    def _observe_file(self, path: str) -> None:
+        if not self._wanted(path):
+            return
+        if path in self._signing:
+            self._changed_while_signing.add(path)
+            return
+        try:
+            file_stat = os.stat(path, follow_symlinks=False)
+        except FileNotFoundError:
+            self._forget(path)
+            return
+        if not stat.S_ISREG(file_stat.st_mode):
+            # symbolic links, pipes and the like are never signed
+            self._forget(path)
+            return
+        state = self.index.get(path)
+        if state is not None and state.matches(file_stat):
+            return
+        if self._failed.get(path) == (file_stat.st_size, file_stat.st_mtime_ns):
+            return
+        if path in self._ready:
+            self._ready.remove(path)
+        due = self._clock() + self.settle_time
+        self._settling[path] = (due, file_stat.st_size, file_stat.st_mtime_ns)
+
+    def _forget(self, path: str) -> None:
+        self._settling.pop(path, None)
+        self._failed.pop(path, None)
+        if path in self._ready:
+            self._ready.remove(path)
+        self.index.remove(path)
+
+    def _promote_settled(self) -> None:
+        now = self._clock()
+        for path, (due, size, mtime_ns) in list(self._settling.items()):
+            if due > now:
+                continue
+            try:
+                file_stat = os.stat(path, follow_symlinks=False)
+            except FileNotFoundError:
+                self._forget(path)
+                continue
+            if (file_stat.st_size, file_stat.st_mtime_ns) != (size, mtime_ns):
+                # still being written without events, e.g. on the polling source
+                self._settling[path] = (
+                    now + self.settle_time,
+                    file_stat.st_size,
+                    file_stat.st_mtime_ns,
+                )
+                continue
+            del self._settling[path]
+            self._ready.append(path)
+
+    def _dispatch(self) -> None:
+        while self._ready and len(self._signing) < self.workers:
+            path = self._ready.popleft()
+            self._signing[path] = self._executor.submit(self._sign, path)
+
+    def _sign(self, path: str) -> FileState:
+        """
+        Signs one file, runs in a worker thread.
+        :param path: The path to the file.
+        :return: The state of the file afterwards.
+        """
+        # stat'ed like in _observe_file, so the state matches the next observation
+        file_stat = os.stat(path, follow_symlinks=False)
+        if not stat.S_ISREG(file_stat.st_mode):
+            raise ValueError(f"Not a regular file: {path}")
+        if self.signer.already_signed(path):
+            return FileState(path, file_stat.st_size, file_stat.st_mtime_ns, None, True)
+        try:
+            digest, signed_length = self.signer.hash_document(path)
+        except AlreadySignedError:
+            # signed by another key, left as it is
+            return FileState(
+                path, file_stat.st_size, file_stat.st_mtime_ns, None, False
+            )
+        signature = self.signer.sign_digest(digest)
+        self.signer.write_signature(path, signature, signed_length)
+        file_stat = os.stat(path, follow_symlinks=False)
+        return FileState(path, file_stat.st_size, file_stat.st_mtime_ns, digest, True)
+
+    def _collect(self) -> None:
+        for path, future in list(self._signing.items()):
+            if not future.done():
+                continue
+            del self._signing[path]
+            try:
+                state = future.result()
+            except FileNotFoundError:
+                self._forget(path)
+            except (OSError, ValueError) as e:
+                logger.error(f"Failed to sign {path}: {e}")
+                metrics.count("watch.failed")
+                try:
+                    file_stat = os.stat(path, follow_symlinks=False)
+                    self._failed[path] = (file_stat.st_size, file_stat.st_mtime_ns)
+                except FileNotFoundError:
+                    self._forget(path)
+            else:
+                self.index.put(state)
+                self._failed.pop(path, None)
+                if state.digest is not None:
+                    logger.info(f"Signed {path}")
+                    metrics.count("watch.signed")
+                else:
+                    logger.info(f"Skipped {path}: already signed")
+                    reason = "signed" if state.signed else "other_key"
+                    metrics.count("watch.skipped", reason=reason)
+
+            if path in self._changed_while_signing:
+                self._changed_while_signing.discard(path)
+                self._observe_file(path)
+
+    def _report_queue(self) -> None:
+        metrics.gauge("watch.queue_depth", len(self._settling), state="settling")
+        metrics.gauge("watch.queue_depth", len(self._ready), state="ready")
+        metrics.gauge("watch.queue_depth", len(self._signing), state="signing")
+
+    def _next_timeout(self) -> float:
+        timeout = RESULT_POLL_INTERVAL if self._signing else IDLE_POLL_INTERVAL
+        if self._settling:
+            next_due = min(due for due, _, _ in self._settling.values())
+            timeout = min(timeout, max(0.0, next_due - self._clock()))
+        return timeout
+
+    def step(self, timeout: Optional[float] = None) -> None:
+        """
+        Waits for events once and advances the queue.
+        :param timeout: Maximum time to wait for events in seconds,
+            by default until the next file settles or a result may be ready.
+        """
+        if timeout is None:
+            timeout = self._next_timeout()
+        for path in self.source.wait(timeout):
+            self._observe(path)
+        self._collect()
+        self._promote_settled()
+        self._dispatch()
+        self._report_queue()
+
+    def run(self) -> None:
+        """
+        Scans the tree, then handles events until stop() is called.
+        Files being signed are finished before it returns.
+        """
+        logger.info(f"Watching {self.directory}")
+        self.scan()
+        try:
+            while not self._stop.is_set():
+                self.step()
+        finally:
+            self._executor.shutdown(wait=True)
+            self._collect()
+            self._report_queue()
+
+    def stop(self) -> None:
+        """
+        Makes run() return after the current step, can be called from any thread.
+        """
+        self._stop.set()
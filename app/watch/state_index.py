@@ -0,0 +1,102 @@
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    digest BLOB,
+    signed INTEGER NOT NULL,
+    updated REAL NOT NULL
+);
+"""
+
+
+@dataclass(frozen=True)
+class FileState:
+    """
+    The state of a file after the watcher handled it.
+    size and mtime_ns are taken after signing, so an unchanged file is recognised
+    with a single stat call. digest is the SHA-256 of the signed content, None if the
+    file was found already signed. signed is False for files that cannot be signed
+    by the watcher's key, e.g. files signed by another key.
+    """
+
+    path: str
+    size: int
+    mtime_ns: int
+    digest: Optional[bytes]
+    signed: bool
+
+    def matches(self, stat: os.stat_result) -> bool:
+        return (self.size, self.mtime_ns) == (stat.st_size, stat.st_mtime_ns)
+
+
+class StateIndex:
+    """
+    Persistent index of the files handled by the watcher, stored in SQLite, so a
+    restarted watcher skips unchanged files without reading them.
+    The index can be shared between threads.
+    """
+
+    def __init__(self, database_path: str = ":memory:"):
+        """
+        :param database_path: The SQLite database file, kept in memory by default.
+        """
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            database_path, check_same_thread=False, isolation_level=None
+        )
+        if database_path != ":memory:":
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+
+    def get(self, path: str) -> Optional[FileState]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT path, size, mtime_ns, digest, signed FROM files WHERE path = ?",
+                (os.path.abspath(path),),
+            ).fetchone()
+        if row is None:
+            return None
+        return FileState(row[0], row[1], row[2], row[3], bool(row[4]))
+
+    def put(self, state: FileState) -> None:
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    os.path.abspath(state.path),
+                    state.size,
+                    state.mtime_ns,
+                    state.digest,
+                    int(state.signed),
+                    time.time(),
+                ),
+            )
+
+    def remove(self, path: str) -> None:
+        with self._lock:
+            self._connection.execute(
+                "DELETE FROM files WHERE path = ?", (os.path.abspath(path),)
+            )
+
+    def paths(self) -> list[str]:
+        with self._lock:
+            return [
+                row[0] for row in self._connection.execute("SELECT path FROM files")
+            ]
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM files").fetchone()[0]
@@ -0,0 +1,89 @@
+"""
+Compares key generation, sign and verify throughput and signature size per algorithm.
+
+Run from the repository root: python -m benchmarks.bench_algorithms
+The fixed key fixtures are used, so the results are comparable between runs.
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import Callable
+
+from app.keys_loading.key_generation import generate_private_key
+from app.pdf.signature_algorithms import algorithm_for_key
+
+from . import fixtures
+
+
+def _rate(function: Callable[[], object], seconds: float) -> float:
+    """
+    :return: Calls of the function per second, measured for at least the given time.
+    """
+    count = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    while time.perf_counter() < deadline:
+        function()
+        count += 1
+    return count / (time.perf_counter() - start)
+
+
+def _key_type(name: str) -> tuple[str, int]:
+    if name.startswith("rsa-"):
+        return "rsa", int(name[len("rsa-") :])
+    return name, 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=1.0)
+    parser.add_argument(
+        "--keys", nargs="+", choices=fixtures.KEY_NAMES, default=fixtures.KEY_NAMES
+    )
+    parser.add_argument(
+        "--keygen", action="store_true", help="Also measure key generation"
+    )
+    args = parser.parse_args()
+
+    fixtures.generate_fixtures()
+    digest = os.urandom(32)
+    header = (
+        f"{'key':<12} {'algorithm':<16} {'sign/s':>10} {'verify/s':>10} {'bytes':>6}"
+    )
+    if args.keygen:
+        header += f" {'keygen ms':>10}"
+    print(header)
+
+    for name in args.keys:
+        private_key = fixtures.load_private_key(name)
+        public_key = private_key.public_key()
+        algorithm = algorithm_for_key(private_key)
+        signature = algorithm.sign_digest(private_key, digest)
+        if not algorithm.verify_digest(public_key, digest, signature):
+            raise RuntimeError(f"{name}: signature does not verify")
+
+        sign_rate = _rate(
+            lambda: algorithm.sign_digest(private_key, digest), args.seconds
+        )
+        verify_rate = _rate(
+            lambda: algorithm.verify_digest(public_key, digest, signature),
+            args.seconds,
+        )
+        line = (
+            f"{name:<12} {algorithm.name:<16} {sign_rate:>10.1f} "
+            f"{verify_rate:>10.1f} {len(signature):>6}"
+        )
+        if args.keygen:
+            key_type, key_size = _key_type(name)
+            keygen_rate = _rate(
+                lambda: generate_private_key(key_type, key_size), args.seconds
+            )
+            line += f" {1000 / keygen_rate:>10.2f}"
+        print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""
+Import-time benchmark of the headless CLI.
+
+Runs `pades-tool --help` under `python -X importtime` several times, reports the cumulative
+import time of app.cli and fails if it exceeds the startup target or if a heavy
+module (Qt, cryptography, pyudev, psutil) is imported at startup.
+
+Run from the repository root: python -m benchmarks.bench_cli_startup
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+DEFAULT_TARGET_MS = 50.0
+FORBIDDEN_MODULES = ("PyQt6", "cryptography", "pyudev", "psutil")
+# importing app.cli explicitly, so it shows up under its name in the importtime output
+CLI_HELP_SCRIPT = "import sys, app.cli; sys.exit(app.cli.main(['--help']))"
+
+
+def _run_once() -> tuple[float, float, set[str]]:
+    start = time.perf_counter()
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CLI_HELP_SCRIPT],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stderr
+    wall_ms = (time.perf_counter() - start) * 1000
+
+    # lines look like: "import time:   self [us] |  cumulative | imported package"
+    cli_ms = 0.0
+    modules = set()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        name = name.strip()
+        modules.add(name.split(".")[0])
+        if name == "app.cli":
+            cli_ms = int(cumulative) / 1000
+    return cli_ms, wall_ms, modules
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--target-ms", type=float, default=DEFAULT_TARGET_MS)
+    args = parser.parse_args()
+
+    cli_timings, wall_timings, modules = [], [], set()
+    for _ in range(args.runs):
+        cli_ms, wall_ms, run_modules = _run_once()
+        cli_timings.append(cli_ms)
+        wall_timings.append(wall_ms)
+        modules |= run_modules
+
+    cli_median = statistics.median(cli_timings)
+    print(f"app.cli import: median {cli_median:.2f} ms (target {args.target_ms} ms)")
+    print(f"process wall time: median {statistics.median(wall_timings):.1f} ms")
+
+    failed = False
+    forbidden = sorted(set(FORBIDDEN_MODULES) & modules)
+    if forbidden:
+        print(f"heavy modules imported at startup: {', '.join(forbidden)}")
+        failed = True
+    if cli_median > args.target_ms:
+        print("startup target exceeded")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
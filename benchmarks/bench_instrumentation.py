@@ -0,0 +1,87 @@
+"""
+Measures the overhead of the instrumentation spans, disabled and enabled.
+
+Run from the repository root: python -m benchmarks.bench_instrumentation
+The cost of a bare span is measured in a tight loop, and the cost per verification
+on a small signed file, where the spans are the largest relative overhead.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable
+
+from app.instrumentation import JSONLinesExporter, metrics
+from app.pdf.pdf_signer import PDFSigner
+from app.pdf.pdf_verifier import PDFVerifier
+
+from . import fixtures
+
+
+def _ns_per_call(function: Callable[[], object], iterations: int) -> float:
+    start = time.perf_counter_ns()
+    for _ in range(iterations):
+        function()
+    return (time.perf_counter_ns() - start) / iterations
+
+
+def _empty_span() -> None:
+    with metrics.span("bench.empty"):
+        pass
+
+
+def _median_us(function: Callable[[], object], iterations: int) -> float:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter_ns()
+        function()
+        timings.append((time.perf_counter_ns() - start) / 1000)
+    return statistics.median(timings)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--spans", type=int, default=200_000)
+    parser.add_argument("--verifications", type=int, default=500)
+    parser.add_argument("--key", choices=fixtures.KEY_NAMES, default="ecdsa-p256")
+    parser.add_argument("--size-kib", type=int, default=64)
+    args = parser.parse_args()
+
+    fixtures.generate_fixtures()
+    private_key = fixtures.load_private_key(args.key)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdf_file_path = os.path.join(tmp_dir, "document.pdf")
+        with open(pdf_file_path, "wb") as f:
+            f.write(os.urandom(args.size_kib * 1024))
+        PDFSigner(private_key).sign(pdf_file_path)
+        verifier = PDFVerifier(private_key.public_key())
+
+        def verify() -> None:
+            if not verifier.verify(pdf_file_path):
+                raise RuntimeError("signature does not verify")
+
+        exporter = JSONLinesExporter(os.path.join(tmp_dir, "metrics.jsonl"))
+        print(f"{'mode':<18} {'ns/span':>10} {'us/verify':>10}")
+        for mode in ("disabled", "enabled", "enabled+jsonl"):
+            metrics.reset()
+            metrics.enabled = mode != "disabled"
+            if mode == "enabled+jsonl":
+                metrics.add_sink(exporter)
+            try:
+                span_ns = _ns_per_call(_empty_span, args.spans)
+                verify_us = _median_us(verify, args.verifications)
+            finally:
+                metrics.enabled = False
+                if mode == "enabled+jsonl":
+                    metrics.remove_sink(exporter)
+            print(f"{mode:<18} {span_ns:>10.0f} {verify_us:>10.1f}")
+        exporter.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""
+Concurrency stress test of the key registry: threads and processes signing with different keys at once.
+
+Run from the repository root: python -m benchmarks.bench_key_registry
+Every worker repeatedly acquires a random key, signs a digest, verifies the signature
+and releases the handle. At the end every key must have been dropped from the registry
+and its session, and every released handle must refuse to hand out its key.
+"""
+
+import argparse
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from hashlib import sha256
+
+from app.keys_loading import KeyRegistry
+from app.pdf.pdf_signer import PDFSigner
+from app.pdf.pdf_verifier import PDFVerifier
+
+from . import fixtures
+
+
+def _work(
+    registry: KeyRegistry, key_names: list[str], iterations: int, seed: int
+) -> tuple[int, list]:
+    """
+    Signs with random keys, holding up to three handles at a time.
+    :return: The number of signatures and the released handles.
+    """
+    rng = random.Random(seed)
+    released = []
+    held = []
+    for i in range(iterations):
+        name = rng.choice(key_names)
+        handle = registry.acquire_private(fixtures.private_key_path(name), fixtures.PIN)
+        held.append(handle)
+
+        digest = sha256(f"{seed}:{i}".encode()).digest()
+        signature = PDFSigner(handle.value).sign_digest(digest)
+        if not PDFVerifier(handle.value.public_key()).verify_digest(digest, signature):
+            raise RuntimeError(f"signature by {name} does not verify")
+
+        if len(held) > 3 or rng.random() < 0.5:
+            victim = held.pop(rng.randrange(len(held)))
+            victim.release()
+            released.append(victim)
+    for handle in held:
+        handle.release()
+    return iterations, released + held
+
+
+def _check_released(registry: KeyRegistry, handles: list) -> None:
+    if len(registry) or len(registry.sessions):
+        raise RuntimeError(
+            f"{len(registry)} keys and {len(registry.sessions)} sessions left"
+        )
+    for handle in handles:
+        try:
+            handle.value
+        except ValueError:
+            continue
+        raise RuntimeError(f"released handle {handle.key_id[:16]} still holds its key")
+
+
+def _process_worker(key_names: list[str], iterations: int, seed: int) -> int:
+    registry = KeyRegistry()
+    signatures, handles = _work(registry, key_names, iterations, seed)
+    _check_released(registry, handles)
+    return signatures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--processes", type=int, default=2)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument(
+        "--keys", default="ecdsa-p256,ed25519,rsa-2048", help="Comma-separated"
+    )
+    args = parser.parse_args()
+    key_names = args.keys.split(",")
+    fixtures.generate_fixtures()
+
+    registry = KeyRegistry()
+    # switch threads often, so races between acquire and release show up
+    sys.setswitchinterval(1e-6)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        results = list(
+            pool.map(
+                lambda seed: _work(registry, key_names, args.iterations, seed),
+                range(args.threads),
+            )
+        )
+    thread_seconds = time.perf_counter() - start
+    sys.setswitchinterval(0.005)
+    _check_released(registry, [h for _, handles in results for h in handles])
+    thread_signatures = sum(signatures for signatures, _ in results)
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.processes) as pool:
+        process_signatures = sum(
+            pool.map(
+                _process_worker,
+                [key_names] * args.processes,
+                [args.iterations] * args.processes,
+                range(args.processes),
+            )
+        )
+    process_seconds = time.perf_counter() - start
+
+    print(f"keys {', '.join(key_names)}, {args.iterations} iterations per worker")
+    print(f"{'workers':<14} {'signatures':>10} {'s':>8} {'sig/s':>8}")
+    for workers, signatures, seconds in (
+        (f"{args.threads} threads", thread_signatures, thread_seconds),
+        (f"{args.processes} processes", process_signatures, process_seconds),
+    ):
+        print(
+            f"{workers:<14} {signatures:>10} {seconds:>8.2f} {signatures / seconds:>8.0f}"
+        )
+    print("all keys released")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""
+Benchmark of loading an encrypted private key from scratch versus from a KeySessionManager.
+
+Run from the repository root: python -m benchmarks.bench_key_session
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from hashlib import sha256
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from app.keys_loading.key_session import KeySessionManager
+
+PIN = "1234"
+
+
+def _write_encrypted_key(path: str, key_size: int) -> None:
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=key_size)
+    with open(path, "wb") as f:
+        f.write(
+            private_key.private_bytes(
+                encoding=serialization.Encoding.PEM,
+                format=serialization.PrivateFormat.TraditionalOpenSSL,
+                encryption_algorithm=serialization.BestAvailableEncryption(
+                    sha256(PIN.encode()).digest()
+                ),
+            )
+        )
+
+
+def _time_ms(func, iterations: int) -> list[float]:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--key-size", type=int, default=4096)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        key_path = os.path.join(tmp_dir, "private-key.pem")
+        _write_encrypted_key(key_path, args.key_size)
+
+        uncached = _time_ms(
+            lambda: KeySessionManager().load(key_path, PIN), args.iterations
+        )
+        sessions = KeySessionManager()
+        sessions.load(key_path, PIN)
+        cached = _time_ms(lambda: sessions.load(key_path, PIN), args.iterations)
+
+    print(f"RSA-{args.key_size}, {args.iterations} iterations")
+    print(f"{'':>8} {'median ms':>10} {'p99 ms':>10}")
+    for name, timings in (("load", uncached), ("cached", cached)):
+        p99 = statistics.quantiles(timings, n=100)[98]
+        print(f"{name:>8} {statistics.median(timings):>10.3f} {p99:>10.3f}")
+    print(f"speedup: {statistics.median(uncached) / statistics.median(cached):.0f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""
+Compares signing a directory of files with sidecars and with a single signed manifest.
+
+Run from the repository root: python -m benchmarks.bench_manifest
+Sidecars cost one private key operation per file, a manifest one per tree.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from app.pdf.manifest import sign_manifest, verify_manifest
+from app.pdf.pdf_signer import PDFSigner
+from app.pdf.pdf_verifier import PDFVerifier
+
+from . import fixtures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--size-kib", type=int, default=64)
+    parser.add_argument("--key", choices=fixtures.KEY_NAMES, default="rsa-4096")
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args()
+
+    fixtures.generate_fixtures()
+    private_key = fixtures.load_private_key(args.key)
+    signer = PDFSigner(private_key)
+    verifier = PDFVerifier(private_key.public_key())
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = []
+        for i in range(args.files):
+            path = os.path.join(tmp_dir, f"{i // 100:03d}", f"{i:06d}.pdf")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(os.urandom(args.size_kib * 1024))
+            paths.append(path)
+
+        start = time.perf_counter()
+        for path in paths:
+            signer.sign_detached(path)
+        sidecar_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        if not all(verifier.verify_detached(path) for path in paths):
+            raise RuntimeError("a detached signature does not verify")
+        sidecar_verify_seconds = time.perf_counter() - start
+        for path in paths:
+            os.remove(path + ".sig")
+
+        manifest_path = os.path.join(tmp_dir, "MANIFEST.pades")
+        start = time.perf_counter()
+        sign_manifest(signer, tmp_dir, manifest_path, args.workers)
+        manifest_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        if not verify_manifest(verifier, manifest_path, workers=args.workers).ok:
+            raise RuntimeError("the manifest does not verify")
+        manifest_verify_seconds = time.perf_counter() - start
+
+    print(f"{args.files} files of {args.size_kib} KiB, key {args.key}")
+    print(f"{'mode':<10} {'sign s':>8} {'files/s':>9} {'verify s':>9}")
+    for mode, sign_seconds, verify_seconds in (
+        ("sidecars", sidecar_seconds, sidecar_verify_seconds),
+        ("manifest", manifest_seconds, manifest_verify_seconds),
+    ):
+        print(
+            f"{mode:<10} {sign_seconds:>8.2f} {args.files / sign_seconds:>9.0f} "
+            f"{verify_seconds:>9.2f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
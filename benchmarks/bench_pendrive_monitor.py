@@ -0,0 +1,153 @@
+"""
+Event-driven pen drive detection: PenDriveMonitor driven through plug and unplug events.
+
+Run from the repository root: python -m benchmarks.bench_pendrive_monitor
+A scripted scenario checks the pen drive list after every device event and mount
+change, delivered through wait() like udev and the mount table deliver them. Random
+plug and unplug cycles then compare the monitor with a model of the connected drives
+and report how fast events are applied. Uses FakeEventSource and FakeMountTable,
+no hardware or root access is needed.
+"""
+
+import argparse
+import random
+import sys
+import time
+
+from app.pendrive_detection import FakeEventSource, FakeMountTable, PenDriveMonitor
+
+SYSTEM_MOUNTS = {"/dev/sda1": "/", "/dev/sda2": "/home"}
+
+
+def _expect(step: str, monitor: PenDriveMonitor, changed: bool, expected: tuple):
+    """
+    Checks the result of a wait() call and the pen drives seen afterwards.
+    :param expected: Whether the list should have changed and the expected list.
+    """
+    expected_changed, expected_drives = expected
+    if (changed, monitor.pen_drives) != (expected_changed, expected_drives):
+        raise RuntimeError(
+            f"{step}: changed={changed} pen drives={monitor.pen_drives}, "
+            f"expected changed={expected_changed} pen drives={expected_drives}"
+        )
+    print(f"{step:<44} {str(changed):<8} {monitor.pen_drives}")
+
+
+def _scenario() -> None:
+    events = FakeEventSource(removable_devices=["/dev/sdb1"])
+    mounts = FakeMountTable({**SYSTEM_MOUNTS, "/dev/sdb1": "/media/a"})
+    monitor = PenDriveMonitor(events, mounts)
+    if monitor.pen_drives != ["/media/a"]:
+        raise RuntimeError(f"initial pen drives: {monitor.pen_drives}")
+
+    print(f"{'step':<44} {'changed':<8} pen drives")
+    _expect("idle", monitor, monitor.wait(0.05), (False, ["/media/a"]))
+
+    events.emit("add", "/dev/sdc1")
+    _expect(
+        "plug sdc1, not mounted yet", monitor, monitor.wait(1), (False, ["/media/a"])
+    )
+    mounts.set_mounts(
+        {**SYSTEM_MOUNTS, "/dev/sdb1": "/media/a", "/dev/sdc1": "/media/b"}
+    )
+    _expect("mount sdc1", monitor, monitor.wait(1), (True, ["/media/a", "/media/b"]))
+
+    events.emit("add", "/dev/sdd1", removable=False)
+    monitor.wait(1)
+    mounts.set_mounts(
+        {
+            **SYSTEM_MOUNTS,
+            "/dev/sdb1": "/media/a",
+            "/dev/sdc1": "/media/b",
+            "/dev/sdd1": "/mnt/disk",
+        }
+    )
+    _expect(
+        "plug and mount fixed disk sdd1",
+        monitor,
+        monitor.wait(1),
+        (False, ["/media/a", "/media/b"]),
+    )
+
+    events.emit("remove", "/dev/sdb1")
+    _expect(
+        "unplug sdb1 before unmount", monitor, monitor.wait(1), (True, ["/media/b"])
+    )
+    mounts.set_mounts(
+        {**SYSTEM_MOUNTS, "/dev/sdc1": "/media/b", "/dev/sdd1": "/mnt/disk"}
+    )
+    _expect("unmount sdb1", monitor, monitor.wait(1), (False, ["/media/b"]))
+
+    # both sources pending at once are applied by a single wait
+    events.emit("remove", "/dev/sdc1")
+    events.emit("add", "/dev/sde1")
+    mounts.set_mounts(
+        {**SYSTEM_MOUNTS, "/dev/sdd1": "/mnt/disk", "/dev/sde1": "/media/c"}
+    )
+    _expect("swap sdc1 for sde1", monitor, monitor.wait(1), (True, ["/media/c"]))
+    _expect("idle", monitor, monitor.wait(0.05), (False, ["/media/c"]))
+
+
+def _cycles(cycles: int, devices: int, seed: int) -> tuple[int, float]:
+    """
+    Plugs and unplugs random devices, mounting and unmounting them in random order.
+    :return: The number of events applied and the time it took in seconds.
+    """
+    rng = random.Random(seed)
+    events = FakeEventSource()
+    mounts = FakeMountTable(SYSTEM_MOUNTS)
+    monitor = PenDriveMonitor(events, mounts)
+    plugged: set[str] = set()
+    mounted: dict[str, str] = {}
+    applied = 0
+
+    start = time.perf_counter()
+    for cycle in range(cycles):
+        node = f"/dev/sd{chr(ord('b') + rng.randrange(devices))}1"
+        if node in plugged:
+            events.emit("remove", node)
+            plugged.discard(node)
+            mounted.pop(node, None)
+        else:
+            events.emit("add", node)
+            plugged.add(node)
+        applied += 1
+        # events already written to the pipes are ready, so nothing has to block
+        if rng.random() < 0.5:
+            monitor.wait(0)
+
+        # the mount table follows, sometimes with a delay of a few events
+        if rng.random() < 0.7:
+            for unmounted in plugged - set(mounted):
+                mounted[unmounted] = f"/media/{unmounted[-2]}"
+            mounts.set_mounts({**SYSTEM_MOUNTS, **mounted})
+            applied += 1
+        monitor.wait(0)
+
+        expected = sorted(mounted[node] for node in plugged if node in mounted)
+        if monitor.pen_drives != expected:
+            raise RuntimeError(
+                f"cycle {cycle}: pen drives {monitor.pen_drives}, expected {expected}"
+            )
+    return applied, time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--cycles", type=int, default=10000)
+    parser.add_argument("--devices", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    _scenario()
+    applied, seconds = _cycles(args.cycles, args.devices, args.seed)
+    print(
+        f"{args.cycles} random cycles over {args.devices} devices: {applied} events "
+        f"in {seconds:.2f} s, {applied / seconds:.0f} events/s"
+    )
+    print("pen drive list matched after every event")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""
+Allocation benchmark for the document reader shared by PDFSigner and PDFVerifier.
+
+Signs and verifies synthetic files of growing size under tracemalloc, with the file
+memory-mapped and read through a buffer, and reports the peak of Python allocations
+of every run next to reading the file with a plain read(). Fails if a peak grows with
+the file size, i.e. if any copy of the document body is made, or if a pipe is not
+rejected at once: opening one without a writer must not block.
+
+Run from the repository root: python -m benchmarks.bench_reader_allocations
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from app.pdf.document_reader import CHUNK_SIZE, DocumentReader
+from app.pdf.pdf_signer import PDFSigner
+from app.pdf.pdf_verifier import PDFVerifier
+
+from . import fixtures
+
+MIB = 1024 * 1024
+DEFAULT_SIZES_MIB = [16, 64, 256]
+# the chunk buffer of unmapped reads and small objects such as the trailer
+ALLOWED_PEAK = CHUNK_SIZE + 256 * 1024
+
+
+def _make_sparse_file(path: str, size: int) -> None:
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.7\n")
+        f.truncate(size)
+
+
+def _traced(func) -> tuple[int, float]:
+    """
+    :return: The peak of Python allocations while running func and its duration.
+    """
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak, elapsed
+
+
+def _read_whole(path: str) -> None:
+    with open(path, "rb") as f:
+        f.read()
+
+
+def _check_pipe_rejected(tmp_dir: str) -> bool:
+    """
+    :return: Whether opening a pipe without a writer raises ValueError without blocking.
+    """
+    if not hasattr(os, "mkfifo"):
+        return True
+    fifo_path = os.path.join(tmp_dir, "pipe.pdf")
+    os.mkfifo(fifo_path)
+    outcome = []
+
+    def open_pipe():
+        try:
+            DocumentReader(fifo_path).close()
+            outcome.append("accepted")
+        except ValueError:
+            outcome.append("rejected")
+
+    # a daemon thread, so a reader blocked on the pipe does not keep the process alive
+    thread = threading.Thread(target=open_pipe, daemon=True)
+    thread.start()
+    thread.join(5)
+    result = outcome[0] if outcome else "blocked"
+    print(f"pipe without a writer: {result}")
+    return result == "rejected"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES_MIB)
+    parser.add_argument("--key", choices=fixtures.KEY_NAMES, default="ecdsa-p256")
+    args = parser.parse_args()
+
+    fixtures.generate_fixtures()
+    private_key = fixtures.load_private_key(args.key)
+
+    failed = False
+    print(f"{'size MiB':>10} {'operation':<22} {'peak KiB':>10} {'time s':>8}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        failed = not _check_pipe_rejected(tmp_dir)
+        pdf_path = os.path.join(tmp_dir, "document.pdf")
+        for size_mib in args.sizes:
+            _make_sparse_file(pdf_path, size_mib * MIB)
+            runs = [("read() reference", lambda: _read_whole(pdf_path), False)]
+            for mapped in (True, False):
+                mode = "mapped" if mapped else "buffered"
+                signer = PDFSigner(private_key, mapped=mapped)
+                verifier = PDFVerifier(private_key.public_key(), mapped=mapped)
+
+                def sign(s=signer):
+                    _make_sparse_file(pdf_path, size_mib * MIB)
+                    s.sign(pdf_path)
+
+                def verify(v=verifier):
+                    if not v.verify(pdf_path):
+                        raise RuntimeError(f"{pdf_path} does not verify")
+
+                runs += [(f"sign {mode}", sign, True), (f"verify {mode}", verify, True)]
+
+            for name, func, checked in runs:
+                peak, elapsed = _traced(func)
+                if checked and peak > ALLOWED_PEAK:
+                    failed = True
+                print(f"{size_mib:>10} {name:<22} {peak / 1024:>10.0f} {elapsed:>8.3f}")
+
+    print(f"allowed peak: {ALLOWED_PEAK / 1024:.0f} KiB for any file size")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+"""
+Load generator for the signing service: latency percentiles and throughput of /sign or /verify.
+
+Run from the repository root: python -m benchmarks.bench_service
+Without --socket or --port a local instance is started on a temporary Unix socket.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Optional
+
+from app.keys_loading.key_generation import generate_key_pair, write_key_pair
+
+PIN = "1234"
+
+
+async def _open(args: argparse.Namespace):
+    if args.port is not None:
+        return await asyncio.open_connection("127.0.0.1", args.port)
+    return await asyncio.open_unix_connection(args.socket)
+
+
+async def _request(reader, writer, path: str, body: bytes) -> tuple[int, bytes]:
+    writer.write(
+        f"POST {path} HTTP/1.1\r\nHost: localhost\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode()
+    )
+    writer.write(body)
+    await writer.drain()
+
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split(" ")[1])
+    length = next(
+        int(line.split(":")[1])
+        for line in lines
+        if line.lower().startswith("content-length")
+    )
+    return status, await reader.readexactly(length)
+
+
+async def _client(
+    args: argparse.Namespace, body: bytes, deadline: float, latencies: list[float]
+) -> int:
+    reader, writer = await _open(args)
+    errors = 0
+    try:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            status, _ = await _request(reader, writer, f"/{args.endpoint}", body)
+            latencies.append((time.perf_counter() - start) * 1000)
+            errors += status != 200
+    finally:
+        writer.close()
+    return errors
+
+
+async def _run(args: argparse.Namespace, document: bytes) -> None:
+    body = document
+    if args.endpoint == "verify":
+        reader, writer = await _open(args)
+        status, trailer = await _request(reader, writer, "/sign", document)
+        writer.close()
+        if status != 200:
+            raise RuntimeError(f"Signing the test document failed with {status}")
+        body = document + trailer
+
+    latencies: list[float] = []
+    start = time.perf_counter()
+    deadline = start + args.seconds
+    errors = await asyncio.gather(
+        *(_client(args, body, deadline, latencies) for _ in range(args.clients))
+    )
+    elapsed = time.perf_counter() - start
+
+    percentiles = statistics.quantiles(latencies, n=100)
+    print(
+        f"/{args.endpoint}: {args.size_kib} KiB bodies, {args.clients} clients, "
+        f"{args.seconds} s"
+    )
+    print(f"requests: {len(latencies)}, errors: {sum(errors)}")
+    print(f"p50: {percentiles[49]:.2f} ms, p99: {percentiles[98]:.2f} ms")
+    print(f"throughput: {len(latencies) / elapsed:.1f} req/s")
+
+
+def _start_local_instance(tmp_dir: str, concurrency: Optional[int]) -> subprocess.Popen:
+    private_pem, public_pem = generate_key_pair(PIN, 2048)
+    private_key_path, _ = write_key_pair(private_pem, public_pem, tmp_dir)
+    pin_file = os.path.join(tmp_dir, "pin")
+    with open(pin_file, "w") as f:
+        f.write(PIN)
+
+    socket_path = os.path.join(tmp_dir, "service.sock")
+    command = [
+        sys.executable,
+        "-m",
+        "app.cli",
+        "serve",
+        "--socket",
+        socket_path,
+        "--key",
+        private_key_path,
+        "--pin-file",
+        pin_file,
+        "--keyring",
+        tmp_dir,
+    ]
+    if concurrency is not None:
+        command += ["--concurrency", str(concurrency)]
+    process = subprocess.Popen(command, stderr=subprocess.DEVNULL)
+    while not os.path.exists(socket_path):
+        if process.poll() is not None:
+            raise RuntimeError("Service failed to start")
+        time.sleep(0.05)
+    return process
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--endpoint", choices=("sign", "verify"), default="sign")
+    parser.add_argument("--size-kib", type=int, default=256)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--socket", help="Unix socket of a running instance")
+    parser.add_argument("--port", type=int, help="Port of a running instance")
+    parser.add_argument(
+        "--concurrency", type=int, help="Concurrency limit of the local instance"
+    )
+    args = parser.parse_args()
+
+    document = os.urandom(args.size_kib * 1024)
+    if args.socket is not None or args.port is not None:
+        asyncio.run(_run(args, document))
+        return 0
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        process = _start_local_instance(tmp_dir, args.concurrency)
+        args.socket = os.path.join(tmp_dir, "service.sock")
+        try:
+            asyncio.run(_run(args, document))
+        finally:
+            process.terminate()
+            process.wait()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
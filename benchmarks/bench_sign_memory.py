@@ -0,0 +1,104 @@
+"""
+Memory benchmark for PDFSigner.
+
+Signs synthetic files of growing size, each in a fresh process, and reports the
+peak RSS of every run. Fails if the peak RSS grows by more than the allowed margin
+between the smallest and the largest file.
+
+Run from the repository root: python -m benchmarks.bench_sign_memory
+"""
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+MIB = 1024 * 1024
+DEFAULT_SIZES_MIB = [16, 64, 256, 1024]
+ALLOWED_GROWTH_MIB = 8
+
+
+def _peak_rss_mib() -> float:
+    # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / MIB if sys.platform == "darwin" else peak / 1024
+
+
+def _run_child(pdf_path: str, key_path: str) -> None:
+    from app.pdf.pdf_signer import PDFSigner
+
+    with open(key_path, "rb") as f:
+        private_key = serialization.load_pem_private_key(f.read(), password=None)
+
+    start = time.perf_counter()
+    PDFSigner(private_key).sign(pdf_path)
+    elapsed = time.perf_counter() - start
+    print(f"{_peak_rss_mib():.1f} {elapsed:.3f}")
+
+
+def _make_sparse_file(path: str, size: int) -> None:
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.7\n")
+        f.truncate(size)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES_MIB)
+    parser.add_argument(
+        "--child", nargs=2, metavar=("PDF", "KEY"), help=argparse.SUPPRESS
+    )
+    args = parser.parse_args()
+
+    if args.child:
+        _run_child(*args.child)
+        return 0
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        key_path = os.path.join(tmp_dir, "key.pem")
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=4096)
+        with open(key_path, "wb") as f:
+            f.write(
+                private_key.private_bytes(
+                    encoding=serialization.Encoding.PEM,
+                    format=serialization.PrivateFormat.PKCS8,
+                    encryption_algorithm=serialization.NoEncryption(),
+                )
+            )
+
+        results = []
+        print(f"{'size MiB':>10} {'peak RSS MiB':>14} {'time s':>8}")
+        for size_mib in args.sizes:
+            pdf_path = os.path.join(tmp_dir, f"{size_mib}.pdf")
+            _make_sparse_file(pdf_path, size_mib * MIB)
+            output = subprocess.run(
+                [
+                    sys.executable,
+                    "-m",
+                    "benchmarks.bench_sign_memory",
+                    "--child",
+                    pdf_path,
+                    key_path,
+                ],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout.split()
+            peak_rss, elapsed = float(output[0]), float(output[1])
+            results.append(peak_rss)
+            print(f"{size_mib:>10} {peak_rss:>14.1f} {elapsed:>8.3f}")
+            os.remove(pdf_path)
+
+    growth = max(results) - min(results)
+    print(f"peak RSS growth: {growth:.1f} MiB (allowed {ALLOWED_GROWTH_MIB} MiB)")
+    return 0 if growth <= ALLOWED_GROWTH_MIB else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""
+Benchmark of verifying a signed PDF file without a cache, from a cached stat and from a cached copy.
+
+Run from the repository root: python -m benchmarks.bench_verify_cache
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from app.pdf.pdf_signer import PDFSigner
+from app.pdf.pdf_verifier import PDFVerifier
+from app.pdf.verification_cache import VerificationCache
+
+
+def _time_ms(func, iterations: int) -> list[float]:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--key-size", type=int, default=4096)
+    parser.add_argument("--size-mib", type=int, default=16)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    private_key = rsa.generate_private_key(
+        public_exponent=65537, key_size=args.key_size
+    )
+    public_key = private_key.public_key()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdf_file_path = os.path.join(tmp_dir, "document.pdf")
+        with open(pdf_file_path, "wb") as f:
+            f.write(os.urandom(args.size_mib * 1024 * 1024))
+        PDFSigner(private_key).sign(pdf_file_path)
+
+        uncached = _time_ms(
+            lambda: PDFVerifier(public_key).verify(pdf_file_path), args.iterations
+        )
+
+        verifier = PDFVerifier(
+            public_key, VerificationCache(os.path.join(tmp_dir, "cache.sqlite"))
+        )
+        verifier.verify(pdf_file_path)
+        cached = _time_ms(lambda: verifier.verify(pdf_file_path), args.iterations)
+
+        def verify_copy():
+            copy_path = os.path.join(tmp_dir, "copy.pdf")
+            shutil.copyfile(pdf_file_path, copy_path)
+            start = time.perf_counter()
+            verifier.verify(copy_path)
+            os.remove(copy_path)
+            return (time.perf_counter() - start) * 1000
+
+        copied = [verify_copy() for _ in range(args.iterations)]
+
+    print(f"RSA-{args.key_size}, {args.size_mib} MiB, {args.iterations} iterations")
+    print(f"{'':>8} {'median ms':>10} {'p99 ms':>10}")
+    for name, timings in (("verify", uncached), ("cached", cached), ("copy", copied)):
+        p99 = statistics.quantiles(timings, n=100)[98]
+        print(f"{name:>8} {statistics.median(timings):>10.3f} {p99:>10.3f}")
+    print(f"speedup: {statistics.median(uncached) / statistics.median(cached):.0f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
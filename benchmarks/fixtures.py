@@ -0,0 +1,134 @@
+"""
+Fixed key fixtures and synthetic PDF files for the benchmarks.
+
+The keys in benchmarks/fixtures are for benchmarking only and must never be used
+to sign real documents. Their PIN is 1234. To regenerate them:
+
+    python -m benchmarks.fixtures --overwrite
+"""
+
+import argparse
+import os
+import sys
+
+from cryptography.hazmat.primitives.asymmetric.types import PrivateKeyTypes
+
+from app.keys_loading.key_generation import (
+    RSA_KEY_SIZE,
+    decrypt_private_key,
+    generate_key_pair,
+)
+from app.keys_loading.pin_kdf import LEGACY_KDF
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+PIN = "1234"
+KEY_NAMES = (
+    "rsa-2048",
+    "rsa-3072",
+    "rsa-4096",
+    "ecdsa-p256",
+    "ecdsa-p384",
+    "ed25519",
+)
+
+FILLER_BLOCK_SIZE = 1024 * 1024
+# all numbers in the synthetic file have a fixed width, so its size is exact
+PDF_HEAD = (
+    b"%%PDF-1.7\n%%\xe2\xe3\xcf\xd3\n"
+    b"1 0 obj\n<</Type /Catalog /Pages 2 0 R>>\nendobj\n"
+    b"2 0 obj\n<</Type /Pages /Kids [3 0 R] /Count 1>>\nendobj\n"
+    b"3 0 obj\n<</Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents 4 0 R>>\n"
+    b"endobj\n"
+    b"4 0 obj\n<</Length %020d>>\nstream\n"
+)
+PDF_STREAM_END = b"\nendstream\nendobj\n"
+PDF_TAIL = (
+    b"xref\n0 5\n0000000000 65535 f\r\n%s"
+    b"trailer\n<</Size 5 /Root 1 0 R>>\nstartxref\n%020d\n%%%%EOF\n"
+)
+XREF_ENTRY_SIZE = 20
+MIN_SYNTHETIC_PDF_SIZE = (
+    len(PDF_HEAD % 0)
+    + len(PDF_STREAM_END)
+    + len(PDF_TAIL % (b"0" * 4 * XREF_ENTRY_SIZE, 0))
+)
+
+
+def private_key_path(name: str) -> str:
+    return os.path.join(FIXTURES_DIR, f"{name}-private.pem")
+
+
+def public_key_path(name: str) -> str:
+    return os.path.join(FIXTURES_DIR, f"{name}-public.pem")
+
+
+def load_private_key(name: str) -> PrivateKeyTypes:
+    """
+    Loads a private key fixture.
+    :param name: One of KEY_NAMES.
+    :return: The decrypted private key.
+    """
+    with open(private_key_path(name), "rb") as f:
+        return decrypt_private_key(f.read(), PIN)
+
+
+def generate_fixtures(overwrite: bool = False) -> None:
+    """
+    Generates the key fixtures with the key generator, encrypted with PIN.
+    :param overwrite: Whether to replace existing fixtures.
+    """
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    for name in KEY_NAMES:
+        if os.path.exists(private_key_path(name)) and not overwrite:
+            continue
+        if name.startswith("rsa-"):
+            key_type, key_size = "rsa", int(name[len("rsa-") :])
+        else:
+            key_type, key_size = name, RSA_KEY_SIZE
+        # legacy encryption, so key loading benchmarks stay comparable between runs
+        private_pem, public_pem = generate_key_pair(PIN, key_size, key_type, LEGACY_KDF)
+        with open(private_key_path(name), "wb") as f:
+            f.write(private_pem)
+        with open(public_key_path(name), "wb") as f:
+            f.write(public_pem)
+        print(f"Generated {name}")
+
+
+def write_synthetic_pdf(path: str, size: int) -> None:
+    """
+    Writes a valid single-page PDF file of exactly the given size, padded with an
+    incompressible content stream. Only one block of random data is generated.
+    :param:
+        path: The output file.
+        size: The file size in bytes, at least MIN_SYNTHETIC_PDF_SIZE.
+    """
+    stream_length = size - MIN_SYNTHETIC_PDF_SIZE
+    if stream_length < 0:
+        raise ValueError(
+            f"Synthetic PDF files are at least {MIN_SYNTHETIC_PDF_SIZE} bytes long"
+        )
+
+    head = PDF_HEAD % stream_length
+    offsets = [head.index(b"%d 0 obj" % number) for number in range(1, 5)]
+    filler = memoryview(os.urandom(min(stream_length, FILLER_BLOCK_SIZE)))
+    with open(path, "wb") as f:
+        f.write(head)
+        remaining = stream_length
+        while remaining > 0:
+            remaining -= f.write(filler[:remaining])
+        f.write(PDF_STREAM_END)
+        xref_offset = f.tell()
+        entries = b"".join(b"%010d 00000 n\r\n" % offset for offset in offsets)
+        f.write(PDF_TAIL % (entries, xref_offset))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--overwrite", action="store_true")
+    args = parser.parse_args()
+    generate_fixtures(args.overwrite)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,453 @@
+"""
+Benchmark suite for the signing, verification, key loading and pen drive scanning hot paths.
+
+Run from the repository root: python -m benchmarks.suite
+Results are saved as JSON, by default to benchmarks/results/<commit>.json, and can be
+compared with an earlier run:
+
+    python -m benchmarks.suite --sizes 10K,1M,100M,2G
+    python -m benchmarks.suite --compare benchmarks/results/<earlier commit>.json
+
+Every case is run once to warm up, then repeated until it has run at least
+--min-repeat times and for at least --min-time seconds. Untimed setup runs before
+every repetition, e.g. to restore a signed file to its original size.
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, Optional
+
+import cryptography
+
+from app.keys_loading import PrivateKey, PublicKey
+from app.keys_loading.key_generation import encrypt_private_key
+from app.keys_loading.pin_kdf import DEFAULT_KDF
+from app.pdf.chunked_signer import ChunkedPDFSigner
+from app.pdf.pades_signer import PAdESSigner
+from app.pdf.pdf_signer import PDFSigner
+from app.pdf.pdf_verifier import PDFVerifier
+
+from . import fixtures
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+DEFAULT_SIZES = "10K,1M,16M,128M"
+SIZE_UNITS = {"K": 1000, "M": 1000**2, "G": 1000**3}
+# files this large are not run for warm-up
+NO_WARMUP_SIZE = 256 * 1000**2
+PEN_DRIVE_FILES = (100, 2000)
+
+
+@dataclass
+class Case:
+    """
+    A single benchmark: run is timed, prepare runs once before the case and setup
+    before every repetition, both untimed.
+    """
+
+    suite: str
+    params: dict
+    run: Callable[[], object]
+    setup: Optional[Callable[[], object]] = None
+    bytes_processed: int = 0
+    skipped: Optional[str] = None
+    prepare: Optional[Callable[[], object]] = None
+
+    @property
+    def name(self) -> str:
+        params = ",".join(f"{key}={value}" for key, value in self.params.items())
+        return f"{self.suite}[{params}]"
+
+
+@dataclass
+class Context:
+    """
+    Files shared between the cases, created lazily in a temporary directory.
+    There is a single document of every size; cases that sign it truncate it back
+    to its original size, so large sizes do not multiply the disk usage.
+    """
+
+    tmp_dir: str
+    sizes: list[int]
+    keys: list[str]
+    _documents: dict[int, str] = field(default_factory=dict)
+
+    def document(self, size: int) -> str:
+        """
+        :return: Path of an unsigned synthetic PDF file of the given size.
+        """
+        if size not in self._documents:
+            path = os.path.join(self.tmp_dir, f"document-{size}.pdf")
+            fixtures.write_synthetic_pdf(path, size)
+            self._documents[size] = path
+        return self._documents[size]
+
+
+def _copy_file(source: str, destination: str) -> None:
+    with open(source, "rb") as src, open(destination, "wb") as dst:
+        while chunk := src.read(1024 * 1024):
+            dst.write(chunk)
+
+
+def _format_size(size: int) -> str:
+    for unit, factor in reversed(SIZE_UNITS.items()):
+        if size >= factor and size % factor == 0:
+            return f"{size // factor}{unit}"
+    return str(size)
+
+
+def _parse_size(text: str) -> int:
+    text = text.strip().upper()
+    if text[-1] in SIZE_UNITS:
+        return int(float(text[:-1]) * SIZE_UNITS[text[-1]])
+    return int(text)
+
+
+def _truncate(path: str, size: int) -> Callable[[], None]:
+    return lambda: os.truncate(path, size)
+
+
+def _sign_cases(
+    context: Context, suite: str, make_signer: Callable[[object], PDFSigner]
+) -> Iterator[Case]:
+    for key_name in context.keys:
+        private_key = fixtures.load_private_key(key_name)
+        for size in context.sizes:
+            params = {"key": key_name, "size": _format_size(size)}
+            path = context.document(size)
+            signer = make_signer(private_key)
+            yield Case(
+                suite,
+                params,
+                lambda s=signer, p=path: s.sign(p),
+                _truncate(path, size),
+                size,
+            )
+
+
+def sign_cases(context: Context) -> Iterator[Case]:
+    return _sign_cases(context, "sign", PDFSigner)
+
+
+def atomic_sign_cases(context: Context) -> Iterator[Case]:
+    return _sign_cases(context, "atomic_sign", lambda key: PDFSigner(key, atomic=True))
+
+
+def pades_sign_cases(context: Context) -> Iterator[Case]:
+    for key_name in context.keys:
+        private_key = fixtures.load_private_key(key_name)
+        try:
+            signer = PAdESSigner(private_key)
+        except ValueError as e:
+            signer, skipped = None, str(e)
+        for size in context.sizes:
+            params = {"key": key_name, "size": _format_size(size)}
+            if signer is None:
+                yield Case("pades_sign", params, None, skipped=skipped)
+                continue
+            path = context.document(size)
+            yield Case(
+                "pades_sign",
+                params,
+                lambda s=signer, p=path: s.sign(p),
+                _truncate(path, size),
+                size,
+            )
+
+
+def _verify_cases(
+    context: Context, suite: str, make_signer: Callable[[object], PDFSigner]
+) -> Iterator[Case]:
+    for key_name in context.keys:
+        private_key = fixtures.load_private_key(key_name)
+        for size in context.sizes:
+            params = {"key": key_name, "size": _format_size(size)}
+            path = context.document(size)
+            signer = make_signer(private_key)
+            verifier = PDFVerifier(private_key.public_key())
+
+            def prepare(s=signer, p=path, size=size):
+                os.truncate(p, size)
+                s.sign(p)
+
+            def run(v=verifier, p=path):
+                if not v.verify(p):
+                    raise RuntimeError(f"Signature of {p} is not valid")
+
+            yield Case(suite, params, run, bytes_processed=size, prepare=prepare)
+
+
+def verify_cases(context: Context) -> Iterator[Case]:
+    return _verify_cases(context, "verify", PDFSigner)
+
+
+def chunked_sign_cases(context: Context) -> Iterator[Case]:
+    return _sign_cases(context, "chunked_sign", ChunkedPDFSigner)
+
+
+def chunked_verify_cases(context: Context) -> Iterator[Case]:
+    return _verify_cases(context, "chunked_verify", ChunkedPDFSigner)
+
+
+def load_private_key_cases(context: Context) -> Iterator[Case]:
+    private_key = PrivateKey()
+    for key_name in context.keys:
+        path = fixtures.private_key_path(key_name)
+
+        def run(p=path):
+            if not private_key.load_private_key(p, fixtures.PIN):
+                raise RuntimeError(f"Failed to load {p}")
+
+        yield Case(
+            "load_private_key", {"key": key_name}, run, private_key.sessions.clear
+        )
+        yield Case("load_private_key_cached", {"key": key_name}, run)
+
+        # unlock with the default PIN KDF, the fixtures use the legacy SHA-256 of the PIN
+        kdf_path = os.path.join(context.tmp_dir, f"{key_name}-kdf-private.pem")
+        with open(kdf_path, "wb") as f:
+            f.write(
+                encrypt_private_key(fixtures.load_private_key(key_name), fixtures.PIN)
+            )
+        yield Case(
+            "load_private_key",
+            {"key": key_name, "kdf": DEFAULT_KDF.spec()},
+            lambda p=kdf_path: run(p),
+            private_key.sessions.clear,
+        )
+
+
+def load_public_key_cases(context: Context) -> Iterator[Case]:
+    public_key = PublicKey()
+    for key_name in context.keys:
+        path = fixtures.public_key_path(key_name)
+        yield Case(
+            "load_public_key",
+            {"key": key_name},
+            lambda p=path: public_key.load_public_key(p),
+        )
+
+
+def _make_pen_drive(path: str, files: int) -> None:
+    """
+    Fills a directory with files spread over nested directories and one private key.
+    """
+    for i in range(files):
+        directory = os.path.join(path, f"dir{i % 10}", f"sub{i % 7}")
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"file{i}.txt"), "wb") as f:
+            f.write(b"x" * 100)
+    os.makedirs(os.path.join(path, "keys"), exist_ok=True)
+    _copy_file(
+        fixtures.private_key_path("rsa-2048"),
+        os.path.join(path, "keys", "private-key.pem"),
+    )
+
+
+def pen_drive_scan_cases(context: Context) -> Iterator[Case]:
+    try:
+        from app.pendrive_detection import PenDriveFinder
+    except ImportError as e:
+        yield Case("pen_drive_scan", {}, None, skipped=str(e))
+        return
+
+    for files in PEN_DRIVE_FILES:
+        path = os.path.join(context.tmp_dir, f"pen-drive-{files}")
+        _make_pen_drive(path, files)
+        finder = PenDriveFinder()
+
+        def run(f=finder, p=path):
+            if f.get_private_key_path(p) is None:
+                raise RuntimeError(f"No private key found on {p}")
+
+        yield Case(
+            "pen_drive_scan",
+            {"files": files},
+            run,
+            lambda f=finder, p=path: f.key_index.forget(p),
+        )
+        yield Case("pen_drive_scan_cached", {"files": files}, run)
+
+
+SUITES = {
+    "sign": sign_cases,
+    "atomic_sign": atomic_sign_cases,
+    "pades_sign": pades_sign_cases,
+    "verify": verify_cases,
+    "chunked_sign": chunked_sign_cases,
+    "chunked_verify": chunked_verify_cases,
+    "load_private_key": load_private_key_cases,
+    "load_public_key": load_public_key_cases,
+    "pen_drive_scan": pen_drive_scan_cases,
+}
+
+
+def measure(case: Case, min_repeat: int, min_time: float, max_repeat: int) -> dict:
+    """
+    Times a case.
+    :return: Timing statistics in milliseconds, and throughput if the case processes bytes.
+    """
+    if case.prepare is not None:
+        case.prepare()
+    if case.bytes_processed < NO_WARMUP_SIZE:
+        if case.setup is not None:
+            case.setup()
+        case.run()
+
+    timings = []
+    total = 0.0
+    while len(timings) < max_repeat and (len(timings) < min_repeat or total < min_time):
+        if case.setup is not None:
+            case.setup()
+        start = time.perf_counter()
+        case.run()
+        elapsed = time.perf_counter() - start
+        timings.append(elapsed * 1000)
+        total += elapsed
+
+    result = {
+        "repeat": len(timings),
+        "min_ms": round(min(timings), 4),
+        "median_ms": round(statistics.median(timings), 4),
+        "mean_ms": round(statistics.mean(timings), 4),
+        "stdev_ms": round(statistics.stdev(timings), 4) if len(timings) > 1 else 0.0,
+    }
+    if case.bytes_processed:
+        result["mb_per_s"] = round(
+            case.bytes_processed / 1000**2 / (result["median_ms"] / 1000), 2
+        )
+    return result
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(RESULTS_DIR),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict, baseline_path: str, threshold: float) -> int:
+    """
+    Prints the change of every median compared with an earlier run.
+    :return: The number of cases slower than the baseline by more than threshold.
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    regressions = 0
+    print(f"\nCompared with {baseline.get('commit')} ({baseline_path}):")
+    for name, result in results["results"].items():
+        before = baseline["results"].get(name)
+        if not before or "median_ms" not in before or "median_ms" not in result:
+            continue
+        ratio = result["median_ms"] / before["median_ms"]
+        mark = ""
+        if ratio > 1 + threshold:
+            mark = "  REGRESSION"
+            regressions += 1
+        elif ratio < 1 - threshold:
+            mark = "  improved"
+        print(
+            f"{name:<55} {before['median_ms']:>11.3f} {result['median_ms']:>11.3f} "
+            f"{ratio:>6.2f}x{mark}"
+        )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--suite",
+        action="append",
+        choices=sorted(SUITES),
+        help="Suites to run, all by default; can be given multiple times",
+    )
+    parser.add_argument("--filter", help="Run only the cases matching this regex")
+    parser.add_argument(
+        "--sizes",
+        default=DEFAULT_SIZES,
+        help=f"Document sizes, e.g. 10K,1M,100M,2G (default: {DEFAULT_SIZES})",
+    )
+    parser.add_argument(
+        "--keys", default=",".join(fixtures.KEY_NAMES), help="Key fixtures to use"
+    )
+    parser.add_argument("--min-repeat", type=int, default=3)
+    parser.add_argument("--max-repeat", type=int, default=100)
+    parser.add_argument("--min-time", type=float, default=1.0)
+    parser.add_argument("-o", "--output", help="Results file (JSON)")
+    parser.add_argument("--compare", help="Earlier results file to compare with")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Relative slowdown reported as a regression (default: 0.1)",
+    )
+    args = parser.parse_args()
+
+    fixtures.generate_fixtures()
+    sizes = [
+        max(_parse_size(size), fixtures.MIN_SYNTHETIC_PDF_SIZE)
+        for size in args.sizes.split(",")
+    ]
+    keys = args.keys.split(",")
+    name_filter = re.compile(args.filter) if args.filter else None
+
+    commit = _git_commit()
+    results = {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "cryptography": cryptography.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "results": {},
+    }
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        context = Context(tmp_dir, sizes, keys)
+        for suite in args.suite or SUITES:
+            for case in SUITES[suite](context):
+                if name_filter is not None and not name_filter.search(case.name):
+                    continue
+                if case.skipped:
+                    results["results"][case.name] = {"skipped": case.skipped}
+                    print(f"{case.name:<55} skipped: {case.skipped}")
+                    continue
+                result = measure(case, args.min_repeat, args.min_time, args.max_repeat)
+                results["results"][case.name] = result
+                throughput = (
+                    f" {result['mb_per_s']:>9.1f} MB/s" if "mb_per_s" in result else ""
+                )
+                print(
+                    f"{case.name:<55} {result['median_ms']:>11.3f} ms "
+                    f"(n={result['repeat']}){throughput}"
+                )
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit or 'results'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults saved to {output}")
+
+    if args.compare:
+        return 1 if compare(results, args.compare, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,48 +1,222 @@
-from hashlib import sha256
+"""
+Generates key pairs for the PAdES tool, one interactively or many in bulk.
 
-from cryptography.hazmat.primitives import serialization
-from cryptography.hazmat.primitives.asymmetric import rsa
-from pwinput import pwinput
+    python keys-generator/generate.py
+        One key pair in the current directory, the PIN is asked for interactively.
+    python keys-generator/generate.py --users users.txt -o keys/
+        A key pair for every "user:PIN" line of users.txt ('-' for stdin),
+        written to keys/<user>/, generated on all CPUs.
+    python keys-generator/generate.py --fill-pool pool/ --count 50 --pool-pin-file pin
+        Pre-generates 50 keys, encrypted with the pool PIN.
+    python keys-generator/generate.py --users users.txt -o keys/ --pool pool/ --pool-pin-file pin
+        Provisions users from the pool instantly, generating keys only when it runs out.
+"""
 
-RSA_KEY_SIZE = 4096
+import argparse
+import os
+import sys
+import time
+from typing import Iterable, Iterator, Optional
 
+# the key generation code is shared with the application
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-def get_pin_from_user():
-    pin = pwinput(prompt="Enter a PIN for private key: ")
+from app.keys_loading.key_generation import (  # noqa: E402
+    KEY_TYPES,
+    PRIVATE_KEY_FILE_NAME,
+    RSA_KEY_SIZE,
+    generate_key_pair,
+    generate_key_pairs,
+    write_key_pair,
+)
+from app.keys_loading.key_pool import KeyPool  # noqa: E402
+from app.keys_loading.pin_kdf import DEFAULT_KDF, KDFParameters  # noqa: E402
+
+
+def get_pin_from_user(prompt: str = "Enter a PIN for private key: ") -> str:
+    from pwinput import pwinput
+
+    pin = pwinput(prompt=prompt)
 
     while pwinput(prompt="Confirm PIN: ") != pin:
         print("PINs do not match. Please try again.")
-        pin = pwinput(prompt="Enter a PIN for private key: ")
+        pin = pwinput(prompt=prompt)
 
     return pin
 
 
-private_key = rsa.generate_private_key(
-    public_exponent=65537,  # industry standard
-    key_size=RSA_KEY_SIZE,
-)
+def read_user_pins(lines: Iterable[str]) -> list[tuple[str, str]]:
+    """
+    Parses "user:PIN" lines, like chpasswd does. Empty lines and lines starting
+    with # are skipped.
+    :param lines: The lines to parse.
+    :return: (user, PIN) pairs, in order.
+    :raises ValueError: If a line is malformed or a user name is not a valid directory name.
+    """
+    users = []
+    for number, line in enumerate(lines, start=1):
+        line = line.rstrip("\r\n")
+        if not line.strip() or line.startswith("#"):
+            continue
+        user, separator, pin = line.partition(":")
+        if not separator or not pin:
+            raise ValueError(f"Line {number}: expected user:PIN")
+        if user in ("", ".", "..") or os.sep in user or "/" in user:
+            raise ValueError(f"Line {number}: invalid user name {user!r}")
+        users.append((user, pin))
+    return users
+
 
-pin = get_pin_from_user()
-pin_hash = sha256(pin.encode()).digest()
+def provision(
+    users: list[tuple[str, str]],
+    output_dir: str,
+    key_size: int = RSA_KEY_SIZE,
+    key_type: str = "rsa",
+    workers: Optional[int] = None,
+    pool: Optional[KeyPool] = None,
+    kdf: KDFParameters = DEFAULT_KDF,
+) -> Iterator[tuple[str, str, str]]:
+    """
+    Writes a key pair for every user to <output_dir>/<user>/. Keys are taken from
+    the pool while it lasts, the rest are generated in a process pool.
+    :param:
+        users: (user, PIN) pairs.
+        output_dir: The directory for the per-user directories.
+        key_size: Size of the RSA modulus in bits.
+        key_type: One of KEY_TYPES.
+        workers: Number of processes, the number of CPUs by default.
+        pool: Optional pool of pre-generated keys of the same type and size.
+        kdf: Parameters of the PIN key derivation of generated keys, see pin_kdf.
+    :return: The user, the private and the public key path for every user, in the order
+        the keys become available.
+    """
+    remaining = []
+    for user, pin in users:
+        key_pair = pool.take(pin) if pool is not None else None
+        if key_pair is None:
+            remaining.append((user, pin))
+            continue
+        yield user, *write_key_pair(*key_pair, os.path.join(output_dir, user))
 
-with open("private-key.pem", "wb") as f:
-    pem = private_key.private_bytes(
-        encoding=serialization.Encoding.PEM,
-        format=serialization.PrivateFormat.TraditionalOpenSSL,
-        encryption_algorithm=serialization.BestAvailableEncryption(
-            pin_hash
-        ),  # OpenSSL backend uses 'aes-256-cbc' as BestAvailableEncryption
+    key_pairs = generate_key_pairs(
+        (pin for _, pin in remaining), key_size, key_type, workers, kdf
     )
-    f.write(pem)
-    print("Private key saved to private-key.pem")
+    for (user, _), key_pair in zip(remaining, key_pairs):
+        yield user, *write_key_pair(*key_pair, os.path.join(output_dir, user))
 
-public_key = private_key.public_key()
 
-with open("public-key.pem", "wb") as f:
-    f.write(
-        public_key.public_bytes(
-            encoding=serialization.Encoding.PEM,
-            format=serialization.PublicFormat.SubjectPublicKeyInfo,
-        )
+def _read_pool_pin(pool_pin_file: Optional[str]) -> str:
+    if pool_pin_file:
+        with open(pool_pin_file, "r") as f:
+            return f.readline().rstrip("\n")
+    return get_pin_from_user("Enter the PIN of the key pool: ")
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[1],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="\n".join(__doc__.splitlines()[2:]),
+    )
+    parser.add_argument(
+        "--users", help="File with user:PIN lines, '-' for stdin (bulk mode)"
+    )
+    parser.add_argument("-o", "--output-dir", default=".")
+    parser.add_argument("--key-type", choices=KEY_TYPES, default="rsa")
+    parser.add_argument("--key-size", type=int, default=RSA_KEY_SIZE)
+    parser.add_argument(
+        "--workers", type=int, help="Generating processes, all CPUs by default"
+    )
+    parser.add_argument(
+        "--overwrite", action="store_true", help="Replace existing key pairs"
+    )
+    parser.add_argument("--pool", help="Take keys from this pool directory")
+    parser.add_argument("--fill-pool", help="Pre-generate keys into this directory")
+    parser.add_argument(
+        "--count", type=int, default=10, help="Number of keys the pool should hold"
+    )
+    parser.add_argument("--pool-pin-file", help="File with the PIN of the key pool")
+    parser.add_argument(
+        "--kdf",
+        type=KDFParameters.parse,
+        default=DEFAULT_KDF,
+        help="PIN KDF parameters, see 'python -m app.cli kdf-calibrate'",
     )
-    print("Public key saved to public-key.pem")
+    args = parser.parse_args(argv)
+
+    if args.fill_pool:
+        pool = KeyPool(
+            args.fill_pool,
+            _read_pool_pin(args.pool_pin_file),
+            args.key_type,
+            args.key_size,
+            args.kdf,
+        )
+        start = time.perf_counter()
+        added = pool.fill(args.count, args.workers)
+        print(
+            f"Added {added} keys in {time.perf_counter() - start:.1f} s, "
+            f"{len(pool)} keys in the pool"
+        )
+        return 0
+
+    if not args.users:
+        private_pem, public_pem = generate_key_pair(
+            get_pin_from_user(), args.key_size, args.key_type, args.kdf
+        )
+        private_key_path, public_key_path = write_key_pair(
+            private_pem, public_pem, args.output_dir
+        )
+        print(f"Private key saved to {private_key_path}")
+        print(f"Public key saved to {public_key_path}")
+        return 0
+
+    try:
+        if args.users == "-":
+            users = read_user_pins(sys.stdin)
+        else:
+            with open(args.users, "r") as f:
+                users = read_user_pins(f)
+    except (OSError, ValueError) as e:
+        print(f"Cannot read users: {e}", file=sys.stderr)
+        return 1
+
+    existing = [
+        user
+        for user, _ in users
+        if os.path.exists(os.path.join(args.output_dir, user, PRIVATE_KEY_FILE_NAME))
+    ]
+    if existing and not args.overwrite:
+        print(
+            f"Key pairs already exist for: {', '.join(existing)}; use --overwrite",
+            file=sys.stderr,
+        )
+        return 1
+
+    pool = None
+    if args.pool:
+        pool = KeyPool(
+            args.pool,
+            _read_pool_pin(args.pool_pin_file),
+            args.key_type,
+            args.key_size,
+            args.kdf,
+        )
+
+    start = time.perf_counter()
+    for user, private_key_path, _ in provision(
+        users,
+        args.output_dir,
+        args.key_size,
+        args.key_type,
+        args.workers,
+        pool,
+        args.kdf,
+    ):
+        print(f"{user}: {private_key_path}")
+    print(f"Generated {len(users)} key pairs in {time.perf_counter() - start:.1f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,35 +1,33 @@
-from hashlib import sha256
+import os
+import sys
 
 from cryptography.exceptions import InvalidSignature
 from cryptography.hazmat.primitives import hashes, serialization
-from cryptography.hazmat.primitives.asymmetric import padding
+from cryptography.hazmat.primitives.asymmetric import ec, padding, rsa
 from pwinput import pwinput
 
-pin = pwinput(prompt="Enter PIN: ")
-hashed_pin = sha256(pin.encode()).digest()
+# the PIN key derivation is shared with the application
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-message = b"Test message to sign"
-signature = None
+from app.keys_loading.key_generation import decrypt_private_key  # noqa: E402
 
-with open("private-key.pem", "rb") as f:
-    try:
-        private_key = serialization.load_pem_private_key(f.read(), password=hashed_pin)
-        signature = private_key.sign(
+
+def sign(private_key, message: bytes) -> bytes:
+    if isinstance(private_key, rsa.RSAPrivateKey):
+        return private_key.sign(
             message,
             padding.PSS(
                 mgf=padding.MGF1(hashes.SHA256()), salt_length=padding.PSS.MAX_LENGTH
             ),
             hashes.SHA256(),
         )
-        print("message signed")
-    except ValueError:
-        print("Invalid password")
-        exit(1)
+    if isinstance(private_key, ec.EllipticCurvePrivateKey):
+        return private_key.sign(message, ec.ECDSA(hashes.SHA256()))
+    return private_key.sign(message)  # Ed25519
 
 
-with open("public-key.pem", "rb") as f:
-    public_key = serialization.load_pem_public_key(f.read())
-    try:
+def verify(public_key, signature: bytes, message: bytes) -> None:
+    if isinstance(public_key, rsa.RSAPublicKey):
         public_key.verify(
             signature,
             message,
@@ -38,6 +36,31 @@ with open("public-key.pem", "rb") as f:
             ),
             hashes.SHA256(),
         )
+    elif isinstance(public_key, ec.EllipticCurvePublicKey):
+        public_key.verify(signature, message, ec.ECDSA(hashes.SHA256()))
+    else:
+        public_key.verify(signature, message)  # Ed25519
+
+
+pin = pwinput(prompt="Enter PIN: ")
+
+message = b"Test message to sign"
+signature = None
+
+with open("private-key.pem", "rb") as f:
+    try:
+        private_key = decrypt_private_key(f.read(), pin)
+        signature = sign(private_key, message)
+        print("message signed")
+    except ValueError:
+        print("Invalid password")
+        exit(1)
+
+
+with open("public-key.pem", "rb") as f:
+    public_key = serialization.load_pem_public_key(f.read())
+    try:
+        verify(public_key, signature, message)
         print("signature verified")
     except InvalidSignature:
         print("Invalid signature")